@@ -0,0 +1,88 @@
+"""
+Compares two benchmark reports from `benchmarks.run` and flags regressions.
+
+    python -m benchmarks.compare base.json new.json [--threshold 0.1]
+
+Exits with status 1 if any metric got worse by more than the threshold (a fraction).
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+HIGHER_IS_BETTER = {"throughput_rps", "turns_per_s"}
+IGNORED = {"requests", "turns", "bytes"}  # Workload sizes, not measurements
+
+
+def _key(result: dict) -> Tuple[str, str]:
+    return result["benchmark"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(base: dict, new: dict, threshold: float = 0.1) -> List[Dict]:
+    """
+    Matches results by benchmark and params and computes the relative change of each metric.
+
+    Returns:
+        One row per metric present in both reports, with `change` (positive means worse)
+        and `regression` set when the change exceeds the threshold
+    """
+    base_results = {_key(r): r for r in base["results"]}
+    rows = []
+    for result in new["results"]:
+        previous = base_results.get(_key(result))
+        if previous is None:
+            continue
+        for metric, value in result["metrics"].items():
+            old = previous["metrics"].get(metric)
+            if metric in IGNORED or not old:
+                continue
+            delta = (value - old) / old
+            change = -delta if metric in HIGHER_IS_BETTER else delta
+            rows.append({
+                "benchmark": result["benchmark"],
+                "params": result["params"],
+                "metric": metric,
+                "base": old,
+                "new": value,
+                "change": change,
+                "regression": change > threshold,
+            })
+    return rows
+
+
+def format_rows(rows: List[Dict]) -> str:
+    lines = []
+    for row in rows:
+        params = ", ".join(f"{k}={v}" for k, v in row["params"].items())
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(
+            f"{row['benchmark']:<16} {params:<48} {row['metric']:<14} "
+            f"{row['base']:>12g} -> {row['new']:>12g}  {-row['change']:+7.1%}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown counted as a regression (default: 0.1)")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    rows = compare(base, new, args.threshold)
+    print(format_rows(rows))
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Local stand-ins for the network dependencies, so benchmarks run offline and reproducibly:
+- `PageServer`: HTTP server for the saved page corpus, plus a generated huge page
+  and a slow-drip variant of every page
+- `FakeDDGS`: search backend returning corpus URLs after a fixed latency
+- `MockOllama`: `/api/chat` endpoint (and `/api/show`, reporting tool support) that streams scripted replies with configurable
+  prefill and per-token latency
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "pages")
+
+SLOW_DRIP_CHUNK = 1024      # Bytes per write for /slow/ pages
+SLOW_DRIP_INTERVAL = 0.005  # Seconds between writes
+
+
+def load_corpus() -> Dict[str, bytes]:
+    """
+    Returns the saved pages by name, plus "huge" (about 4 MB of listing rows).
+    """
+    pages = {}
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        if filename.endswith(".html"):
+            with open(os.path.join(CORPUS_DIR, filename), "rb") as f:
+                pages[filename[:-len(".html")]] = f.read()
+
+    row = b"<li><a href='/item'>Item title</a> <span>with a short description of the entry</span></li>\n"
+    pages["huge"] = (
+        b"<html><head><title>Huge</title><style>li { color: red }</style></head><body>"
+        b"<nav>Menu</nav><main><h1>Huge listing</h1><ul>\n"
+        + row * (4 * 1024 * 1024 // len(row))
+        + b"</ul></main><footer>End</footer></body></html>"
+    )
+    return pages
+
+
+class _BackgroundServer:
+    """
+    ThreadingHTTPServer running on a daemon thread; use as a context manager.
+    """
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.handler_class)
+        self.server.daemon_threads = True
+        self.server.owner = self
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like real sites
+
+    def do_GET(self):
+        pages = self.server.owner.pages
+        slow = self.path.startswith("/slow/")
+        name = self.path[len("/slow/" if slow else "/"):]
+        body = pages.get(name)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            if not slow:
+                self.wfile.write(body)
+                return
+            for start in range(0, len(body), SLOW_DRIP_CHUNK):
+                self.wfile.write(body[start:start + SLOW_DRIP_CHUNK])
+                self.wfile.flush()
+                time.sleep(SLOW_DRIP_INTERVAL)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading early (streaming extraction)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PageServer(_BackgroundServer):
+    """
+    Serves the corpus at /<name> and drip-fed at /slow/<name>.
+    """
+
+    handler_class = _PageHandler
+
+    def __init__(self, pages: Optional[Dict[str, bytes]] = None):
+        super().__init__()
+        self.pages = pages if pages is not None else load_corpus()
+
+    def url(self, name: str, slow: bool = False) -> str:
+        return f"{self.base_url}/{'slow/' if slow else ''}{name}"
+
+
+class FakeDDGS:
+    """
+    Stands in for `duckduckgo_search.DDGS`: returns `urls` after `latency` seconds.
+    """
+
+    def __init__(self, urls: List[str], latency: float = 0.05):
+        self.urls = urls
+        self.latency = latency
+
+    def text(self, query, region="wt-wt", safesearch="moderate", max_results=10):
+        time.sleep(self.latency)
+        return [{"href": url, "title": query} for url in self.urls[:max_results]]
+
+
+class _OllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        mock = self.server.owner
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/api/show":
+            self._write_json({"model_info": {}, "capabilities": ["completion", "tools"]})
+            return
+        messages = request.get("messages") or []
+        last = messages[-1] if messages else {}
+        tool_result = last.get("role") == "tool" or str(last.get("content", "")).startswith("[Tool")
+
+        # Scripted agent turn: fetch a page first, answer once the tool result is in
+        if mock.tool_url and request.get("tools") and not tool_result:
+            chunks = [{"content": "", "tool_calls": [
+                {"function": {"name": "fetch_page_text", "arguments": {"url": mock.tool_url}}}
+            ]}]
+        else:
+            chunks = [{"content": "word "} for _ in range(mock.reply_tokens)]
+
+        started = time.perf_counter()
+        time.sleep(mock.prefill_latency)
+        prefill = time.perf_counter() - started
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            time.sleep(mock.token_latency)
+            self._write_line({"model": request.get("model"), "done": False,
+                              "message": {"role": "assistant", **chunk}})
+        total = time.perf_counter() - started
+        self._write_line({
+            "model": request.get("model"), "done": True, "done_reason": "stop",
+            "message": {"role": "assistant", "content": ""},
+            "total_duration": int(total * 1e9), "load_duration": 0,
+            "prompt_eval_count": sum(len(str(m.get("content", ""))) for m in messages) // 4,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(chunks), "eval_duration": int((total - prefill) * 1e9),
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_json(self, data: dict) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_line(self, data: dict) -> None:
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockOllama(_BackgroundServer):
+    """
+    Mock Ollama server for `ollama.AsyncClient(host=mock.base_url)`.
+
+    With `tool_url` set, a request that offers tools and does not end with a tool
+    result is answered with a `fetch_page_text` call for that URL; everything else
+    gets a `reply_tokens`-token text reply.
+
+    Args:
+        prefill_latency: Seconds before the first chunk
+        token_latency: Seconds per streamed chunk
+    """
+
+    handler_class = _OllamaHandler
+
+    def __init__(self, tool_url: Optional[str] = None, reply_tokens: int = 20,
+                 prefill_latency: float = 0.05, token_latency: float = 0.002):
+        super().__init__()
+        self.tool_url = tool_url
+        self.reply_tokens = reply_tokens
+        self.prefill_latency = prefill_latency
+        self.token_latency = token_latency
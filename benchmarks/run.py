@@ -0,0 +1,274 @@
+"""
+Offline benchmark suite.
+
+Measures, against the local stand-ins in `benchmarks.fixtures`:
+- fetch_page_text: throughput and p50/p99 latency per workload and concurrency
+- extract: parse cost per MB for each engine and corpus page
+- search_urls: latency of upstream searches and of cache hits
+- agent: end-to-end `MCPAgent.process_query` turns per second at varying concurrency
+  (mock Ollama, real MCP server over stdio, one fetch per turn)
+
+Results are written as JSON; compare two runs with `python -m benchmarks.compare`.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --quick --only fetch,extract
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from benchmarks.fixtures import FakeDDGS, MockOllama, PageServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCHMARKS = ("fetch", "extract", "search", "agent")
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of a non-empty list.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def latency_metrics(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+    }
+
+
+def result(benchmark: str, params: dict, metrics: dict) -> dict:
+    return {"benchmark": benchmark, "params": params, "metrics": metrics}
+
+
+async def run_concurrently(calls: List[Callable[[], Awaitable]], concurrency: int):
+    """
+    Runs the calls with at most `concurrency` in flight.
+
+    Returns:
+        (latency of each call in seconds, total elapsed seconds)
+    """
+    queue = list(reversed(calls))
+    latencies = []
+
+    async def worker():
+        while queue:
+            call = queue.pop()
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - started
+
+
+async def bench_fetch(pages: PageServer, concurrency_levels: List[int], requests: int) -> List[dict]:
+    from mcp_server import config, hosts, http_client, page_cache
+    from mcp_server.tools.fetch_page import fetch_page_text
+
+    saved = [name for name in pages.pages if name != "huge"]
+    workloads = {
+        "corpus": [pages.url(name) for name in saved],
+        "huge": [pages.url("huge")],
+        "slow_drip": [pages.url(name, slow=True) for name in saved],
+    }
+
+    # Measure download and parse, not cache hits (get_page_cache() would reopen the user's store)
+    cache_enabled = config.PAGE_CACHE_ENABLED
+    config.PAGE_CACHE_ENABLED = False
+    page_cache.set_page_cache(None)
+    hosts.reset_host_states()
+    hosts.get_host_state(urlsplit(pages.base_url).netloc, rate=0)  # Nor per-host pacing
+    results = []
+    try:
+        await fetch_page_text(workloads["corpus"][0])  # Warm-up: imports and the connection pool
+        for workload, urls in workloads.items():
+            count = requests if workload == "corpus" else max(requests // 4, 4)
+            for concurrency in concurrency_levels:
+                calls = [
+                    lambda url=urls[i % len(urls)]: fetch_page_text(url)
+                    for i in range(count)
+                ]
+                latencies, elapsed = await run_concurrently(calls, concurrency)
+                results.append(result(
+                    "fetch_page_text",
+                    {"workload": workload, "concurrency": concurrency},
+                    {"requests": count, "throughput_rps": round(count / elapsed, 2), **latency_metrics(latencies)},
+                ))
+    finally:
+        await http_client.aclose()
+        config.PAGE_CACHE_ENABLED = cache_enabled
+        page_cache.set_page_cache(None)
+        hosts.reset_host_states()
+    return results
+
+
+def bench_extract(pages: PageServer, min_time: float) -> List[dict]:
+    from mcp_server.extract import ENGINES, extract_text
+
+    results = []
+    for name, body in pages.pages.items():
+        html = body.decode("utf-8", errors="replace")
+        megabytes = len(body) / 1e6
+        for engine in ENGINES:
+            extract_text(html, engine=engine)  # Warm-up (imports, caches)
+            calls = 0
+            started = time.perf_counter()
+            while True:
+                extract_text(html, engine=engine)
+                calls += 1
+                elapsed = time.perf_counter() - started
+                if elapsed >= min_time:
+                    break
+            per_call = elapsed / calls
+            results.append(result(
+                "extract",
+                {"engine": engine, "page": name},
+                {"bytes": len(body), "ms_per_call": round(per_call * 1000, 4),
+                 "s_per_mb": round(per_call / megabytes, 4)},
+            ))
+    return results
+
+
+async def bench_search(pages: PageServer, queries: int, latency: float) -> List[dict]:
+    from mcp_server import hosts, search_cache
+    from mcp_server.tools import search_urls as search_module
+
+    search_module._ddgs = FakeDDGS([pages.url(name) for name in pages.pages], latency=latency)
+    search_cache.set_search_cache(search_cache.SearchCache(ttl=3600, max_entries=queries))
+    hosts.reset_host_states()
+    hosts.get_host_state(search_module.SEARCH_HOST, rate=0)
+    try:
+        misses, _ = await run_concurrently(
+            [lambda i=i: search_module.search_urls(f"query {i}") for i in range(queries)], 1
+        )
+        hits, _ = await run_concurrently(
+            [lambda i=i: search_module.search_urls(f"query {i}") for i in range(queries)], 1
+        )
+    finally:
+        search_module._ddgs = None
+        search_cache.set_search_cache(None)
+        hosts.reset_host_states()
+    return [
+        result("search_urls", {"cache": "miss", "backend_latency_ms": latency * 1000}, latency_metrics(misses)),
+        result("search_urls", {"cache": "hit", "backend_latency_ms": latency * 1000}, latency_metrics(hits)),
+    ]
+
+
+async def bench_agent(pages: PageServer, concurrency_levels: List[int], turns: int,
+                      prefill_latency: float, token_latency: float) -> List[dict]:
+    from mcp_client.agent import MCPAgent
+    from mcp_client.llm.ollama_client import OllamaClient
+    from mcp_client.service import AgentService
+
+    results = []
+    with MockOllama(tool_url=pages.url("news_article"),
+                    prefill_latency=prefill_latency, token_latency=token_latency) as ollama:
+        agent = MCPAgent(max_tool_concurrency=max(concurrency_levels), echo=False)
+        agent.llm_client = OllamaClient(model="mock", host=ollama.base_url)
+        try:
+            connected = await agent.connect_to_server("web", {
+                "command": sys.executable,
+                "args": ["-m", "mcp_server"],
+                "cwd": REPO_ROOT,
+                "env": {"PAGE_CACHE_ENABLED": "0", "FETCH_HOST_RATE": "0"},
+            })
+            if not connected:
+                raise RuntimeError("Could not start the MCP server")
+
+            for concurrency in concurrency_levels:
+                service = AgentService(agent, max_active=concurrency, max_pending=turns)
+                await service.submit("warm-up", "Warm up")
+                calls = [
+                    lambda i=i: service.submit(f"user-{i % concurrency}", f"Question {i}")
+                    for i in range(turns)
+                ]
+                latencies, elapsed = await run_concurrently(calls, concurrency)
+                results.append(result(
+                    "agent",
+                    {"concurrency": concurrency, "prefill_latency_ms": prefill_latency * 1000,
+                     "token_latency_ms": token_latency * 1000},
+                    {"turns": turns, "turns_per_s": round(turns / elapsed, 2), **latency_metrics(latencies)},
+                ))
+        finally:
+            await agent.cleanup()
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(only=BENCHMARKS, quick: bool = False, concurrency: Optional[List[int]] = None) -> dict:
+    """
+    Runs the selected benchmarks and returns the report (see module docstring).
+    """
+    concurrency = concurrency or ([1, 4] if quick else [1, 4, 16])
+    results = []
+    with PageServer() as pages:
+        if "fetch" in only:
+            results += await bench_fetch(pages, concurrency, requests=16 if quick else 200)
+        if "extract" in only:
+            results += bench_extract(pages, min_time=0.02 if quick else 0.5)
+        if "search" in only:
+            results += await bench_search(pages, queries=5 if quick else 50, latency=0.05)
+        if "agent" in only:
+            results += await bench_agent(pages, concurrency, turns=8 if quick else 64,
+                                         prefill_latency=0.05, token_latency=0.002)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the MCP web agent")
+    parser.add_argument("--output", "-o", help="Write the JSON report to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations, for smoke runs")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated subset of {BENCHMARKS}")
+    parser.add_argument("--concurrency", help="Comma-separated concurrency levels (default: 1,4,16)")
+    args = parser.parse_args()
+
+    only = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(only) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {sorted(unknown)}")
+    concurrency = [int(c) for c in args.concurrency.split(",")] if args.concurrency else None
+
+    report = asyncio.run(run_benchmarks(only, quick=args.quick, concurrency=concurrency))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,142 +1,459 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
 from contextlib import AsyncExitStack
-from typing import List, Dict
-from mcp import ClientSession, StdioServerParameters
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Optional, Set, Tuple
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.sse import sse_client
 from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
 from mcp_client.types import ToolDefinition
 from mcp_client.llm.ollama_client import OllamaClient
+from mcp_client.llm.config import (
+    CONTEXT_TOKEN_BUDGET,
+    CONTEXT_KEEP_RECENT,
+    TOOL_CACHE_TTLS,
+    TOOL_CACHE_DEFAULT_TTL,
+    TOOL_CACHE_MAX_ENTRIES,
+)
+from mcp_client.llm.context import ContextBudget
 from mcp_client.llm.prompts import SYSTEM_PROMPT
 from mcp_client.llm.tool_helpers import (
-    format_tool_result_as_user_message,
-    extract_text_from_tool_result
+    format_tool_result_message,
+    parse_tool_result_message,
+    render_tool_result
 )
+from mcp_client.tool_cache import MISS, ToolResultCache
+from mcp_tracing.tracer import format_summary, get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class ToolCallError(Exception):
+    """
+    Raised for a tool result the server flagged as an error (isError), so it is not cached.
+
+    Carries the result's text items, which still go to the LLM.
+    """
+
+    def __init__(self, tool_name: str, content: List[str]):
+        super().__init__(f"Tool {tool_name!r} failed: {' '.join(content)}")
+        self.content = content
+
+
+@dataclass
+class Conversation:
+    """
+    The state of one conversation: its message history, compacted to fit the context budget.
+    """
+    id: str = "default"
+    messages: List[dict] = field(default_factory=list)
+    last_active: float = field(default_factory=time.monotonic)
+    # Page text hash -> (URL it was first returned for, the text), while the history holds the text
+    returned_texts: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+
 
 class MCPAgent:
     """
     The main agent class for interacting with the MCP server and the local LLM.
+
+    MCP sessions, tools and the LLM client are shared by all conversations; each
+    `process_query` call works on the history of the conversation it is given.
     """
 
     MAX_LOOP_ITERATIONS = 5  # Prevent infinite loops if the LLM repeatedly calls tools
+    MAX_TOOL_CONCURRENCY = 4  # Tool calls from one LLM turn that may run at the same time
+    SERVER_START_TIMEOUT = 30.0  # Seconds a server may take to launch, initialize and list its tools
+    REPEATED_RESULT_MIN_CHARS = 200  # Longer results or page texts already in the history are replaced by a reference
 
-    def __init__(self):
+    def __init__(self, max_tool_concurrency: Optional[int] = None, echo: bool = True):
         self.sessions: List[ClientSession] = []  # All active tool server sessions
-        self.exit_stack = AsyncExitStack()       # Ensures clean async resource teardown
+        self.server_tasks: Dict[str, asyncio.Task] = {}  # One task per server, owning its connection
+        self.server_ready: Dict[str, asyncio.Future] = {}  # Resolved with each server's tools once connected
+        self.stop_servers = asyncio.Event()      # Tells the server tasks to close their connections
+        self.connecting: Set[asyncio.Task] = set()  # Startups still running after connect_to_servers returned
         self.llm_client = OllamaClient()         # Handles interaction with the local LLM
         self.available_llm_tools: List[ToolDefinition] = []  # Tool metadata passed to the LLM
         self.tool_to_session: Dict[str, ClientSession] = {}  # Maps tool names to MCP sessions
-        self.messages = []  # Complete message history sent to the LLM
+        self.conversation = Conversation()  # Used when process_query is given no conversation
+        self.echo = echo  # Print replies and tool calls to the console as they stream in
+        self.context_budget = ContextBudget(CONTEXT_TOKEN_BUDGET, CONTEXT_KEEP_RECENT)
+        self.tool_semaphore = asyncio.Semaphore(max_tool_concurrency or self.MAX_TOOL_CONCURRENCY)
+        self.tool_cache = ToolResultCache(TOOL_CACHE_TTLS, TOOL_CACHE_DEFAULT_TTL, TOOL_CACHE_MAX_ENTRIES)
+        self.tracer = get_tracer()  # Records latency spans when TRACE_FILE is set
+        self.server_trace_files: List[str] = []  # Spans streamed by the tool servers
 
-    async def handle_tool_call(self, tool_name: str, tool_args: dict, tool_use_id: str) -> str:
+    @property
+    def messages(self) -> List[dict]:
+        """
+        Message history of the default conversation.
+        """
+        return self.conversation.messages
+
+    @messages.setter
+    def messages(self, messages: List[dict]) -> None:
+        self.conversation.messages = messages
+
+    async def handle_tool_call(self, tool_name: str, tool_args: dict, tool_use_id: str,
+                               conversation_id: Optional[str] = None) -> str:
         """
         Executes a single MCP tool and returns its output as plain string.
         """
-        print(f"Calling MCP tool '{tool_name}'...")
+        try:
+            return render_tool_result(await self.call_tool(tool_name, tool_args, conversation_id))
+        except ToolCallError as e:
+            return render_tool_result(e.content)
+
+    async def call_tool(self, tool_name: str, tool_args: dict, conversation_id: Optional[str] = None) -> List[str]:
+        """
+        Executes a single MCP tool and returns the text items of its output, before rendering.
+
+        The conversation id is passed to the server in the request metadata, so it
+        can tell conversations sharing this session apart.
+
+        Raises:
+            ToolCallError: If the server reports the call as failed
+        """
+        logger.info("Calling MCP tool %r", tool_name)
         session = self.tool_to_session.get(tool_name)
         if not session:
             raise ValueError(f"No session found for tool: {tool_name}")
 
-        tool_response = await session.call_tool(tool_name, arguments=tool_args)
-        return extract_text_from_tool_result(tool_response.content)
+        with self.tracer.span(f"tool.{tool_name}"):
+            meta = {}
+            if conversation_id is not None:
+                meta["conversation"] = conversation_id
+            traceparent = self.tracer.traceparent()
+            if traceparent is not None:
+                meta["traceparent"] = traceparent  # Server spans join this trace
+            if not meta:
+                tool_response = await session.call_tool(tool_name, arguments=tool_args)
+            else:
+                request = types.ClientRequest(types.CallToolRequest(
+                    method="tools/call",
+                    params=types.CallToolRequestParams(name=tool_name, arguments=tool_args, _meta=meta),
+                ))
+                tool_response = await session.send_request(request, types.CallToolResult)
+            content = [item.text for item in tool_response.content if hasattr(item, "text")]
+            if tool_response.isError:
+                raise ToolCallError(tool_name, content)
+            return content
 
-    async def connect_to_server(self, server_name: str, server_config: dict) -> None:
+    def start_tool_call(self, tool_name: str, tool_args: dict, tool_use_id: str,
+                        conversation_id: Optional[str] = None) -> asyncio.Task:
         """
-        Launches and connects to an MCP server via stdio transport.
+        Starts a tool call in the background, at most `MAX_TOOL_CONCURRENCY` running at once.
+        The task returns the text items of the result, rendered once it is added to the history.
+
+        Results of cacheable tools are reused within the conversation (see `ToolResultCache`),
+        and identical calls running at the same time share one request.
+        """
+        async def run_one() -> List[str]:
+            async with self.tool_semaphore:
+                return await self.call_tool(tool_name, tool_args, conversation_id)
+
+        key = self.tool_cache.make_key(conversation_id, tool_name, tool_args)
+        if key is None:
+            return asyncio.ensure_future(run_one())
+
+        async def run_cached() -> List[str]:
+            result, source = await self.tool_cache.run(key, run_one)
+            if source != MISS:
+                logger.info("Tool %r result reused (%s)", tool_name, source)
+                self.tracer.add_span("tool_cache.hit", time.time(), 0.0, tool=tool_name, source=source)
+            return result
+
+        return asyncio.ensure_future(run_cached())
+
+    async def connect_to_servers(self, servers: Dict[str, dict], timeout: Optional[float] = None) -> None:
+        """
+        Launches all servers at the same time, each with its own startup timeout.
+
+        Returns as soon as one server is connected (or all have failed); slower
+        servers keep starting in the background and register their tools when ready.
+        """
+        pending = {
+            asyncio.ensure_future(self.connect_to_server(name, cfg, timeout))
+            for name, cfg in servers.items()
+        }
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if any(task.result() for task in done):
+                break
+        self.connecting.update(pending)
+
+    async def connect_to_server(self, server_name: str, server_config: dict, timeout: Optional[float] = None) -> bool:
+        """
+        Launches and connects to an MCP server via stdio transport, or attaches to a
+        running one by URL if the config has a "url" instead of a "command":
+        - {"url": "http://host:8001/sse"} connects over SSE
+        - {"url": "http://host:8001/mcp"} or "transport": "streamable-http" uses streamable HTTP
         Registers all available tools for that session.
+
+        The connection lives in a background task until `cleanup()`. A server that is not
+        ready within `timeout` seconds (a "timeout" key in its config takes precedence) is stopped.
+
+        Returns:
+            Whether the server is connected
+        """
+        server_config = dict(server_config)
+        timeout = server_config.pop("timeout", timeout or self.SERVER_START_TIMEOUT)
+        ready = self.server_ready[server_name] = asyncio.get_running_loop().create_future()
+        task = self.server_tasks[server_name] = asyncio.create_task(
+            self._run_server(server_name, server_config, ready)
+        )
+
+        try:
+            with self.tracer.span("agent.connect", server=server_name):
+                tools = await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Server %s did not start within %s seconds", server_name, timeout)
+            task.cancel()
+            return False
+        except Exception as e:
+            logger.error("Failed to connect to %s: %s", server_name, e)
+            return False
+
+        logger.info("Connected to %s with %d tools", server_name, len(tools))
+        self._print(f"\nConnected to {server_name} with tools:", [t.name for t in tools])
+        return True
+
+    async def _run_server(self, server_name: str, server_config: dict, ready: asyncio.Future) -> None:
+        """
+        Owns one server connection: opens it, registers its tools, and keeps it open
+        until `stop_servers` is set. The transport contexts must be entered and exited
+        in the same task, which is why each server gets a task of its own.
         """
         try:
-            server_params = StdioServerParameters(**server_config)
-
-            # Automatically close connections when the agent shuts down
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            read, write = stdio_transport
-
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-            self.sessions.append(session)
-
-            # Fetch and register all tools from this server
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"\nConnected to {server_name} with tools:", [t.name for t in tools])
-
-            for tool in tools:
-                self.tool_to_session[tool.name] = session
-                self.available_llm_tools.append({
-                    "name": tool.name,
-                    "description": tool.description,
-                    "input_schema": tool.inputSchema
-                })
+            async with AsyncExitStack() as exit_stack:
+                read, write = await self._open_transport(server_name, server_config, exit_stack)
+                session = await exit_stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+
+                # Fetch and register all tools from this server
+                response = await session.list_tools()
+                tools = response.tools
+                self.sessions.append(session)
+                for tool in tools:
+                    self.tool_to_session[tool.name] = session
+                    self.available_llm_tools.append({
+                        "name": tool.name,
+                        "description": tool.description,
+                        "input_schema": tool.inputSchema
+                    })
+                self.llm_client.set_tools(self.available_llm_tools)  # Converted once, not per LLM call
+                ready.set_result(tools)
 
+                await self.stop_servers.wait()
+
+        except asyncio.CancelledError:
+            ready.cancel()
+            raise
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.error("Connection to %s closed with an error: %s", server_name, e)
+
+    async def _open_transport(self, server_name: str, server_config: dict, exit_stack: AsyncExitStack):
+        """
+        Opens the connection described by a server config entry and returns its (read, write) streams.
+        """
+        if "url" in server_config:
+            url = server_config["url"]
+            headers = server_config.get("headers")
+            transport = server_config.get("transport") or ("streamable-http" if url.rstrip("/").endswith("/mcp") else "sse")
+            if transport == "streamable-http":
+                read, write, _ = await exit_stack.enter_async_context(streamablehttp_client(url, headers=headers))
+            else:
+                read, write = await exit_stack.enter_async_context(sse_client(url, headers=headers))
+            return read, write
+
+        if self.tracer.enabled:
+            # The server streams its spans to a side file, merged into the trace on cleanup
+            trace_file = f"{self.tracer.path}.{server_name}.jsonl"
+            if os.path.exists(trace_file):
+                os.remove(trace_file)  # Left over from an earlier session
+            self.server_trace_files.append(trace_file)
+            server_config = {**server_config, "env": {**(server_config.get("env") or {}), "TRACE_FILE": trace_file}}
+
+        return await exit_stack.enter_async_context(stdio_client(StdioServerParameters(**server_config)))
+
+    async def warm_up(self) -> None:
+        """
+        Loads the LLM and primes its prompt cache with the system prompt and tools,
+        so the first query does not pay for a cold model. Failures are only logged.
+        """
+        self._print("\nWarming up the model...")
+        try:
+            await self.llm_client.warm_up([{"role": "system", "content": SYSTEM_PROMPT}])
         except Exception as e:
-            print(f"Failed to connect to {server_name}: {e}")
+            logger.warning("Model warm-up failed: %s", e)
 
-    async def process_query(self, query: str):
+    async def process_query(self, query: str, conversation: Optional[Conversation] = None) -> Optional[str]:
         """
         Sends a user query to the LLM and handles any resulting tool calls.
+
+        Args:
+            query: The user's message
+            conversation: The conversation to continue (default: the agent's own)
+
+        Returns:
+            The LLM's final reply, or None if the interaction failed
         """
-        if not self.messages:
-            self.messages.append({"role": "system", "content": SYSTEM_PROMPT})  # Inject initial system prompt
+        conversation = conversation or self.conversation
+        with self.tracer.span("agent.query", conversation=conversation.id):
+            reply = await self._process_query(query, conversation)
+        conversation.last_active = time.monotonic()
+        return reply
+
+    async def _process_query(self, query: str, conversation: Conversation) -> Optional[str]:
+        if not conversation.messages:
+            conversation.messages.append({"role": "system", "content": SYSTEM_PROMPT})  # Inject initial system prompt
 
-        print(f"\nProcessing query: {query}")
-        self.messages.append({"role": "user", "content": query})
+        logger.info("Processing query: %s", query)
+        conversation.messages.append({"role": "user", "content": query})
+        native_tool_role = await self.llm_client.supports_tool_role()
 
         loop_count = 0
+        reply = None
 
         while loop_count < self.MAX_LOOP_ITERATIONS:
             loop_count += 1
             try:
-                print(f"Calling LLM (Iteration {loop_count})...")
-                ollama_response = await self.llm_client.chat(
-                    messages=self.messages,
-                    tools=self.available_llm_tools
-                )
-
-                # Handle malformed responses
-                if 'content' not in ollama_response or not ollama_response['content']:
-                    print("\nLLM returned no content or an empty response.")
-                    self.messages.append({"role": "assistant", "content": "[No reply]"})
-                    break
+                with self.tracer.span("agent.iteration", iteration=loop_count):
+                    logger.info("Calling LLM (iteration %d)", loop_count)
+                    conversation.messages = self.context_budget.compact(conversation.messages)
+                    text_parts = []
+                    tool_calls_made_this_turn = []
+                    tool_tasks = []
+
+                    # Print text as it arrives and start each tool call as soon as it is parsed
+                    try:
+                        async for block in self.llm_client.chat_stream(messages=conversation.messages):
+                            if block['type'] == 'text_delta':
+                                if not text_parts:
+                                    self._print("\nLLM says:")
+                                self._print(block['text'], end="", flush=True)
+                                text_parts.append(block['text'])
+                            elif block['type'] == 'tool_use':
+                                tool_name = block['name']
+                                tool_args = block['input']
+                                tool_use_id = block['id']
+                                self._print(f"\nLLM requested tool: {tool_name} with arguments: {tool_args}")
+                                tool_calls_made_this_turn.append((tool_name, tool_args, tool_use_id))
+                                tool_tasks.append(self.start_tool_call(tool_name, tool_args, tool_use_id, conversation.id))
+                    except BaseException:
+                        for task in tool_tasks:
+                            task.cancel()
+                        raise
 
-                assistant_message_content = []
-                tool_calls_made_this_turn = []
-
-                # Process each returned block: text or tool call
-                for block in ollama_response['content']:
-                    if block['type'] == 'text':
-                        print("\nLLM says:")
-                        print(block['text'])
-                        assistant_message_content.append(block)
-                    elif block['type'] == 'tool_use':
-                        tool_name = block['name']
-                        tool_args = block['input']
-                        tool_use_id = block['id']
-                        print(f"\nLLM requested tool: {tool_name} with arguments: {tool_args}")
-                        assistant_message_content.append(block)
-                        tool_calls_made_this_turn.append((tool_name, tool_args, tool_use_id))
-
-                # Add assistant response to message history (text + tool metadata)
-                text_parts = [b['text'] for b in assistant_message_content if b['type'] == 'text']
-                final_text = "\n".join(text_parts).strip() or "[No response]"
-                self.messages.append({"role": "assistant", "content": final_text})
-
-                # Execute any requested tools and inject their result as synthetic user messages
-                if tool_calls_made_this_turn:
-                    for tool_name, tool_args, tool_use_id in tool_calls_made_this_turn:
-                        result = await self.handle_tool_call(tool_name, tool_args, tool_use_id)
-                        print(f"Tool '{tool_name}' returned: {result[:200]}...")
-                        self.messages.append(format_tool_result_as_user_message(tool_name, result))
-                else:
-                    break  # No tool calls → final answer received
+                    if text_parts:
+                        self._print()  # End the streamed line
+
+                    # Handle empty responses
+                    if not text_parts and not tool_calls_made_this_turn:
+                        self._print("\nLLM returned no content or an empty response.")
+                        reply = "[No reply]"
+                        conversation.messages.append({"role": "assistant", "content": reply})
+                        break
+
+                    # Add assistant response to message history
+                    final_text = "".join(text_parts).strip() or "[No response]"
+                    assistant_message = {"role": "assistant", "content": final_text}
+                    if native_tool_role and tool_calls_made_this_turn:
+                        assistant_message["tool_calls"] = [
+                            {"function": {"name": name, "arguments": args}}
+                            for name, args, _ in tool_calls_made_this_turn
+                        ]
+                    conversation.messages.append(assistant_message)
+                    reply = final_text
+
+                    # Execute any requested tools and inject their results (as tool messages or synthetic user messages)
+                    if tool_calls_made_this_turn:
+                        results = await asyncio.gather(*tool_tasks, return_exceptions=True)
+                        # Append in request order so the history is deterministic
+                        for (tool_name, _, _), result in zip(tool_calls_made_this_turn, results):
+                            if isinstance(result, ToolCallError):
+                                result = result.content  # The LLM sees the error; it was not cached
+                            elif isinstance(result, Exception):
+                                raise result
+                            result = render_tool_result(result, self._already_returned(conversation))
+                            logger.debug("Tool %r returned %d characters", tool_name, len(result))
+                            if self._repeats_result(conversation, tool_name, result):
+                                result = "[Same result as the earlier identical call above]"
+                            conversation.messages.append(format_tool_result_message(tool_name, result, native_tool_role))
+                    else:
+                        break  # No tool calls → final answer received
 
             except Exception as e:
-                print(f"\n[Error in process_query] An error occurred during LLM interaction or tool execution: {e}")
+                logger.error("Error during LLM interaction or tool execution: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+                reply = None
                 break
 
         if loop_count >= self.MAX_LOOP_ITERATIONS:
-            print("\n[Warning] Exceeded maximum LLM interaction iterations. Stopping to prevent infinite loop.")
+            logger.warning("Exceeded maximum LLM interaction iterations; stopping to prevent an infinite loop")
+
+        return reply
+
+    def _repeats_result(self, conversation: Conversation, tool_name: str, result: str) -> bool:
+        # A repeated call's long result need not be injected again while the first copy is still in the history
+        if len(result) < self.REPEATED_RESULT_MIN_CHARS:
+            return False
+        return any(
+            parse_tool_result_message(message) == (tool_name, result)
+            for message in conversation.messages
+        )
+
+    def _already_returned(self, conversation: Conversation) -> Callable[[str, str], Optional[str]]:
+        """
+        Returns the check `render_tool_result` makes for each page of one result: a short
+        reference to show instead of the text, if the conversation still has that text
+        or it appears earlier in the same result.
+
+        Texts are matched by hash, so a mirror of an earlier page is caught as well. Only
+        text still in the history verbatim counts; once compaction truncated or dropped
+        it, the page is returned in full again (and its hash is forgotten).
+        """
+        for digest, (_, text) in list(conversation.returned_texts.items()):
+            if not self._holds_text(conversation, text):
+                del conversation.returned_texts[digest]
+        included: Dict[str, str] = {}  # Texts earlier in the same result
+
+        def check(url: str, text: str) -> Optional[str]:
+            if len(text) < self.REPEATED_RESULT_MIN_CHARS:
+                return None
+            digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            first_url = included.get(digest)
+            if first_url is not None:
+                if first_url == url:
+                    return "[Same text as above]"
+                return f"[Same text as {first_url} above]"
+            if digest in conversation.returned_texts:
+                first_url = conversation.returned_texts[digest][0]
+                if first_url == url:
+                    return f"[The text of {first_url} was already returned earlier in this conversation]"
+                return f"[Same text as {first_url}, already returned earlier in this conversation]"
+            conversation.returned_texts[digest] = (url, text)
+            included[digest] = url
+            return None
+
+        return check
+
+    @staticmethod
+    def _holds_text(conversation: Conversation, text: str) -> bool:
+        for message in conversation.messages:
+            parsed = parse_tool_result_message(message)
+            if parsed is not None and text in parsed[1]:
+                return True
+        return False
+
+    def _print(self, *args, **kwargs) -> None:
+        if self.echo:
+            print(*args, **kwargs)
 
     async def chat_loop(self):
         """
@@ -145,16 +462,26 @@ class MCPAgent:
         print("Chat loop started. Type 'quit' to exit.")
         while True:
             try:
-                query = input("\nQuery: ").strip()
+                # Read input on a thread so servers still starting in the background can finish
+                query = (await asyncio.to_thread(input, "\nQuery: ")).strip()
                 if query.lower() == "quit":
                     break
                 await self.process_query(query)
             except Exception as e:
-                print(f"\nError in chat loop: {e}")
+                logger.error("Error in chat loop: %s", e)
         print("Chat loop finished.")
 
     async def cleanup(self):
         """
-        Cleanly shut down all sessions using the exit stack.
+        Cleanly shut down all sessions; each server task closes its own connection.
+        Writes the latency trace and prints a per-stage summary if tracing is on.
         """
-        await self.exit_stack.aclose()
+        self.stop_servers.set()
+        for name, task in self.server_tasks.items():
+            if not self.server_ready[name].done():
+                task.cancel()  # Still starting
+        await asyncio.gather(*self.server_tasks.values(), *self.connecting, return_exceptions=True)
+        events = self.tracer.write(self.server_trace_files)
+        if events:
+            print(f"\nLatency trace written to {self.tracer.path}")
+            print(format_summary(events))
@@ -9,4 +9,34 @@ OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:14b")
 
 # Set Ollama's expected host environment variable
-os.environ["OLLAMA_HOST"] = OLLAMA_HOST
\ No newline at end of file
+os.environ["OLLAMA_HOST"] = OLLAMA_HOST
+
+# How long the model stays loaded after a request: a duration ("30m"), seconds, -1 (forever) or 0
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+if OLLAMA_KEEP_ALIVE.lstrip("-").isdigit():
+    OLLAMA_KEEP_ALIVE = int(OLLAMA_KEEP_ALIVE)  # Ollama only accepts bare numbers as JSON numbers
+
+# Context window requested from Ollama (0 = server default); must hold CONTEXT_TOKEN_BUDGET plus the reply
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+
+# Send tool results as native 'tool' role messages: "auto" if the model reports the tools capability, "1" or "0"
+OLLAMA_TOOL_ROLE = os.getenv("OLLAMA_TOOL_ROLE", "auto").lower()
+
+# Load the model and prefill the system prompt and tools at startup
+OLLAMA_WARMUP = os.getenv("OLLAMA_WARMUP", "1") == "1"
+
+# Prompt budget (estimated tokens) before older history is compacted
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "6000"))
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", "6"))  # Messages always kept verbatim
+
+# Client-side tool result cache: seconds a result is reused within a conversation, per tool
+TOOL_CACHE_TTLS = {
+    name.strip(): float(ttl)
+    for name, _, ttl in (
+        item.partition("=") for item in os.getenv(
+            "TOOL_CACHE_TTLS", "search_urls=1800,fetch_page_text=600,fetch_pages_text=600"
+        ).split(",") if item.strip()
+    )
+}
+TOOL_CACHE_DEFAULT_TTL = float(os.getenv("TOOL_CACHE_DEFAULT_TTL", "0"))  # Other tools may have side effects
+TOOL_CACHE_MAX_ENTRIES = int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "256"))
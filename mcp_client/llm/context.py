@@ -0,0 +1,111 @@
+from typing import List
+from mcp_client.llm.tool_helpers import (
+    parse_tool_result_message,
+    replace_tool_result
+)
+
+# Rough average for English text and code with Llama/Qwen-style tokenizers
+CHARS_PER_TOKEN = 4
+
+# Per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CONTEXT_OMITTED_NOTICE = "[Earlier messages omitted to fit the context window]"
+
+
+def estimate_tokens(messages: List[dict]) -> int:
+    """
+    Estimates the prompt size of a message list without running a tokenizer.
+    """
+    return sum(
+        len(str(m.get("content") or "")) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+        for m in messages
+    )
+
+
+class ContextBudget:
+    """
+    Keeps the message history under a token budget.
+
+    The system prompt and the most recent messages are kept verbatim. When the
+    history is over budget, older tool results are compacted step by step until it fits:
+    1. Results repeated later in the history are replaced by a short reference
+    2. Remaining older results are truncated to `tool_result_chars`
+    3. The oldest messages are dropped and replaced by a single notice; an assistant
+       message is dropped together with the 'tool' role results of its calls
+    4. As a last resort, recent tool results are truncated as well
+
+    Nothing is changed while the history fits, so the prompt prefix stays stable
+    between calls and the model server can reuse its cache.
+    """
+
+    def __init__(self, max_tokens: int, keep_recent: int = 6, tool_result_chars: int = 600):
+        self.max_tokens = max_tokens
+        self.keep_recent = keep_recent
+        self.tool_result_chars = tool_result_chars
+
+    def fits(self, messages: List[dict]) -> bool:
+        return estimate_tokens(messages) <= self.max_tokens
+
+    def compact(self, messages: List[dict]) -> List[dict]:
+        """
+        Returns a history that fits the budget (the input list is not modified).
+        """
+        if self.fits(messages):
+            return messages
+
+        messages = list(messages)
+        head = 1 if messages and messages[0].get("role") == "system" else 0
+        recent_start = max(head, len(messages) - self.keep_recent)
+
+        self._deduplicate(messages, head, recent_start)
+        if self.fits(messages):
+            return messages
+
+        self._truncate_results(messages, head, recent_start)
+        if self.fits(messages):
+            return messages
+
+        messages, recent_start = self._drop_oldest(messages, head, recent_start)
+        if self.fits(messages):
+            return messages
+
+        self._truncate_results(messages, recent_start, len(messages))
+        return messages
+
+    def _deduplicate(self, messages: List[dict], start: int, end: int) -> None:
+        seen_later = set()
+        for i in range(len(messages) - 1, start - 1, -1):
+            parsed = parse_tool_result_message(messages[i])
+            if parsed is None:
+                continue
+            _, result = parsed
+            if i < end and result in seen_later:
+                messages[i] = replace_tool_result(messages[i], "[Same result as a later call; omitted]")
+            seen_later.add(result)
+
+    def _truncate_results(self, messages: List[dict], start: int, end: int) -> None:
+        for i in range(start, end):
+            parsed = parse_tool_result_message(messages[i])
+            if parsed is None:
+                continue
+            _, result = parsed
+            if len(result) > self.tool_result_chars:
+                omitted = len(result) - self.tool_result_chars
+                messages[i] = replace_tool_result(
+                    messages[i], f"{result[:self.tool_result_chars]}\n[... {omitted} more characters omitted]"
+                )
+
+    def _drop_oldest(self, messages: List[dict], head: int, recent_start: int):
+        # An earlier notice is dropped along with the messages and re-added once
+        notice = [{"role": "user", "content": CONTEXT_OMITTED_NOTICE}]
+        end = head + 1
+        while end <= recent_start:
+            # Native tool results must not outlive the assistant message that called them
+            while end < len(messages) and messages[end].get("role") == "tool":
+                end += 1
+            compacted = messages[:head] + notice + messages[end:]
+            if self.fits(compacted) or end >= recent_start:
+                return compacted, max(recent_start - (end - head) + 1, head + 1)
+            end += 1
+        return messages, recent_start
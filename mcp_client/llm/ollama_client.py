@@ -1,5 +1,12 @@
+import logging
+import time
 import ollama
-from mcp_client.llm.config import OLLAMA_HOST, OLLAMA_MODEL
+from typing import AsyncIterator, Optional
+from mcp_client.llm.config import OLLAMA_HOST, OLLAMA_MODEL, OLLAMA_KEEP_ALIVE, OLLAMA_NUM_CTX, OLLAMA_TOOL_ROLE
+from mcp_client.log import should_log_payload
+from mcp_tracing.tracer import Span, Tracer, get_tracer
+
+logger = logging.getLogger(__name__)
 
 class OllamaClient:
     """
@@ -7,18 +14,79 @@ class OllamaClient:
 
     This class provides a unified chat interface and handles optional tool-calling
     logic compatible with the Ollama API format.
+
+    Every request carries the same model options and keep-alive, so the loaded
+    model and its prompt cache are reused between turns.
     """
 
-    def __init__(self, model: str = OLLAMA_MODEL):
+    def __init__(self, model: str = OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE, num_ctx: int = OLLAMA_NUM_CTX,
+                 host: str = OLLAMA_HOST, tool_role: str = OLLAMA_TOOL_ROLE):
         """
         Initialize the client with the given model and Ollama host.
 
         Args:
             model: The model name to use (e.g., "qwen2.5:14b")
+            keep_alive: How long Ollama keeps the model loaded after a request
+            num_ctx: Context window size in tokens (0 for the server default)
+            host: Ollama server URL
+            tool_role: Native 'tool' role messages: "auto", "1" or "0"
         """
         self.model = model
-        self.client = ollama.AsyncClient(host=OLLAMA_HOST)
-        print(f"OllamaClient initialized with model: '{self.model}' and host: '{OLLAMA_HOST}'")
+        self.client = ollama.AsyncClient(host=host)
+        self.keep_alive = keep_alive
+        self.options = {"num_ctx": num_ctx} if num_ctx > 0 else {}
+        self.tools: list = []  # Tools in Ollama's format, sent when a call passes no tools
+        self.tool_role = tool_role
+        self._supports_tool_role: Optional[bool] = None
+        logger.info("OllamaClient initialized with model %r and host %r", self.model, host)
+
+    def set_tools(self, tools: list) -> None:
+        """
+        Converts the tool list once; later calls without `tools` send this list.
+
+        Args:
+            tools: Tools in structured format (name, description, input_schema)
+        """
+        self.tools = to_ollama_tools(tools)
+
+    async def supports_tool_role(self) -> bool:
+        """
+        Whether tool results should be sent as native 'tool' role messages.
+
+        In "auto" mode the model is asked once for its capabilities; models whose
+        template handles tool calls report "tools". If that fails, the user-message
+        format that works with every model is used.
+        """
+        if self.tool_role in ("0", "1"):
+            return self.tool_role == "1"
+        if self._supports_tool_role is None:
+            try:
+                info = await self.client.show(self.model)
+                self._supports_tool_role = "tools" in (info.get("capabilities") or [])
+            except Exception as e:
+                logger.info("Could not read the capabilities of model %r (%s); not using the tool role", self.model, e)
+                self._supports_tool_role = False
+        return self._supports_tool_role
+
+    async def warm_up(self, messages: list) -> None:
+        """
+        Loads the model and prefills the stable start of the prompt (e.g. the system
+        prompt and the tools), so the first real query skips the model load and
+        reuses the cached prefix.
+
+        Args:
+            messages: The messages every conversation starts with
+        """
+        tracer = get_tracer()
+        with tracer.span("llm.warm_up", model=self.model):
+            await self.client.chat(
+                model=self.model,
+                messages=messages,
+                tools=self.tools,
+                stream=False,
+                keep_alive=self.keep_alive,
+                options={**self.options, "num_predict": 1},  # Prefill only; one token is the minimum
+            )
 
     async def chat(self, messages: list, tools: list = None) -> dict:
         """
@@ -26,7 +94,8 @@ class OllamaClient:
 
         Args:
             messages: List of chat-style messages (dicts with 'role' and 'content')
-            tools: Optional list of tools in structured format (name, description, input_schema)
+            tools: Optional list of tools in structured format (name, description, input_schema);
+                defaults to the list given to `set_tools()`
 
         Returns:
             A dict with a 'content' key, containing a list of blocks:
@@ -36,34 +105,23 @@ class OllamaClient:
         Raises:
             RuntimeError on unexpected issues
         """
+        tracer = get_tracer()
+        span = tracer.start("llm.chat", model=self.model, messages=len(messages))
         try:
-            # Prepare tools in Ollama format
-            ollama_tools = []
-            if tools:
-                for tool in tools:
-                    ollama_tools.append({
-                        "type": "function",
-                        "function": {
-                            "name": tool["name"],
-                            "description": tool["description"],
-                            "parameters": tool["input_schema"]  # Ollama uses 'parameters'
-                        }
-                    })
-
-            # Debug output of request payload
-            print("\n--- Sending to Ollama ---")
-            print(f"Model: {self.model}")
-            print(f"Messages: {messages}")
-            print(f"Tools (Ollama format): {ollama_tools}")
-            print("-------------------------\n")
+            ollama_tools = to_ollama_tools(tools) if tools is not None else self.tools
+
+            self._log_request(messages, ollama_tools)
 
             # Send the chat request (non-streaming)
             response = await self.client.chat(
                 model=self.model,
                 messages=messages,
                 tools=ollama_tools,
-                stream=False
+                stream=False,
+                keep_alive=self.keep_alive,
+                options=self.options
             )
+            record_inference_spans(tracer, span, response)
 
             response_message = response.get("message", {})
             content_blocks = []
@@ -77,23 +135,146 @@ class OllamaClient:
                 })
 
             # Add tool calls, if any (guard against malformed responses)
-            tool_calls = response_message.get("tool_calls")
-            if tool_calls:
-                for tool_call in tool_calls:
-                    fn = tool_call.get("function", {})
-                    if "name" in fn and "arguments" in fn:
-                        content_blocks.append({
-                            "type": "tool_use",
-                            "id": fn["name"],
-                            "name": fn["name"],
-                            "input": fn["arguments"]
-                        })
+            content_blocks.extend(tool_use_blocks(response_message.get("tool_calls")))
 
             return {"content": content_blocks}
 
         except ollama.ResponseError as e:
-            print(f"[Ollama Error] Response Error: {e.status_code} - {e.response}")
+            logger.error("Ollama response error: %s - %s", e.status_code, e.response)
             raise
         except Exception as e:
-            print(f"[Ollama Error] An unexpected error occurred: {e}")
+            logger.error("Unexpected Ollama error: %s", e)
             raise
+        finally:
+            tracer.end(span)
+
+    async def chat_stream(self, messages: list, tools: list = None) -> AsyncIterator[dict]:
+        """
+        Stream a response from the model as it is generated.
+
+        Args:
+            messages: List of chat-style messages (dicts with 'role' and 'content')
+            tools: Optional list of tools in structured format (name, description, input_schema);
+                defaults to the list given to `set_tools()`
+
+        Yields:
+            Blocks in generation order:
+            - {"type": "text_delta", "text": "..."} for each piece of generated text
+            - {"type": "tool_use", "id": ..., "name": ..., "input": ...} as soon as a tool call is complete
+
+        Raises:
+            RuntimeError on unexpected issues
+        """
+        # Not made the current span: a generator runs in its consumer's context
+        tracer = get_tracer()
+        span = tracer.start("llm.chat", model=self.model, messages=len(messages))
+        try:
+            ollama_tools = to_ollama_tools(tools) if tools is not None else self.tools
+            self._log_request(messages, ollama_tools)
+
+            stream = await self.client.chat(
+                model=self.model,
+                messages=messages,
+                tools=ollama_tools,
+                stream=True,
+                keep_alive=self.keep_alive,
+                options=self.options
+            )
+
+            async for chunk in stream:
+                chunk_message = chunk.get("message") or {}
+
+                delta = chunk_message.get("content")
+                if delta:
+                    yield {"type": "text_delta", "text": delta}
+
+                # Ollama emits each tool call fully parsed within a single chunk
+                for block in tool_use_blocks(chunk_message.get("tool_calls")):
+                    yield block
+
+                # The final chunk carries the server-side timings
+                if chunk.get("done"):
+                    record_inference_spans(tracer, span, chunk)
+
+        except ollama.ResponseError as e:
+            logger.error("Ollama response error: %s - %s", e.status_code, e.response)
+            raise
+        except Exception as e:
+            logger.error("Unexpected Ollama error: %s", e)
+            raise
+        finally:
+            tracer.end(span)
+
+    def _log_request(self, messages: list, ollama_tools: list) -> None:
+        """
+        Logs the request size; the full payload only if payload logging picks this call.
+        """
+        logger.debug("Sending %d messages and %d tools to model %r", len(messages), len(ollama_tools), self.model)
+        if should_log_payload(logger):
+            logger.debug("Payload messages=%s tools=%s", messages, ollama_tools)
+
+
+def record_inference_spans(tracer: Tracer, span: Optional[Span], response) -> None:
+    """
+    Splits an LLM call span into queue, prefill and generation stages, using the
+    durations (in nanoseconds) Ollama reports on its final response.
+
+    Queue time is the client-observed time not spent in the server's request
+    handling (network and waiting for a free model slot), plus model load time.
+    """
+    if span is None:
+        return
+    total = (response.get("total_duration") or 0) / 1e9
+    load = (response.get("load_duration") or 0) / 1e9
+    prefill = (response.get("prompt_eval_duration") or 0) / 1e9
+    generate = (response.get("eval_duration") or 0) / 1e9
+    elapsed = time.perf_counter() - span.clock
+    queue = max(elapsed - total, 0.0) + load
+
+    prompt_tokens = response.get("prompt_eval_count") or 0
+    completion_tokens = response.get("eval_count") or 0
+    span.attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    start = span.start
+    for name, duration, attributes in (
+        ("llm.queue", queue, {"load_ms": round(load * 1000, 1)}),
+        ("llm.prefill", prefill, {"tokens": prompt_tokens}),
+        ("llm.generate", generate, {"tokens": completion_tokens,
+                                    "tokens_per_s": round(completion_tokens / generate, 1) if generate else 0}),
+    ):
+        tracer.add_span(name, start, duration, parent=span, **attributes)
+        start += duration
+
+
+def to_ollama_tools(tools: list = None) -> list:
+    """
+    Converts tools in structured format (name, description, input_schema) to Ollama's function format.
+    """
+    ollama_tools = []
+    for tool in tools or []:
+        ollama_tools.append({
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool["description"],
+                "parameters": tool["input_schema"]  # Ollama uses 'parameters'
+            }
+        })
+    return ollama_tools
+
+
+def tool_use_blocks(tool_calls: list = None) -> list:
+    """
+    Converts Ollama tool calls to 'tool_use' blocks, skipping malformed entries.
+    """
+    blocks = []
+    for tool_call in tool_calls or []:
+        fn = tool_call.get("function", {})
+        if "name" in fn and "arguments" in fn:
+            blocks.append({
+                "type": "tool_use",
+                "id": fn["name"],
+                "name": fn["name"],
+                "input": fn["arguments"]
+            })
+    return blocks
@@ -1,3 +1,9 @@
+import json
+from typing import Callable, Optional, Tuple
+
+TOOL_RESULT_PREFIX = "[Tool '{}' result]:\n"
+
+
 def format_tool_result_as_user_message(tool_name: str, result: str) -> dict:
     """
     Injects the result of a tool call into the conversation as a synthetic 'user' message,
@@ -20,6 +26,7 @@ def format_tool_result_as_user_message(tool_name: str, result: str) -> dict:
     Why:
         Some models (e.g. Mistral, Qwen, GPT via text-based APIs) only support flat message lists.
         This hack ensures that the LLM sees and reasons over tool results, even without native support.
+        Models whose template handles Ollama's 'tool' role get `format_tool_result_message(..., native=True)`.
 
     Args:
         tool_name: The tool that was called.
@@ -30,25 +37,120 @@ def format_tool_result_as_user_message(tool_name: str, result: str) -> dict:
     """
     return {
         "role": "user",
-        "content": f"[Tool '{tool_name}' result]:\n{result}"
+        "content": TOOL_RESULT_PREFIX.format(tool_name) + result
     }
 
 
-def extract_text_from_tool_result(content: object) -> str:
+def format_tool_result_message(tool_name: str, result: str, native: bool = False) -> dict:
+    """
+    Builds the message carrying a tool result: an Ollama 'tool' role message if native,
+    otherwise the synthetic user message of `format_tool_result_as_user_message`.
+    """
+    if native:
+        return {"role": "tool", "tool_name": tool_name, "content": result}
+    return format_tool_result_as_user_message(tool_name, result)
+
+
+def replace_tool_result(message: dict, result: str) -> dict:
+    """
+    Returns a copy of a tool result message with a new result, in the same format.
+    """
+    tool_name, _ = parse_tool_result_message(message)
+    return format_tool_result_message(tool_name, result, native=message.get("role") == "tool")
+
+
+def parse_tool_result_message(message: dict) -> Optional[Tuple[str, str]]:
+    """
+    Reverses `format_tool_result_message`.
+
+    Returns:
+        (tool_name, result) if the message carries a tool result, otherwise None.
     """
-    Extracts plain text from the result content of a tool call.
+    content = message.get("content")
+    if message.get("role") == "tool" and isinstance(content, str):
+        return message.get("tool_name", ""), content
+    if message.get("role") != "user" or not isinstance(content, str) or not content.startswith("[Tool '"):
+        return None
+    header, sep, result = content.partition("' result]:\n")
+    if not sep:
+        return None
+    return header[len("[Tool '"):], result
 
-    This function normalizes different content formats (e.g., list of objects, object with `.text`, or raw string)
-    into a single plain string for use in the conversation.
+
+def render_tool_result(content: object,
+                       already_returned: Optional[Callable[[str, str], Optional[str]]] = None) -> str:
+    """
+    Renders the result content of a tool call into the compact text the LLM sees.
+
+    Tools may return structured results, which arrive as one JSON text item per
+    value. They are rendered once, without JSON quoting and escaping:
+    - search hits ({"url", "title", "snippet"}) as a numbered list
+    - pages ({"url", "title", "text"} or {"url", "error"}) as a header line and the text
+    - any other JSON value as compact JSON
+    Plain text items are passed through.
 
     Args:
         content: The raw content object returned from a tool call.
+        already_returned: (url, text) -> a short reference to show instead of a page's
+            text, if the conversation already holds that text.
 
     Returns:
         A plain string representing the tool result.
     """
-    if isinstance(content, list):
-        return "\n".join(tc.text for tc in content if hasattr(tc, "text"))
-    if hasattr(content, "text"):
-        return content.text
-    return str(content)
+    if not isinstance(content, list):
+        content = [content]
+    parts = []
+    structured = False
+    hit_number = 0
+    for item in content:
+        text = item.text if hasattr(item, "text") else item if isinstance(item, str) else None
+        if text is None:
+            continue
+        value = _parse_json(text)
+        if value is None:
+            parts.append(text)
+            continue
+        structured = True
+        if _is_page(value):
+            reference = None
+            if already_returned is not None and "text" in value:
+                reference = already_returned(value["url"], value["text"])
+            parts.append(_render_page(value, reference))
+        elif _is_hit(value):
+            hit_number += 1
+            parts.append(_render_hit(hit_number, value))
+        else:
+            parts.append(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+    return ("\n\n" if structured else "\n").join(parts)
+
+
+def _parse_json(text: str) -> Optional[object]:
+    # Only objects and arrays count as structured; a tool returning "42" means the text 42
+    if not text.startswith(("{", "[")):
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _is_page(value: object) -> bool:
+    return isinstance(value, dict) and "url" in value and ("text" in value or "error" in value)
+
+
+def _is_hit(value: object) -> bool:
+    return isinstance(value, dict) and "url" in value and ("title" in value or "snippet" in value)
+
+
+def _render_page(page: dict, reference: Optional[str] = None) -> str:
+    header = f"{page['title']} ({page['url']})" if page.get("title") else page["url"]
+    if "error" in page:
+        return f"{header}\nError: {page['error']}"
+    return f"{header}\n{reference or page['text']}"
+
+
+def _render_hit(number: int, hit: dict) -> str:
+    lines = [f"{number}. {hit['title']}", hit["url"]] if hit.get("title") else [f"{number}. {hit['url']}"]
+    if hit.get("snippet"):
+        lines.append(hit["snippet"])
+    return "\n".join(lines)
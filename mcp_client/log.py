@@ -0,0 +1,68 @@
+"""
+Logging setup for the MCP client.
+
+Diagnostics go through the standard `logging` module instead of print(), so they
+cost nothing unless enabled. Full request payloads (the whole conversation sent
+to the LLM) are only formatted when LOG_PAYLOADS is on, and can be sampled.
+"""
+
+import json
+import logging
+import os
+import random
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+LOG_JSON = os.getenv("LOG_JSON", "0") == "1"                                  # One JSON object per line
+LOG_PAYLOADS = os.getenv("LOG_PAYLOADS", "0") == "1"                          # Dump full LLM payloads at DEBUG
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))  # Fraction of calls dumped
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON, including any `extra={...}` fields.
+    """
+
+    RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level: str = LOG_LEVEL, json_output: bool = LOG_JSON) -> None:
+    """
+    Installs a stderr handler on the 'mcp_client' logger (idempotent).
+    """
+    logger = logging.getLogger("mcp_client")
+    logger.setLevel(level)
+    if any(getattr(h, "_mcp_client_handler", False) for h in logger.handlers):
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler._mcp_client_handler = True
+    handler.setFormatter(
+        JsonFormatter() if json_output
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    logger.addHandler(handler)
+
+
+def should_log_payload(logger: logging.Logger) -> bool:
+    """
+    Whether to dump a full payload on this call: LOG_PAYLOADS is on, DEBUG is
+    enabled for the logger, and the call is picked by LOG_PAYLOAD_SAMPLE_RATE.
+    """
+    return (
+        LOG_PAYLOADS
+        and logger.isEnabledFor(logging.DEBUG)
+        and random.random() < LOG_PAYLOAD_SAMPLE_RATE
+    )
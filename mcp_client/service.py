@@ -0,0 +1,225 @@
+"""
+Multi-user agent service.
+
+Runs many independent conversations in one process over a small HTTP API. All
+conversations share the MCP server sessions and the LLM client of one `MCPAgent`;
+each has its own message history.
+
+Requests are queued per conversation and served round-robin: one conversation
+with many queued messages cannot starve the others, and a conversation never has
+two queries running at once (its history is ordered). Beyond SERVICE_MAX_PENDING
+queued or running requests, new ones are rejected right away with 503.
+
+    python -m mcp_client.service
+
+    POST   /conversations/{id}/messages   {"query": "..."} -> {"conversation_id": ..., "reply": ...}
+    DELETE /conversations/{id}
+    GET    /status
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from mcp_client.agent import Conversation, MCPAgent
+from mcp_client.llm.config import OLLAMA_WARMUP
+from mcp_client.log import configure_logging
+from mcp_client.session import load_servers
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+SERVICE_MAX_ACTIVE = int(os.getenv("SERVICE_MAX_ACTIVE", "4"))                # Conversations served at once
+SERVICE_MAX_PENDING = int(os.getenv("SERVICE_MAX_PENDING", "64"))             # Queued or running requests
+SERVICE_MAX_PENDING_PER_CONVERSATION = int(os.getenv("SERVICE_MAX_PENDING_PER_CONVERSATION", "4"))
+SERVICE_CONVERSATION_TTL = float(os.getenv("SERVICE_CONVERSATION_TTL", "3600"))  # Idle seconds before a history is dropped
+SERVICE_TOOL_CONCURRENCY = int(os.getenv("SERVICE_TOOL_CONCURRENCY", "16"))   # Tool calls running at once, all users
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceBusyError(RuntimeError):
+    """
+    Raised when a request is rejected by admission control.
+    """
+
+
+class AgentService:
+    """
+    Schedules queries from many conversations onto one shared agent.
+
+    Args:
+        agent: Connected agent whose MCP sessions and LLM client are shared
+        max_active: Conversations whose queries run at the same time
+        max_pending: Requests allowed to be queued or running before new ones are rejected
+        max_pending_per_conversation: Requests one conversation may have queued
+        conversation_ttl: Seconds of inactivity after which a conversation is forgotten
+    """
+
+    def __init__(
+        self,
+        agent: MCPAgent,
+        max_active: int = SERVICE_MAX_ACTIVE,
+        max_pending: int = SERVICE_MAX_PENDING,
+        max_pending_per_conversation: int = SERVICE_MAX_PENDING_PER_CONVERSATION,
+        conversation_ttl: float = SERVICE_CONVERSATION_TTL,
+    ):
+        self.agent = agent
+        self.max_active = max(max_active, 1)
+        self.max_pending = max(max_pending, self.max_active)
+        self.max_pending_per_conversation = max(max_pending_per_conversation, 1)
+        self.conversation_ttl = conversation_ttl
+        self.conversations: Dict[str, Conversation] = {}
+        self.pending = 0  # Requests queued or running
+        self._queues: Dict[str, Deque[Tuple[str, asyncio.Future]]] = {}
+        self._ready: Deque[str] = deque()  # Conversations with queued requests and none running, in turn order
+        self._running: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, conversation_id: str, query: str) -> Optional[str]:
+        """
+        Queues a query for a conversation and waits for the reply.
+
+        Returns:
+            The reply, or None if the LLM interaction failed
+
+        Raises:
+            ServiceBusyError: If the service or this conversation has too many requests pending
+        """
+        if self.pending >= self.max_pending:
+            raise ServiceBusyError(f"Service busy: {self.pending} requests pending, try again later")
+        queue = self._queues.setdefault(conversation_id, deque())
+        if len(queue) >= self.max_pending_per_conversation:
+            raise ServiceBusyError(f"Too many pending requests for conversation {conversation_id!r}")
+
+        self._expire_idle()
+        if conversation_id not in self.conversations:
+            self.conversations[conversation_id] = Conversation(conversation_id)
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append((query, future))
+        self.pending += 1
+        if len(queue) == 1 and conversation_id not in self._running:
+            self._ready.append(conversation_id)
+        self._dispatch()
+        return await future
+
+    def close_conversation(self, conversation_id: str) -> bool:
+        """
+        Forgets a conversation's history. Queries already queued still run.
+        """
+        return self.conversations.pop(conversation_id, None) is not None
+
+    def stats(self) -> dict:
+        return {
+            "conversations": len(self.conversations),
+            "active": len(self._running),
+            "pending": self.pending,
+            "max_active": self.max_active,
+            "max_pending": self.max_pending,
+        }
+
+    def _dispatch(self) -> None:
+        while self._ready and len(self._running) < self.max_active:
+            conversation_id = self._ready.popleft()
+            query, future = self._queues[conversation_id].popleft()
+            self._running.add(conversation_id)
+            task = asyncio.ensure_future(self._run(conversation_id, query, future))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, conversation_id: str, query: str, future: asyncio.Future) -> None:
+        try:
+            if not future.done():  # The caller may have given up while queued
+                conversation = self.conversations.setdefault(conversation_id, Conversation(conversation_id))
+                reply = await self.agent.process_query(query, conversation)
+                if not future.done():
+                    future.set_result(reply)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.pending -= 1
+            self._running.discard(conversation_id)
+            queue = self._queues[conversation_id]
+            if queue:
+                self._ready.append(conversation_id)  # Back of the line: round-robin between conversations
+            else:
+                del self._queues[conversation_id]
+            self._dispatch()
+
+    def _expire_idle(self) -> None:
+        cutoff = time.monotonic() - self.conversation_ttl
+        for conversation_id, conversation in list(self.conversations.items()):
+            if (conversation.last_active < cutoff
+                    and conversation_id not in self._running and conversation_id not in self._queues):
+                del self.conversations[conversation_id]
+
+
+def create_app(service: AgentService) -> Starlette:
+    """
+    Builds the HTTP API in front of the service.
+    """
+    async def post_message(request: Request) -> Response:
+        conversation_id = request.path_params["conversation_id"]
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return JSONResponse({"error": "Body must be a JSON object with a non-empty 'query'"}, status_code=400)
+
+        try:
+            reply = await service.submit(conversation_id, query)
+        except ServiceBusyError as e:
+            return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+        if reply is None:
+            return JSONResponse({"error": "LLM interaction or tool execution failed"}, status_code=502)
+        return JSONResponse({"conversation_id": conversation_id, "reply": reply})
+
+    async def delete_conversation(request: Request) -> Response:
+        found = service.close_conversation(request.path_params["conversation_id"])
+        return Response(status_code=204 if found else 404)
+
+    async def status(request: Request) -> Response:
+        return JSONResponse(service.stats())
+
+    return Starlette(routes=[
+        Route("/conversations/{conversation_id}/messages", post_message, methods=["POST"]),
+        Route("/conversations/{conversation_id}", delete_conversation, methods=["DELETE"]),
+        Route("/status", status, methods=["GET"]),
+    ])
+
+
+async def main():
+    configure_logging()
+
+    # One agent, and so one set of MCP server processes and one LLM client, for all users
+    agent = MCPAgent(max_tool_concurrency=SERVICE_TOOL_CONCURRENCY, echo=False)
+    try:
+        await agent.connect_to_servers(load_servers())
+        if OLLAMA_WARMUP:
+            await agent.warm_up()
+
+        app = create_app(AgentService(agent))
+        server = uvicorn.Server(uvicorn.Config(app, host=SERVICE_HOST, port=SERVICE_PORT))
+        await server.serve()
+
+    except Exception as e:
+        logger.exception("Agent service failed: %s", e)
+
+    finally:
+        await agent.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
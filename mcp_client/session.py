@@ -1,36 +1,57 @@
 import asyncio
 import json
+import logging
 from mcp_client.agent import MCPAgent
+from mcp_client.llm.config import OLLAMA_WARMUP
+from mcp_client.log import configure_logging
+
+logger = logging.getLogger("mcp_client.session")
 
 # Path to the server configuration file
 CONFIG_FILE = "server_config.json"
 
+
+def load_servers(path: str = CONFIG_FILE) -> dict:
+    """
+    Reads the MCP servers to connect to from the JSON configuration file.
+
+    Raises:
+        ValueError: If no servers are defined
+    """
+    with open(path, "r") as f:
+        config = json.load(f)
+
+    # Extract the dictionary of servers to connect to
+    servers = config.get("mcpServers", {})
+    if not servers:
+        raise ValueError("No servers defined in config.")
+    return servers
+
+
 async def main():
+    # Route diagnostics (LOG_LEVEL, LOG_JSON, LOG_PAYLOADS) to stderr
+    configure_logging()
+
     # Instantiate the agent that manages LLM interaction and MCP tool sessions
     agent = MCPAgent()
     
     try:
         # Load the server configuration from JSON file
-        with open(CONFIG_FILE, "r") as f:
-            config = json.load(f)
+        servers = load_servers()
 
-        # Extract the dictionary of servers to connect to
-        servers = config.get("mcpServers", {})
-        if not servers:
-            raise ValueError("No servers defined in config.")
+        # Launch all servers at once; the chat starts as soon as one of them is ready
+        await agent.connect_to_servers(servers)
 
-        # Iterate through each server entry and connect
-        for name, cfg in servers.items():
-            await agent.connect_to_server(name, cfg)
+        # Load the model and prefill the system prompt and tools before the first query
+        if OLLAMA_WARMUP:
+            await agent.warm_up()
 
         # Start the interactive chat loop after connecting all servers
         await agent.chat_loop()
 
     except Exception as e:
-        # Print full error traceback if anything goes wrong during setup
-        import traceback
-        print(f"[ERROR] Failed during server startup: {e}")
-        traceback.print_exc()
+        # Log full error traceback if anything goes wrong during setup
+        logger.exception("Failed during server startup: %s", e)
     
     finally:
         # Ensure all resources (server connections etc.) are closed properly
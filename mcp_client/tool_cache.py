@@ -0,0 +1,102 @@
+"""
+Client-side memoization of tool results.
+
+Small models often repeat a call they already made a few iterations earlier, or
+issue the same call twice in one turn. Results are kept per conversation, keyed
+on the tool name and its canonical JSON arguments, for a per-tool TTL; tools
+without a TTL (e.g. ones with side effects) are never cached. Identical calls
+running at the same time share one request.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+ToolKey = Tuple[str, str, str]  # (conversation id, tool name, canonical JSON arguments)
+
+# How a result was obtained, as reported by `ToolResultCache.run`
+HIT = "hit"        # Served from the cache
+SHARED = "shared"  # Joined an identical call already in flight
+MISS = "miss"      # Sent to the server
+
+
+class ToolResultCache:
+    """
+    Per-conversation LRU of tool results (the text items of each output) with
+    per-tool expiry. Not thread-safe; use from one event loop.
+
+    Args:
+        ttls: Seconds a result stays valid, by tool name
+        default_ttl: TTL of tools not listed (0: not cached)
+        max_entries: Results kept across all conversations
+    """
+
+    def __init__(self, ttls: Dict[str, float], default_ttl: float = 0.0, max_entries: int = 256):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[ToolKey, Tuple[float, Any]]" = OrderedDict()
+        self.in_flight: Dict[ToolKey, asyncio.Task] = {}
+        self.stats = {HIT: 0, SHARED: 0, MISS: 0}
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def make_key(self, conversation_id: Optional[str], tool_name: str, tool_args: dict) -> Optional[ToolKey]:
+        """
+        Returns the cache key of a call, or None if the tool is not cacheable.
+        """
+        if self.ttl_for(tool_name) <= 0:
+            return None
+        try:
+            args = json.dumps(tool_args, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None  # Arguments that are not plain JSON
+        return conversation_id or "", tool_name, args
+
+    def get(self, key: ToolKey) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return result
+
+    def put(self, key: ToolKey, result: Any) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl_for(key[1]), result)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def run(self, key: ToolKey, call: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Returns the cached result for key, or runs call() once for all concurrent callers.
+        Failed calls are not cached.
+
+        Returns:
+            (result, HIT | SHARED | MISS)
+        """
+        cached = self.get(key)
+        if cached is not None:
+            self.stats[HIT] += 1
+            return cached, HIT
+
+        task = self.in_flight.get(key)
+        source = SHARED
+        if task is None:
+            source = MISS
+            task = self.in_flight[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        self.stats[source] += 1
+        # A caller giving up does not cancel the call the others are waiting for
+        return await asyncio.shield(task), source
+
+    def _finish(self, key: ToolKey, task: asyncio.Task) -> None:
+        self.in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result())
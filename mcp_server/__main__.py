@@ -1,25 +1,96 @@
 """
 Web Scraper MCP Server
 
-This MCP server provides web scraping capabilities through two main tools:
+This MCP server provides web scraping capabilities through three main tools:
 - search_urls: Search for URLs based on queries
 - fetch_page_text: Extract text content from web pages
+- fetch_pages_text: Extract text content from several web pages in one call
 
 The server uses FastMCP for easy setup and integration with MCP-compatible clients.
+
+It speaks stdio by default, with one server process per client. With
+`--transport sse` or `--transport streamable-http` it runs as a long-lived HTTP
+service instead: all connected clients share its page and search caches,
+connection pool, worker pool and concurrency limits.
 """
 
+import argparse
+import anyio
+from contextlib import asynccontextmanager
+from mcp_server import config, http_client, prefetch
+from mcp_server.tracing import configure_tracing, traced
+from mcp_server.workers import shutdown_worker_pool
 from mcp_server.tools.search_urls import search_urls
 from mcp_server.tools.fetch_page import fetch_page_text
+from mcp_server.tools.fetch_pages import fetch_pages_text
 from mcp.server.fastmcp import FastMCP
 
+
+# Whether client sessions share this process (HTTP transports) rather than own it (stdio)
+shared_sessions = False
+
+
+async def close_shared_state() -> None:
+    # Stop unclaimed prefetches, then close pooled HTTP connections and extraction workers
+    await prefetch.aclose()
+    await http_client.aclose()
+    shutdown_worker_pool()
+
+
+@asynccontextmanager
+async def lifespan(server: FastMCP):
+    # Runs once per client session. Over stdio the session is the whole process, so
+    # clean up when it ends; HTTP transports keep the shared state until shutdown.
+    try:
+        yield
+    finally:
+        if not shared_sessions:
+            await close_shared_state()
+
+
+# Record latency spans when the client traces the session (TRACE_FILE)
+configure_tracing("web-scraper")
+
 # Initialize FastMCP server
-mcp = FastMCP("web-scraper")
+mcp = FastMCP("web-scraper", lifespan=lifespan)
 
 # Register the search tool for finding URLs
-mcp.tool()(search_urls)
+mcp.tool()(traced(search_urls))
 
 # Register the fetch tool for extracting page content
-mcp.tool()(fetch_page_text) 
+mcp.tool()(traced(fetch_page_text))
+
+# Register the batch fetch tool for reading several search results at once
+mcp.tool()(traced(fetch_pages_text))
+
+
+async def serve_http(transport: str) -> None:
+    try:
+        if transport == "sse":
+            await mcp.run_sse_async()
+        else:
+            await mcp.run_streamable_http_async()
+    finally:
+        await close_shared_state()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Web scraper MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default=config.MCP_TRANSPORT)
+    parser.add_argument("--host", default=config.MCP_HOST, help="Address to listen on (HTTP transports)")
+    parser.add_argument("--port", type=int, default=config.MCP_PORT, help="Port to listen on (HTTP transports)")
+    args = parser.parse_args()
+
+    if args.transport == "stdio":
+        mcp.run(transport="stdio")
+        return
+
+    global shared_sessions
+    shared_sessions = True
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    anyio.run(serve_http, args.transport)
+
 
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
\ No newline at end of file
+    main()
@@ -0,0 +1,80 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env if available
+load_dotenv()
+
+# HTTP fetch engine (shared connection pool used by all fetch tools)
+FETCH_USER_AGENT = os.getenv(
+    "FETCH_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+)
+FETCH_MAX_CONNECTIONS = int(os.getenv("FETCH_MAX_CONNECTIONS", "100"))
+FETCH_MAX_KEEPALIVE = int(os.getenv("FETCH_MAX_KEEPALIVE", "20"))
+FETCH_KEEPALIVE_EXPIRY = float(os.getenv("FETCH_KEEPALIVE_EXPIRY", "30"))
+FETCH_MAX_PER_HOST = int(os.getenv("FETCH_MAX_PER_HOST", "6"))
+FETCH_HTTP2 = os.getenv("FETCH_HTTP2", "1") == "1"  # Only used if the 'h2' package is installed
+
+# Per-host politeness (rate limits, backoff on 429/503, circuit breakers), also for the search backend
+FETCH_HOST_RATE = float(os.getenv("FETCH_HOST_RATE", "5"))      # Requests per second per host (0: unlimited)
+FETCH_HOST_BURST = int(os.getenv("FETCH_HOST_BURST", "10"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))             # Extra attempts after a 429/503/5xx or network error
+FETCH_RETRY_BACKOFF = float(os.getenv("FETCH_RETRY_BACKOFF", "0.5"))  # Base of the jittered exponential backoff
+FETCH_RETRY_AFTER_MAX = float(os.getenv("FETCH_RETRY_AFTER_MAX", "60"))  # Longest pause honoured from Retry-After
+FETCH_HEDGE_DELAY = float(os.getenv("FETCH_HEDGE_DELAY", "0"))   # Send a second request after this many seconds (0: off)
+FETCH_BREAKER_FAILURES = int(os.getenv("FETCH_BREAKER_FAILURES", "5"))  # Consecutive failures that open a host's circuit
+FETCH_BREAKER_RESET = float(os.getenv("FETCH_BREAKER_RESET", "30"))     # Seconds before a failing host is probed again
+SEARCH_HOST_RATE = float(os.getenv("SEARCH_HOST_RATE", "1"))     # DuckDuckGo throttles aggressively
+SEARCH_HOST_BURST = int(os.getenv("SEARCH_HOST_BURST", "5"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "20"))       # Overall time for a search, retries included
+
+# Batch fetching (fetch_pages_text)
+FETCH_BATCH_MAX_URLS = int(os.getenv("FETCH_BATCH_MAX_URLS", "10"))
+FETCH_BATCH_CONCURRENCY = int(os.getenv("FETCH_BATCH_CONCURRENCY", "5"))
+
+# Persistent page cache (SQLite); revalidated with conditional GETs once stale
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "1") == "1"
+PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "webagent-mcp", "pages.sqlite3")
+)
+PAGE_CACHE_FRESH_TTL = float(os.getenv("PAGE_CACHE_FRESH_TTL", "600"))  # Served without any request
+PAGE_CACHE_MAX_AGE = float(os.getenv("PAGE_CACHE_MAX_AGE", str(7 * 24 * 3600)))  # Evicted afterwards
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Search result cache; set SEARCH_CACHE_PATH to also persist results on disk
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "")
+
+# HTML text extraction engine: "lxml" (fast libxml2 tree walk) or "bs4" (BeautifulSoup + html.parser)
+EXTRACT_ENGINE = os.getenv("EXTRACT_ENGINE", "lxml")
+
+# Query-aware text selection: pages are ranked in chunks of about this many characters
+RELEVANCE_CHUNK_CHARS = int(os.getenv("RELEVANCE_CHUNK_CHARS", "400"))
+
+# Streaming downloads: stop reading once enough main-region text is collected
+# (parsed on worker threads, so not used with WORKER_MODE=process)
+FETCH_STREAMING = os.getenv("FETCH_STREAMING", "1") == "1"
+FETCH_MAX_BYTES = int(os.getenv("FETCH_MAX_BYTES", str(5 * 1024 * 1024)))  # Body size cap per page
+# Formats that cannot be read from a truncated body (PDF) are downloaded whole up to this size, refused beyond
+FETCH_MAX_DOCUMENT_BYTES = int(os.getenv("FETCH_MAX_DOCUMENT_BYTES", str(20 * 1024 * 1024)))
+
+# Speculative prefetch (opt-in): load the top search results while the model decides which one to read
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "0") == "1"
+PREFETCH_TOP_K = int(os.getenv("PREFETCH_TOP_K", "3"))              # Results prefetched per search
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "3"))  # Prefetch downloads at once, per server process
+PREFETCH_MAX_BYTES = int(os.getenv("PREFETCH_MAX_BYTES", str(1024 * 1024)))  # Body size cap of a prefetch
+PREFETCH_TTL = float(os.getenv("PREFETCH_TTL", "60"))               # Unclaimed prefetches are cancelled after this
+PREFETCH_MAX_PENDING = int(os.getenv("PREFETCH_MAX_PENDING", "30"))  # Oldest unclaimed ones are cancelled beyond this
+
+# Worker pool for CPU-bound extraction: "thread", "process" (multi-core) or "inline"
+# In process mode pages are downloaded up to the byte cap and parsed whole, without FETCH_STREAMING
+WORKER_MODE = os.getenv("WORKER_MODE", "thread")
+WORKER_COUNT = int(os.getenv("WORKER_COUNT", str(min(os.cpu_count() or 1, 8))))
+WORKER_MAX_PENDING = int(os.getenv("WORKER_MAX_PENDING", "64"))  # Queued + running jobs before rejecting
+
+# Transport: "stdio" (one server per client process) or "sse" / "streamable-http" (one shared server for many clients)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("MCP_PORT", "8001"))  # 8000 is taken by the agent service
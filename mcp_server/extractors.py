@@ -0,0 +1,203 @@
+"""
+Text extraction by content type.
+
+`fetch_page_text` picks an `Extractor` from the response's Content-Type:
+- HTML: visible text, see `mcp_server.extract`
+- text/plain and JSON (application/json, *+json): the decoded body, passed through
+- PDF: the text of each page, read until char_limit characters are in, with `pypdf`
+
+Bodies are read in chunks up to a byte cap. Extractors with a `stream` factory are
+fed each chunk as it arrives and can stop the download once they have enough text.
+A PDF cannot be read from a partial body, so it is downloaded whole, up to the
+larger FETCH_MAX_DOCUMENT_BYTES, and refused beyond that.
+
+HTML documents also report their <title>, read from the start of the body.
+
+The parsers are imported on first use to keep server startup fast.
+"""
+
+import codecs
+import html
+import io
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+from mcp_server import config
+
+# <title> lives in <head>; only the start of the body is scanned for it
+TITLE_SCAN_BYTES = 64 * 1024
+TITLE_MAX_CHARS = 200
+
+_TITLE_TAG = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+_CHARSET = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+class HtmlStream:
+    """
+    Incremental HTML extraction: decodes chunks and feeds them to `StreamingExtractor`.
+    """
+
+    def __init__(self, encoding: str, char_limit: int):
+        from mcp_server.extract import StreamingExtractor
+
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.parser = StreamingExtractor(char_limit)
+
+    @property
+    def done(self) -> bool:
+        return self.parser.done
+
+    @property
+    def complete(self) -> bool:
+        return self.parser.complete
+
+    def feed(self, chunk: bytes) -> None:
+        self.parser.feed(self.decoder.decode(chunk))
+
+    def close(self) -> str:
+        self.parser.feed(self.decoder.decode(b"", final=True))
+        return self.parser.close()
+
+
+class TextStream:
+    """
+    Incremental pass-through of a text body, done once char_limit characters are in.
+    """
+
+    complete = False  # Stopping early always leaves a prefix
+
+    def __init__(self, encoding: str, char_limit: int):
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.char_limit = char_limit
+        self.parts: List[str] = []
+        self.chars = 0
+        self.done = False
+
+    def feed(self, chunk: bytes) -> None:
+        text = self.decoder.decode(chunk)
+        self.parts.append(text)
+        self.chars += len(text)
+        # Leading whitespace is stripped in the end, so only count from the first visible character
+        if self.char_limit > 0 and self.chars >= self.char_limit:
+            self.done = len("".join(self.parts).lstrip()) >= self.char_limit
+
+    def close(self) -> str:
+        self.parts.append(self.decoder.decode(b"", final=True))
+        return "".join(self.parts).strip()
+
+
+@dataclass(frozen=True)
+class Extractor:
+    """
+    How to get text out of one family of content types.
+
+    Args:
+        name: Short name, e.g. for trace spans
+        extract: (body, encoding, char_limit) -> (text, whether it is complete rather
+            than a prefix); module-level so it can run in a worker process
+        stream: (encoding, char_limit) -> incremental extractor with feed(), done,
+            complete and close(), if the format can be parsed while downloading
+        partial_ok: Whether a body cut off at FETCH_MAX_BYTES can still be read;
+            if not, the cap is FETCH_MAX_DOCUMENT_BYTES and larger bodies are refused
+        title: (body, encoding) -> the document's title, if the format has one
+    """
+
+    name: str
+    extract: Callable[[bytes, str, int], Tuple[str, bool]]
+    stream: Optional[Callable[[str, int], object]] = None
+    partial_ok: bool = True
+    title: Optional[Callable[[bytes, str], str]] = None
+
+    @property
+    def max_bytes(self) -> int:
+        return config.FETCH_MAX_BYTES if self.partial_ok else config.FETCH_MAX_DOCUMENT_BYTES
+
+
+def extract_html(body: bytes, encoding: str, char_limit: int) -> Tuple[str, bool]:
+    from mcp_server.extract import extract_text_from_bytes
+
+    return extract_text_from_bytes(body, encoding), True
+
+
+def html_title(body: bytes, encoding: str) -> str:
+    """
+    Returns the whitespace-collapsed text of the document's <title>, or "".
+    """
+    match = _TITLE_TAG.search(body[:TITLE_SCAN_BYTES].decode(encoding, errors="replace"))
+    if not match:
+        return ""
+    return " ".join(html.unescape(match.group(1)).split())[:TITLE_MAX_CHARS]
+
+
+def extract_plain(body: bytes, encoding: str, char_limit: int) -> Tuple[str, bool]:
+    return body.decode(encoding, errors="replace").strip(), True
+
+
+def extract_pdf(body: bytes, encoding: str, char_limit: int) -> Tuple[str, bool]:
+    """
+    Extracts the text of a PDF page by page, stopping once char_limit characters are in.
+
+    Raises:
+        RuntimeError: If pypdf is not installed or the document cannot be parsed
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF extraction requires the 'pypdf' package (pip install -r requirements.txt)")
+
+    pages: List[str] = []
+    chars = 0
+    try:
+        reader = PdfReader(io.BytesIO(body))
+        for number, page in enumerate(reader.pages, 1):
+            lines = [line.strip() for line in (page.extract_text() or "").split("\n") if line.strip()]
+            if not lines:
+                continue
+            pages.append("\n".join(lines))
+            chars += len(pages[-1]) + 1
+            if char_limit > 0 and chars > char_limit:
+                return "\n".join(pages), number == len(reader.pages)
+    except Exception as e:
+        raise RuntimeError(f"Error parsing PDF content: {e}")
+    return "\n".join(pages), True
+
+
+HTML = Extractor("html", extract_html, HtmlStream, title=html_title)
+PLAIN = Extractor("text", extract_plain, TextStream)
+JSON = Extractor("json", extract_plain, TextStream)
+PDF = Extractor("pdf", extract_pdf, partial_ok=False)
+
+# Media type -> extractor; types ending in "+json" are handled as JSON as well
+EXTRACTORS = {
+    "text/html": HTML,
+    "application/xhtml+xml": HTML,
+    "text/plain": PLAIN,
+    "application/json": JSON,
+    "text/json": JSON,
+    "application/pdf": PDF,
+}
+
+
+def get_extractor(content_type: str) -> Optional[Extractor]:
+    """
+    Returns the extractor for a Content-Type header value, or None if the type is not supported.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    extractor = EXTRACTORS.get(media_type)
+    if extractor is None and media_type.endswith("+json"):
+        return JSON
+    return extractor
+
+
+def content_charset(content_type: str, default: str = "utf-8") -> str:
+    """
+    Returns the charset parameter of a Content-Type header value, as httpx decodes it.
+    """
+    match = _CHARSET.search(content_type)
+    if not match:
+        return default
+    try:
+        return codecs.lookup(match.group(1)).name
+    except LookupError:
+        return default
@@ -0,0 +1,318 @@
+"""
+Per-host politeness and failure handling for outgoing requests.
+
+Every host gets a `HostState`, shared by all tool calls of this server process:
+- a token bucket paces requests to the host (FETCH_HOST_RATE per second, bursts
+  of FETCH_HOST_BURST)
+- 429 and 503 responses pause the host for their Retry-After (or an exponential
+  backoff) and halve its rate; each success wins back a tenth of the base rate
+- a circuit breaker opens after FETCH_BREAKER_FAILURES consecutive failures
+  (timeouts, connection errors, 5xx): requests then fail at once for
+  FETCH_BREAKER_RESET seconds, after which a single probe request is let through
+
+`call()` runs one logical request on top of this. Throttled and failed attempts
+are retried with jittered exponential backoff while the deadline allows; a wait
+that would run past the deadline fails right away instead. An attempt that is
+still waiting for its response after FETCH_HEDGE_DELAY seconds can be hedged
+with a second one, and whichever answers first is used.
+
+The state holds no asyncio primitives, so it survives event loop changes.
+"""
+
+import asyncio
+import email.utils
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from mcp_server import config
+
+# Outcomes of an attempt, as reported by a `call()` classifier
+OK = "ok"              # Answered (even if with an error of its own); do not retry
+THROTTLED = "throttled"  # The host asked us to slow down
+FAILED = "failed"      # The host did not answer properly; counts towards the breaker
+
+MIN_RATE_FRACTION = 0.1  # Throttling never slows a host below this share of its base rate
+
+Outcome = Tuple[str, Optional[float]]  # (kind, Retry-After seconds)
+
+
+class HostUnavailableError(httpx.HTTPError):
+    """
+    Raised without sending a request when a host's circuit is open, or when it is
+    paused for longer than the request's deadline allows.
+    """
+
+
+class HostState:
+    """
+    Rate limit, backoff and circuit breaker of one host.
+
+    Args:
+        rate: Requests per second (0 for no limit)
+        burst: Requests that may be sent at once after an idle period
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a probe is allowed
+    """
+
+    def __init__(self, host: str, rate: float, burst: int, failure_threshold: int, reset_timeout: float):
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.throttle_streak = 0
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.opened_at is not None
+
+    async def acquire(self, deadline: float) -> None:
+        """
+        Waits for the host's next request slot.
+
+        Raises:
+            HostUnavailableError: If the circuit is open or the wait would pass the deadline
+        """
+        probe = self._check_circuit()
+        now = time.monotonic()
+        wait = max(self._reserve(now), self.paused_until - now)
+        try:
+            while wait > 0:
+                if now + wait > deadline:
+                    raise HostUnavailableError(f"{self.host} is rate limited for another {wait:.1f}s")
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+                wait = self.paused_until - now  # A 429 may have arrived while waiting
+        except BaseException:
+            # Given up or cancelled (e.g. an unclaimed prefetch): hand the reserved slot back,
+            # and let another request probe a half-open circuit
+            if self.base_rate > 0:
+                self.tokens += 1
+            if probe:
+                self.probing = False
+            raise
+
+    def try_acquire(self) -> bool:
+        """
+        Takes a request slot only if one is free right now (used for hedged requests).
+        """
+        now = time.monotonic()
+        if self.circuit_open or now < self.paused_until:
+            return False
+        self._refill(now)
+        if self.base_rate > 0 and self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def record(self, kind: str, retry_after: Optional[float] = None) -> None:
+        """
+        Updates the host's state with the outcome of one attempt.
+        """
+        now = time.monotonic()
+        self.probing = False
+        if kind == FAILED:
+            self.failures += 1
+            if self.circuit_open or self.failures >= self.failure_threshold:
+                self.opened_at = now  # (Re)open; a failed probe restarts the timer
+            return
+
+        # The host answered: it is up
+        self.failures = 0
+        self.opened_at = None
+        if kind == THROTTLED:
+            self.throttle_streak += 1
+            delay = retry_after if retry_after is not None else backoff_delay(self.throttle_streak)
+            self.paused_until = max(self.paused_until, now + min(delay, config.FETCH_RETRY_AFTER_MAX))
+            self._refill(now)
+            self.rate = max(self.rate / 2, self.base_rate * MIN_RATE_FRACTION)
+        else:
+            self.throttle_streak = 0
+            self._refill(now)
+            self.rate = min(self.rate + self.base_rate / 10, self.base_rate)
+
+    def release(self) -> None:
+        """
+        Called when an attempt ends without an outcome (e.g. a cancelled hedge).
+        """
+        self.probing = False
+
+    def _check_circuit(self) -> bool:
+        # Returns whether this request is the probe of a half-open circuit
+        if not self.circuit_open:
+            return False
+        remaining = self.opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0:
+            raise HostUnavailableError(f"{self.host} is failing; not retrying for another {remaining:.0f}s")
+        if self.probing:
+            raise HostUnavailableError(f"{self.host} is failing; waiting for a probe request")
+        self.probing = True  # Half-open: this request decides
+        return True
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _reserve(self, now: float) -> float:
+        # Tokens may go negative: each waiter reserves its slot, so callers are spaced by 1/rate
+        if self.base_rate <= 0:
+            return 0.0
+        self._refill(now)
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+_hosts: Dict[str, HostState] = {}
+
+
+def get_host_state(host: str, rate: Optional[float] = None, burst: Optional[int] = None) -> HostState:
+    """
+    Returns the process-wide state of a host, creating it on first use.
+
+    `rate` and `burst` override the FETCH_HOST_* defaults for a new host.
+    """
+    state = _hosts.get(host)
+    if state is None:
+        state = _hosts[host] = HostState(
+            host,
+            config.FETCH_HOST_RATE if rate is None else rate,
+            config.FETCH_HOST_BURST if burst is None else burst,
+            config.FETCH_BREAKER_FAILURES,
+            config.FETCH_BREAKER_RESET,
+        )
+    return state
+
+
+def reset_host_states() -> None:
+    """
+    Forgets all rate limits, pauses and open circuits (e.g. between tests).
+    """
+    _hosts.clear()
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff: a random delay up to FETCH_RETRY_BACKOFF * 2^(attempt-1).
+    """
+    return random.uniform(0, config.FETCH_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header (delay in seconds or an HTTP date) into seconds from now.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+async def call(
+    state: HostState,
+    attempt: Callable[[], Awaitable[Any]],
+    classify: Callable[[Any], Outcome],
+    deadline: float,
+    discard: Optional[Callable[[Any], Awaitable[None]]] = None,
+    hedge_delay: Optional[float] = None,
+) -> Any:
+    """
+    Runs attempt() against a host with pacing, retries and hedging.
+
+    Args:
+        state: The host's state
+        attempt: Sends one request; returns its result or raises
+        classify: Maps a result or a raised exception to (OK | THROTTLED | FAILED, Retry-After)
+        deadline: time.monotonic() by which the call must be done; no retry starts after it
+        discard: Releases a result that is not returned (e.g. closes a streamed response)
+        hedge_delay: Seconds before a slow attempt is hedged (default: FETCH_HEDGE_DELAY, 0: off)
+
+    Returns:
+        The first result classified OK, or the last result once retries are used up
+        (e.g. a 429 response, for the caller to report)
+
+    Raises:
+        HostUnavailableError: If the host's circuit is open or it is paused past the deadline
+        The exception of the last attempt, if it raised
+    """
+    hedge_delay = config.FETCH_HEDGE_DELAY if hedge_delay is None else hedge_delay
+    tries = 0
+    while True:
+        tries += 1
+        error: Optional[BaseException] = None
+        try:
+            result = await _hedged(state, attempt, classify, deadline, discard, hedge_delay)
+        except HostUnavailableError:
+            raise
+        except Exception as e:
+            result, error = None, e
+        kind, retry_after = classify(error if error is not None else result)
+        if kind == OK:
+            if error is not None:
+                raise error
+            return result
+
+        delay = backoff_delay(tries)
+        if tries > config.FETCH_RETRIES or time.monotonic() + max(delay, retry_after or 0) >= deadline:
+            if error is not None:
+                raise error
+            return result
+        if result is not None and discard:
+            await discard(result)
+        await asyncio.sleep(delay)  # A Retry-After pause is enforced by acquire()
+
+
+async def _hedged(state, attempt, classify, deadline, discard, hedge_delay):
+    async def one(reserved: bool = False):
+        if not reserved:
+            await state.acquire(deadline)
+        try:
+            result = await attempt()
+        except asyncio.CancelledError:
+            state.release()
+            raise
+        except Exception as e:
+            state.record(*classify(e))
+            raise
+        state.record(*classify(result))
+        return result
+
+    if hedge_delay <= 0:
+        return await one()
+
+    tasks = [asyncio.ensure_future(one())]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+        if not done and state.try_acquire():
+            tasks.append(asyncio.ensure_future(one(reserved=True)))  # Hedge the slow attempt
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task.result()
+                    tasks.remove(task)
+                    return winner
+        return tasks[0].result()  # All attempts raised; report the first one's error
+    finally:
+        for task in tasks:
+            task.cancel()
+        # A loser may have finished before it could be cancelled
+        for loser in await asyncio.gather(*tasks, return_exceptions=True):
+            if discard and not isinstance(loser, BaseException):
+                await discard(loser)
@@ -0,0 +1,176 @@
+"""
+Shared async HTTP engine for the MCP server tools.
+
+All fetch tools go through one pooled `httpx.AsyncClient`, so connections are kept
+alive and reused across tool calls instead of opening a new one per request.
+A per-host semaphore caps how many requests hit the same host at once, and
+`mcp_server.hosts` paces, retries and circuit-breaks requests per host.
+"""
+
+import asyncio
+import importlib.util
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from mcp_server import hosts
+from mcp_server.config import (
+    FETCH_USER_AGENT,
+    FETCH_MAX_CONNECTIONS,
+    FETCH_MAX_KEEPALIVE,
+    FETCH_KEEPALIVE_EXPIRY,
+    FETCH_MAX_PER_HOST,
+    FETCH_HTTP2,
+)
+
+# HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 without it
+HTTP2_AVAILABLE = FETCH_HTTP2 and importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Returns the shared AsyncClient, creating it on first use.
+
+    The pool is bound to the running event loop; a new one is created if the
+    loop changed (e.g. between separate `asyncio.run` calls).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            headers={"User-Agent": FETCH_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=FETCH_MAX_CONNECTIONS,
+                max_keepalive_connections=FETCH_MAX_KEEPALIVE,
+                keepalive_expiry=FETCH_KEEPALIVE_EXPIRY,
+            ),
+        )
+        _client_loop = loop
+        _host_slots.clear()
+    return _client
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """
+    Holds one of the FETCH_MAX_PER_HOST request slots for the URL's host.
+    """
+    async with _host_semaphore(url):
+        yield
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    semaphore = _host_slots.get(host)
+    if semaphore is None:
+        semaphore = _host_slots[host] = asyncio.Semaphore(FETCH_MAX_PER_HOST)
+    return semaphore
+
+
+async def fetch(url: str, timeout: float, headers: Optional[dict] = None) -> httpx.Response:
+    """
+    Performs a GET request on the shared pool, respecting the per-host limits.
+
+    Throttled and failed attempts are retried within `timeout` seconds overall.
+    Cancelling the awaiting task aborts the request and releases its connection.
+
+    Raises:
+        httpx.HTTPError: On network errors or timeouts
+        hosts.HostUnavailableError: If the host is known to be down or throttled past the timeout
+    """
+    client = get_client()
+    deadline = time.monotonic() + timeout
+
+    # The slot is only held while a request is in flight, not during retry backoff
+    async def attempt() -> httpx.Response:
+        async with host_slot(url):
+            return await client.get(url, timeout=_remaining(deadline), headers=headers)
+
+    return await hosts.call(_host_state(url), attempt, classify_response, deadline)
+
+
+@asynccontextmanager
+async def stream(url: str, timeout: float, headers: Optional[dict] = None):
+    """
+    Opens a streamed GET request on the shared pool, respecting the per-host limits.
+
+    The body is read incrementally by the caller; leaving the block early closes
+    the response without downloading the rest. Attempts that fail before the
+    response headers arrive are retried within `timeout` seconds overall.
+
+    Raises:
+        httpx.HTTPError: On network errors or timeouts
+        hosts.HostUnavailableError: If the host is known to be down or throttled past the timeout
+    """
+    client = get_client()
+    deadline = time.monotonic() + timeout
+
+    semaphore = _host_semaphore(url)
+
+    # Each response holds a slot until it is closed, but retry backoff does not
+    async def attempt() -> httpx.Response:
+        await semaphore.acquire()
+        try:
+            request = client.build_request("GET", url, timeout=_remaining(deadline), headers=headers)
+            return await client.send(request, stream=True)
+        except BaseException:
+            semaphore.release()
+            raise
+
+    async def discard(response: httpx.Response) -> None:
+        try:
+            await response.aclose()
+        finally:
+            semaphore.release()
+
+    response = await hosts.call(_host_state(url), attempt, classify_response, deadline, discard)
+    try:
+        yield response
+    finally:
+        await discard(response)
+
+
+def classify_response(outcome) -> hosts.Outcome:
+    """
+    Classifies an HTTP attempt for `hosts.call`: 429/503 throttle, other 5xx and
+    network errors are failures, anything else is an answer.
+    """
+    if isinstance(outcome, httpx.Response):
+        if outcome.status_code in (429, 503):
+            return hosts.THROTTLED, hosts.parse_retry_after(outcome.headers.get("retry-after"))
+        if outcome.status_code >= 500:
+            return hosts.FAILED, None
+        return hosts.OK, None
+    if isinstance(outcome, httpx.TransportError):
+        return hosts.FAILED, None
+    return hosts.OK, None
+
+
+def _host_state(url: str) -> hosts.HostState:
+    return hosts.get_host_state(urlsplit(url).netloc.lower())
+
+
+def _remaining(deadline: float) -> float:
+    # Each attempt gets the time left of the overall timeout
+    return max(deadline - time.monotonic(), 0.1)
+
+
+async def aclose() -> None:
+    """
+    Closes the shared client and drops all pooled connections.
+    """
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+    _host_slots.clear()
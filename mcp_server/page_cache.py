@@ -0,0 +1,237 @@
+"""
+Persistent page cache for the fetch tools.
+
+Stores the raw body, the validators (ETag / Last-Modified) and the extracted text
+per normalized URL in SQLite. Fresh entries are served without any request; stale
+entries are revalidated with a conditional GET, so a 304 skips both the download
+and the HTML parse. Entries are evicted by age and, once the store exceeds its
+size budget, least recently used first.
+
+Several URLs can share one entry through aliases: the URL a page names as its
+rel=canonical, or redirected to, is answered from that page's entry until it is
+downloaded itself, and a download whose text is identical to an entry stored
+under another URL (a mirror) points at that entry instead of storing a second
+copy. Lookups follow the alias, so these URLs are served without downloading.
+A mirror alias records the text it matched and is dropped once its target is
+stored with a different text.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from mcp_server import config
+
+
+@dataclass
+class CachedPage:
+    url: str
+    body: bytes
+    text: str
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    complete: bool  # False if the download stopped early; text is then only a prefix
+
+    def covers(self, char_limit: int) -> bool:
+        """
+        Whether this entry holds enough text to answer a request with char_limit.
+        """
+        return self.complete or 0 < char_limit <= len(self.text)
+
+    def is_fresh(self, ttl: float) -> bool:
+        return time.time() - self.fetched_at < ttl
+
+    def validator_headers(self) -> dict:
+        """
+        Returns the conditional request headers for revalidating this entry.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """
+    SQLite-backed page store. All methods are blocking and thread-safe;
+    call them via `asyncio.to_thread` from async code.
+    """
+
+    def __init__(self, path: str, max_age: float, max_bytes: int):
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # Several server processes may share the file
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                text TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 1,
+                text_hash TEXT
+            )
+            """
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(pages)")]
+        if "complete" not in columns:  # Store created before partial downloads were cached
+            self.conn.execute("ALTER TABLE pages ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+        if "text_hash" not in columns:  # Store created before content deduplication
+            self.conn.execute("ALTER TABLE pages ADD COLUMN text_hash TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS pages_text_hash ON pages (text_hash)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS aliases (url TEXT PRIMARY KEY, target TEXT NOT NULL, text_hash TEXT)"
+        )
+        if "text_hash" not in [row[1] for row in self.conn.execute("PRAGMA table_info(aliases)")]:
+            # Store created before mirror aliases were told apart; they cannot be re-validated
+            self.conn.execute("DELETE FROM aliases")
+            self.conn.execute("ALTER TABLE aliases ADD COLUMN text_hash TEXT")
+        self.conn.commit()
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Returns the entry for a normalized URL (or the entry it is an alias of)
+        and marks it as recently used.
+        """
+        now = time.time()
+        with self.lock:
+            url = self._resolve(url)
+            row = self.conn.execute(
+                "SELECT url, body, text, content_type, etag, last_modified, fetched_at, complete "
+                "FROM pages WHERE url = ? AND fetched_at > ?",
+                (url, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE pages SET accessed_at = ? WHERE url = ?", (now, url))
+            self.conn.commit()
+        return CachedPage(*row[:7], complete=bool(row[7]))
+
+    def put(self, url: str, body: bytes, text: str, content_type: str,
+            etag: Optional[str], last_modified: Optional[str], complete: bool = True,
+            aliases: Iterable[str] = ()) -> None:
+        """
+        Stores a freshly downloaded page and evicts old entries if needed.
+
+        Args:
+            aliases: Other normalized URLs this page answers for (its rel=canonical,
+                the URL it redirected to); used unless they have an entry of their own
+        """
+        now = time.time()
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest() if complete and text else None
+        with self.lock:
+            mirror = None
+            if text_hash:
+                row = self.conn.execute(
+                    "SELECT url FROM pages WHERE text_hash = ? AND url != ? AND complete = 1 LIMIT 1",
+                    (text_hash, url)
+                ).fetchone()
+                mirror = row[0] if row else None
+
+            # Mirrors of this URL's previous text no longer match it
+            self.conn.execute(
+                "DELETE FROM aliases WHERE target = ? AND text_hash IS NOT NULL AND text_hash IS NOT ?",
+                (url, text_hash)
+            )
+            if mirror:
+                # Same text already stored under another URL: point at it and mark it fresh
+                self.conn.execute(
+                    "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, mirror)
+                )
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._alias(url, mirror, text_hash)
+                target = mirror
+            else:
+                self.conn.execute("DELETE FROM aliases WHERE url = ?", (url,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (url, body, text, content_type, etag, last_modified, now, now,
+                     len(body) + len(text.encode("utf-8")), int(complete), text_hash)
+                )
+                target = url
+
+            for alias in set(aliases) - {url, target}:
+                if self.conn.execute("SELECT 1 FROM pages WHERE url = ?", (alias,)).fetchone() is None:
+                    self._alias(alias, target, text_hash if mirror else None)
+            self._evict(now)
+            self.conn.commit()
+
+    def touch(self, url: str) -> None:
+        """
+        Marks an entry as fresh again after a successful revalidation (304).
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE url = ?", (now, now, self._resolve(url))
+            )
+            self.conn.commit()
+
+    def _resolve(self, url: str) -> str:
+        row = self.conn.execute("SELECT target FROM aliases WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else url
+
+    def _alias(self, url: str, target: str, text_hash: Optional[str] = None) -> None:
+        # text_hash is set for mirrors: the text they share with the target
+        self.conn.execute("INSERT OR REPLACE INTO aliases VALUES (?, ?, ?)", (url, target, text_hash))
+        # Aliases of url follow it to the new target
+        self.conn.execute("UPDATE aliases SET target = ? WHERE target = ?", (target, url))
+
+    def _evict(self, now: float) -> None:
+        evicted = self.conn.execute("DELETE FROM pages WHERE fetched_at <= ?", (now - self.max_age,)).rowcount
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total > self.max_bytes:
+            # Drop least recently used entries until the store fits its budget again
+            for url, size in self.conn.execute(
+                "SELECT url, size FROM pages ORDER BY accessed_at ASC"
+            ).fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                total -= size
+                evicted += 1
+        if evicted:
+            self.conn.execute("DELETE FROM aliases WHERE target NOT IN (SELECT url FROM pages)")
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """
+    Returns the process-wide page cache, or None if caching is disabled.
+    """
+    global _cache
+    if _cache is None and config.PAGE_CACHE_ENABLED:
+        _cache = PageCache(config.PAGE_CACHE_PATH, config.PAGE_CACHE_MAX_AGE, config.PAGE_CACHE_MAX_BYTES)
+    return _cache
+
+
+def set_page_cache(cache: Optional[PageCache]) -> None:
+    """
+    Replaces the process-wide page cache (e.g. with a temporary store in tests).
+    """
+    global _cache
+    _cache = cache
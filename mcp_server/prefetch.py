@@ -0,0 +1,154 @@
+"""
+Speculative prefetch of search results (opt-in, PREFETCH_ENABLED).
+
+After `search_urls` answers, the model takes seconds to decide which result to
+read. Meanwhile the top PREFETCH_TOP_K URLs are downloaded and extracted in the
+background, so the `fetch_page_text` that follows is answered from memory, or
+joins the download that is still running.
+
+Speculative downloads are bounded: at most PREFETCH_CONCURRENCY run at once, each
+body is capped at PREFETCH_MAX_BYTES, and they share the per-host pacing of all
+other requests. A prefetch no fetch claims within PREFETCH_TTL seconds is
+cancelled (or its result dropped), as are the oldest beyond PREFETCH_MAX_PENDING.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Tuple
+
+from mcp_server import config
+from mcp_server.urls import normalize_url
+from mcp_tracing.tracer import get_tracer
+
+if TYPE_CHECKING:
+    from mcp_server.tools.fetch_page import Page
+
+logger = logging.getLogger(__name__)
+
+TIMEOUT = 10.0  # Seconds per prefetch, as for a fetch_page_text call with default arguments
+
+Loader = Callable[[str], Awaitable["Page"]]
+
+
+class Prefetcher:
+    """
+    Background page loads, keyed by normalized URL until a fetch claims them.
+
+    Bound to the event loop it was created on.
+    """
+
+    def __init__(self, load: Loader, concurrency: int, ttl: float, max_pending: int):
+        self.load = load
+        self.semaphore = asyncio.Semaphore(max(concurrency, 1))
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self.entries: "OrderedDict[str, Tuple[asyncio.Task, asyncio.TimerHandle]]" = OrderedDict()
+        self.stats = {"started": 0, "claimed": 0, "cancelled": 0}
+
+    def schedule(self, urls: List[str]) -> None:
+        """
+        Starts loading the URLs that are not being prefetched already.
+        """
+        loop = asyncio.get_running_loop()
+        for url in urls:
+            key = normalize_url(url)
+            if key in self.entries:
+                continue
+            task = asyncio.ensure_future(self._run(url))
+            task.add_done_callback(_log_failure)
+            self.entries[key] = (task, loop.call_later(self.ttl, self._expire, key, task))
+            self.stats["started"] += 1
+        while len(self.entries) > self.max_pending:
+            self._drop(next(iter(self.entries)))
+
+    def claim(self, url: str) -> Optional[asyncio.Task]:
+        """
+        Hands over the prefetch of a URL, if there is one; it is then no longer expired or cancelled.
+        """
+        entry = self.entries.pop(normalize_url(url), None)
+        if entry is None:
+            return None
+        task, timer = entry
+        timer.cancel()
+        self.stats["claimed"] += 1
+        return task
+
+    async def aclose(self) -> None:
+        """
+        Cancels all unclaimed prefetches and waits for them to stop.
+        """
+        tasks = [task for task, _ in self.entries.values()]
+        while self.entries:
+            self._drop(next(iter(self.entries)))
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, url: str) -> "Page":
+        async with self.semaphore:
+            with get_tracer().span("prefetch.load", url=url):
+                return await self.load(url)
+
+    def _expire(self, key: str, task: asyncio.Task) -> None:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] is task:
+            self._drop(key)
+
+    def _drop(self, key: str) -> None:
+        task, timer = self.entries.pop(key)
+        timer.cancel()
+        if not task.done():
+            task.cancel()
+            self.stats["cancelled"] += 1
+
+
+_prefetcher: Optional[Prefetcher] = None
+_prefetcher_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_prefetcher() -> Prefetcher:
+    """
+    Returns the prefetcher of the running event loop, creating it on first use.
+    """
+    global _prefetcher, _prefetcher_loop
+    loop = asyncio.get_running_loop()
+    if _prefetcher is None or _prefetcher_loop is not loop:
+        from mcp_server.tools.fetch_page import load_page_text  # The tools import this module
+
+        async def load(url: str) -> "Page":
+            return await load_page_text(url, 0, TIMEOUT, max_bytes=config.PREFETCH_MAX_BYTES)
+
+        _prefetcher = Prefetcher(load, config.PREFETCH_CONCURRENCY, config.PREFETCH_TTL,
+                                 config.PREFETCH_MAX_PENDING)
+        _prefetcher_loop = loop
+    return _prefetcher
+
+
+def prefetch(urls: List[str]) -> None:
+    """
+    Starts prefetching the top PREFETCH_TOP_K of the URLs, if prefetching is enabled.
+    """
+    if config.PREFETCH_ENABLED and config.PREFETCH_TOP_K > 0:
+        get_prefetcher().schedule(urls[:config.PREFETCH_TOP_K])
+
+
+def claim(url: str) -> Optional[asyncio.Task]:
+    """
+    Returns the prefetch of a URL started on this event loop, if any.
+    """
+    if _prefetcher is None or _prefetcher_loop is not asyncio.get_running_loop():
+        return None
+    return _prefetcher.claim(url)
+
+
+async def aclose() -> None:
+    """
+    Cancels the unclaimed prefetches of the running event loop.
+    """
+    if _prefetcher is not None and _prefetcher_loop is asyncio.get_running_loop():
+        await _prefetcher.aclose()
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    # Also marks the exception as retrieved for prefetches nobody claims
+    if not task.cancelled() and task.exception() is not None:
+        logger.debug("Prefetch failed: %s", task.exception())
@@ -0,0 +1,126 @@
+"""
+Query-aware selection of page text.
+
+Instead of the first char_limit characters of a page, which are often menus and
+cookie notices, the extracted text is split into chunks of whole lines, the chunks
+are ranked against the query with BM25, and the best ones that fit the budget are
+returned in page order. Everything runs in-process; there is no index to build
+beyond the page at hand.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import List
+
+from mcp_server import config
+
+# BM25 parameters (the usual defaults)
+K1 = 1.5
+B = 0.75
+
+# Marks text left out between two selected chunks
+GAP = "\n[...]\n"
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it of on or that the this "
+    "to was what when where which who why with".split()
+)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def split_chunks(text: str, chunk_chars: int = None) -> List[str]:
+    """
+    Groups consecutive lines into chunks of about chunk_chars characters.
+
+    Lines are only broken up when a single line is longer than a chunk, at the last
+    space before the limit.
+    """
+    chunk_chars = chunk_chars or config.RELEVANCE_CHUNK_CHARS
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for line in text.split("\n"):
+        while len(line) > chunk_chars:
+            cut = line.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:cut])
+            line = line[cut:].lstrip()
+        if not line:
+            continue
+        if current and size + 1 + len(line) > chunk_chars:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + (1 if size else 0)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def bm25_scores(chunks: List[str], query: str) -> List[float]:
+    """
+    Scores each chunk against the query with Okapi BM25.
+    """
+    terms = set(tokenize(query))
+    if not terms or not chunks:
+        return [0.0] * len(chunks)
+
+    counts = [Counter(tokenize(chunk)) for chunk in chunks]
+    lengths = [sum(c.values()) for c in counts]
+    average = sum(lengths) / len(lengths) or 1.0
+    n = len(chunks)
+    idf = {}
+    for term in terms:
+        containing = sum(1 for c in counts if term in c)
+        idf[term] = math.log(1 + (n - containing + 0.5) / (containing + 0.5))
+
+    scores = []
+    for c, length in zip(counts, lengths):
+        score = 0.0
+        for term in terms:
+            tf = c.get(term, 0)
+            if tf:
+                score += idf[term] * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average))
+        scores.append(score)
+    return scores
+
+
+def select_chunks(text: str, query: str, char_limit: int) -> str:
+    """
+    Returns the chunks of text most relevant to query, in page order, within char_limit.
+
+    Falls back to plain truncation when no chunk matches the query. Module-level so it
+    can run in a worker process.
+    """
+    if char_limit <= 0 or len(text) <= char_limit:
+        return text
+    chunks = split_chunks(text)
+    scores = bm25_scores(chunks, query)
+    ranked = sorted((i for i in range(len(chunks)) if scores[i] > 0), key=lambda i: -scores[i])
+    if not ranked:
+        return text[:char_limit]
+
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        cost = len(chunks[i]) + (len(GAP) if chosen else 0)
+        if used + cost <= char_limit:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        return chunks[ranked[0]][:char_limit]  # Even the best chunk is over budget
+
+    chosen.sort()
+    parts = [chunks[chosen[0]]]
+    for previous, i in zip(chosen, chosen[1:]):
+        parts.append(("\n" if i == previous + 1 else GAP) + chunks[i])
+    return "".join(parts)
@@ -0,0 +1,115 @@
+"""
+TTL cache for search results (lists of hits with url, title and snippet).
+
+Results live in an in-memory LRU and, if a path is configured, in a small SQLite
+table so they survive server restarts and are shared between server processes.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from mcp_server import config
+
+SearchKey = Tuple[str, str, int]
+SearchHit = Dict[str, str]  # {"url": ..., "title": ..., "snippet": ...}
+
+
+def make_search_key(query: str, region: str, max_results: int) -> SearchKey:
+    """
+    Builds the cache key: case- and whitespace-normalized query, region and result count.
+    """
+    return (" ".join(query.lower().split()), region.lower(), max_results)
+
+
+class SearchCache:
+    """
+    In-memory LRU with per-entry expiry, optionally backed by SQLite. Thread-safe.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, path: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[SearchKey, Tuple[float, List[SearchHit]]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_hits (key TEXT PRIMARY KEY, hits TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self.conn.commit()
+
+    def get(self, key: SearchKey) -> Optional[List[SearchHit]]:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(key)
+                return list(entry[1])
+            self.entries.pop(key, None)
+
+            if self.conn is None:
+                return None
+            row = self.conn.execute(
+                "SELECT hits, expires_at FROM search_hits WHERE key = ? AND expires_at > ?",
+                (json.dumps(key), now)
+            ).fetchone()
+            if row is None:
+                return None
+            hits = json.loads(row[0])
+            self._remember(key, row[1], hits)
+            return list(hits)
+
+    def put(self, key: SearchKey, hits: List[SearchHit]) -> None:
+        expires_at = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, expires_at, list(hits))
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO search_hits VALUES (?, ?, ?)",
+                    (json.dumps(key), json.dumps(hits), expires_at)
+                )
+                self.conn.execute("DELETE FROM search_hits WHERE expires_at <= ?", (time.time(),))
+                self.conn.commit()
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM search_hits")
+                self.conn.commit()
+
+    def _remember(self, key: SearchKey, expires_at: float, hits: List[SearchHit]) -> None:
+        self.entries[key] = (expires_at, hits)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """
+    Returns the process-wide search cache.
+    """
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(config.SEARCH_CACHE_TTL, config.SEARCH_CACHE_MAX_ENTRIES, config.SEARCH_CACHE_PATH or None)
+    return _cache
+
+
+def set_search_cache(cache: Optional[SearchCache]) -> None:
+    """
+    Replaces the process-wide search cache (e.g. with a fresh one in tests).
+    """
+    global _cache
+    _cache = cache
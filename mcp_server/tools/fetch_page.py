@@ -1,18 +1,52 @@
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import time
+import httpx
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from mcp_server import config, prefetch
+from mcp_server.http_client import stream
+from mcp_server.workers import get_worker_pool
+from mcp_server.page_cache import get_page_cache
+from mcp_server.relevance import select_chunks
+from mcp_server.extractors import Extractor, content_charset, get_extractor
+from mcp_server.urls import find_canonical_url, normalize_url, same_site
+from mcp_tracing.tracer import get_tracer
 
-def fetch_page_text(url: str, char_limit: int = 2000, timeout: int = 10) -> str:
+# rel=canonical lives in <head>; only the start of the body is scanned for it
+CANONICAL_SCAN_BYTES = 64 * 1024
+
+
+@dataclass
+class Page:
+    text: str
+    complete: bool  # False if the text is only a prefix of the page
+    title: str = ""
+
+
+async def fetch_page_text(url: str, char_limit: int = 2000, timeout: int = 10, query: str = "") -> Dict[str, str]:
     """
-    Fetches visible text from a webpage, optionally truncates to char_limit, and returns as string.
-    
+    Fetches visible text from a webpage, optionally truncates to char_limit, and returns it with the page title.
+
+    HTML pages, plain text, JSON and PDF documents are supported.
+
+    With a query, the page is split into chunks and only the passages most relevant
+    to the query are returned (in page order, gaps marked with "[...]") instead of
+    the first char_limit characters. Pass the user's question to get the useful part
+    of long pages.
+
+    Pages are served from the persistent page cache while fresh, and revalidated
+    with a conditional GET once stale. Bodies are streamed and capped at FETCH_MAX_BYTES;
+    in streaming mode the download stops once char_limit characters of main text are in.
+
     Args:
         url: The URL to fetch
         char_limit: Maximum characters to return (0 for no limit)
         timeout: Request timeout in seconds
-    
+        query: What you are looking for on the page (optional)
+
     Returns:
-        Extracted text content as string
-        
+        {"url": ..., "title": ..., "text": ...}; the title is empty if the page has none
+
     Raises:
         RuntimeError: If URL cannot be fetched or parsed
         ValueError: If URL is invalid
@@ -20,46 +54,198 @@ def fetch_page_text(url: str, char_limit: int = 2000, timeout: int = 10) -> str:
     # Basic URL validation
     if not url.strip():
         raise ValueError("URL cannot be empty")
-    
+
     if not url.startswith(('http://', 'https://')):
         raise ValueError("URL must start with http:// or https://")
-    
-    try:
-        # Add user agent to avoid some blocking
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, timeout=timeout, headers=headers)
-        response.raise_for_status()
-        
-        # Check if content is actually HTML
-        content_type = response.headers.get('content-type', '').lower()
-        if 'text/html' not in content_type:
-            raise RuntimeError(f"URL does not return HTML content (got: {content_type})")
-            
-    except requests.RequestException as e:
-        raise RuntimeError(f"Error fetching URL: {e}")
-    
-    try:
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Remove unwanted tags (scripts, styles, etc.)
-        for tag in soup(["script", "style", "noscript", "meta", "link", "header", "footer", "nav", "aside"]):
-            tag.decompose()
-
-        # Extract text with better formatting
-        main = soup.find("main") or soup.find("article") or soup.find("div", id="content")
-        if main:
-            text = main.get_text(separator="\n", strip=True)
-        else:
-            text = soup.get_text(separator="\n", strip=True)
-        
-        # Clean up excessive whitespace
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        text = '\n'.join(lines)
-
-        return text[:char_limit] if char_limit > 0 else text
-        
-    except Exception as e:
-        raise RuntimeError(f"Error parsing HTML content: {e}")
\ No newline at end of file
+
+    # Ranking needs the whole page, not the prefix that streaming stops at
+    read_limit = 0 if query.strip() else char_limit
+    page = await _claim_prefetch(url, read_limit)
+    if page is None:
+        page = await load_page_text(url, read_limit, timeout)
+    return {"url": url, "title": page.title, "text": await _select(page.text, char_limit, query)}
+
+
+async def load_page_text(url: str, read_limit: int, timeout: float, max_bytes: Optional[int] = None) -> Page:
+    """
+    Returns the text of a page from the page cache, revalidating or downloading it as needed.
+
+    Args:
+        url: The URL to load
+        read_limit: Characters needed (0 for the whole page); streaming may stop there
+        timeout: Request timeout in seconds
+        max_bytes: Lower body size cap than the format's default (e.g. for prefetches)
+
+    Raises:
+        RuntimeError: If URL cannot be fetched or parsed
+    """
+    tracer = get_tracer()
+    cache = get_page_cache()
+    cache_key = normalize_url(url)
+    with tracer.span("fetch.cache_lookup"):
+        cached = await asyncio.to_thread(cache.get, cache_key) if cache else None
+        if cached and not cached.covers(read_limit):
+            cached = None  # Only a prefix was stored; download the page again
+        tracer.annotate(hit=cached is not None)
+    if cached and cached.is_fresh(config.PAGE_CACHE_FRESH_TTL):
+        return _cached_page(cached)
+
+    with tracer.span("fetch.download", url=url, revalidate=cached is not None):
+        try:
+            # Non-blocking streamed request on the shared connection pool
+            async with stream(url, timeout=timeout, headers=cached.validator_headers() if cached else None) as response:
+                tracer.annotate(status=response.status_code)
+
+                # Not modified: skip both the download and the parse
+                if response.status_code == 304 and cached:
+                    await asyncio.to_thread(cache.touch, cache_key)
+                    return _cached_page(cached)
+
+                response.raise_for_status()
+
+                content_type = response.headers.get('content-type', '').lower()
+                extractor = get_extractor(content_type)
+                if extractor is None:
+                    raise RuntimeError(f"URL returns unsupported content (got: {content_type or 'no content type'})")
+
+                text, body, complete = await _read_page(response, extractor, read_limit, max_bytes)
+                tracer.annotate(bytes=len(body), complete=complete, format=extractor.name)
+                aliases = _alias_keys(str(response.url), body, response.encoding, markup=extractor.name == "html")
+                title = extractor.title(body, response.encoding or "utf-8") if extractor.title else ""
+
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Error fetching URL: {e}")
+
+    if cache:
+        with tracer.span("fetch.cache_store"):
+            await asyncio.to_thread(
+                cache.put, cache_key, body, text, content_type,
+                response.headers.get('etag'), response.headers.get('last-modified'), complete, aliases
+            )
+    return Page(text, complete, title)
+
+
+def _cached_page(cached) -> Page:
+    # The title is not stored; it is read again from the start of the cached body
+    extractor = get_extractor(cached.content_type)
+    title = ""
+    if extractor and extractor.title:
+        title = extractor.title(cached.body, content_charset(cached.content_type))
+    return Page(cached.text, cached.complete, title)
+
+
+async def _claim_prefetch(url: str, read_limit: int) -> Optional[Page]:
+    """
+    Returns the page loaded by a speculative prefetch of the URL, if it covers read_limit.
+    A failed prefetch is ignored; the regular fetch then reports its own error.
+    """
+    task = prefetch.claim(url)
+    if task is None:
+        return None
+    with get_tracer().span("fetch.prefetched", ready=task.done()):
+        try:
+            page = await task
+        except Exception:
+            return None
+        if not (page.complete or 0 < read_limit <= len(page.text)):
+            return None  # Cut at PREFETCH_MAX_BYTES before enough text was in
+        return page
+
+
+async def _read_page(response: httpx.Response, extractor: Extractor, char_limit: int,
+                     max_bytes: Optional[int] = None) -> Tuple[str, bytes, bool]:
+    """
+    Reads the body up to the extractor's byte cap (or max_bytes, if lower) and extracts its text on the worker pool.
+
+    In streaming mode (FETCH_STREAMING with a char_limit, for formats that support it)
+    chunks are parsed as they arrive and the download stops as soon as enough text
+    has been collected. The incremental parser lives in this process, so its chunks
+    go to worker threads; with WORKER_MODE=process the body is therefore read up to
+    the byte cap and parsed in one job on a worker process instead.
+
+    Returns:
+        (text, raw body read, whether the text is complete rather than a prefix)
+
+    Raises:
+        RuntimeError: If a format that cannot be read partially exceeds its byte cap
+    """
+    encoding = response.encoding or "utf-8"
+    max_bytes = min(extractor.max_bytes, max_bytes or extractor.max_bytes)
+    too_large = RuntimeError(f"Document is larger than the {max_bytes} byte limit")
+    if not extractor.partial_ok and int(response.headers.get("content-length") or 0) > max_bytes:
+        raise too_large  # Refused before downloading anything
+
+    pool = get_worker_pool()
+    streaming = (extractor.stream is not None and config.FETCH_STREAMING and char_limit > 0
+                 and pool.mode != "process")
+    parser = extractor.stream(encoding, char_limit) if streaming else None
+
+    tracer = get_tracer()
+    parse_start = None
+    parse_time = 0.0
+
+    chunks = []
+    size = 0
+    complete = True
+    async for chunk in response.aiter_bytes():
+        if size + len(chunk) > max_bytes:
+            if not extractor.partial_ok:
+                raise too_large
+            chunk = chunk[:max_bytes - size]
+            complete = False
+        chunks.append(chunk)
+        size += len(chunk)
+        if parser:
+            started = time.perf_counter()
+            parse_start = parse_start or time.time()
+            await pool.run_local(parser.feed, chunk)
+            parse_time += time.perf_counter() - started
+            if parser.done:
+                complete = parser.complete
+                break
+        if not complete:
+            break
+
+    body = b"".join(chunks)
+    if parser is None:
+        with tracer.span("fetch.parse", bytes=len(body), format=extractor.name):
+            text, whole = await pool.run(extractor.extract, body, encoding, char_limit)
+            return text, body, complete and whole
+
+    started = time.perf_counter()
+    text = await pool.run_local(parser.close)
+    parse_time += time.perf_counter() - started
+    # Parsing was interleaved with the download; record its total as one span
+    tracer.add_span("fetch.parse", parse_start or time.time(), parse_time, bytes=len(body), format=extractor.name,
+                    streaming=True)
+    return text, body, complete
+
+
+def _alias_keys(final_url: str, body: bytes, encoding: str, markup: bool = True) -> List[str]:
+    """
+    Returns the other cache keys a downloaded page answers for: the URL it was
+    redirected to and, for HTML, its rel=canonical if that is on the same site.
+    """
+    keys = [normalize_url(final_url)]
+    if not markup:
+        return keys
+    head = body[:CANONICAL_SCAN_BYTES].decode(encoding or "utf-8", errors="replace")
+    canonical = find_canonical_url(head, final_url)
+    if canonical and same_site(canonical, final_url):
+        keys.append(normalize_url(canonical))
+    return keys
+
+
+async def _select(text: str, char_limit: int, query: str) -> str:
+    """
+    Cuts the text down to char_limit: the passages most relevant to the query, or its start.
+    """
+    if not query.strip() or char_limit <= 0 or len(text) <= char_limit:
+        return _truncate(text, char_limit)
+    with get_tracer().span("fetch.rank", chars=len(text)):
+        return await get_worker_pool().run(select_chunks, text, query, char_limit)
+
+
+def _truncate(text: str, char_limit: int) -> str:
+    return text[:char_limit] if char_limit > 0 else text
+
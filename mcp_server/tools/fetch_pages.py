@@ -0,0 +1,50 @@
+import asyncio
+from typing import List, Dict, Optional
+from mcp_server.config import FETCH_BATCH_MAX_URLS, FETCH_BATCH_CONCURRENCY
+from mcp_server.tools.fetch_page import fetch_page_text
+
+async def fetch_pages_text(
+    urls: List[str],
+    char_limit: int = 2000,
+    timeout: int = 10,
+    max_concurrency: Optional[int] = None,
+    query: str = ""
+) -> List[Dict[str, str]]:
+    """
+    Fetches visible text from several webpages at once.
+
+    Use this after `search_urls` to read multiple results in one step.
+    A failing URL does not abort the batch; its entry carries an 'error' instead of 'text'.
+
+    Args:
+        urls: The URLs to fetch (duplicates are fetched once)
+        char_limit: Maximum characters to return per page (0 for no limit)
+        timeout: Request timeout in seconds per page
+        max_concurrency: Maximum pages fetched in parallel (capped by the server setting)
+        query: What you are looking for; returns the most relevant passages of each page
+
+    Returns:
+        One dict per unique URL, in input order: {"url": ..., "title": ..., "text": ...} or {"url": ..., "error": ...}
+
+    Raises:
+        ValueError: If no URLs or too many URLs are given
+    """
+    unique_urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
+    if not unique_urls:
+        raise ValueError("At least one URL is required")
+
+    if len(unique_urls) > FETCH_BATCH_MAX_URLS:
+        raise ValueError(f"Too many URLs: {len(unique_urls)} (maximum is {FETCH_BATCH_MAX_URLS})")
+
+    limit = min(max_concurrency or FETCH_BATCH_CONCURRENCY, FETCH_BATCH_CONCURRENCY)
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def fetch_one(url: str) -> Dict[str, str]:
+        # Per-host limits are enforced by the shared HTTP engine underneath
+        async with semaphore:
+            try:
+                return await fetch_page_text(url, char_limit, timeout, query)
+            except (RuntimeError, ValueError) as e:
+                return {"url": url, "error": str(e)}
+
+    return list(await asyncio.gather(*(fetch_one(url) for url in unique_urls)))
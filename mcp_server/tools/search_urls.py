@@ -1,48 +1,142 @@
-from duckduckgo_search import DDGS
-from typing import List, Optional, Dict, Any
+import asyncio
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional
+from mcp_server import config, hosts, prefetch
+from mcp_server.search_cache import SearchHit, get_search_cache, make_search_key
+from mcp_server.singleflight import SingleFlight
+from mcp_server.urls import normalize_url
+from mcp_tracing.tracer import get_tracer
 
-def search_urls(query: str, max_results: int = 3, region: str = "wt-wt") -> List[str]:
+if TYPE_CHECKING:
+    from duckduckgo_search import DDGS
+
+# Long-lived DuckDuckGo session, shared by all searches of this server process
+_ddgs: Optional["DDGS"] = None
+_ddgs_lock = threading.Lock()
+
+# Concurrent identical queries share one upstream request
+_inflight = SingleFlight()
+
+# Host whose rate limit and circuit breaker all searches share
+SEARCH_HOST = "duckduckgo.com"
+
+SNIPPET_MAX_CHARS = 300  # Enough to judge a result without fetching it
+
+
+def get_ddgs() -> "DDGS":
+    global _ddgs
+    if _ddgs is None:
+        # Imported on first search: duckduckgo_search and its HTTP stack are slow to load
+        from duckduckgo_search import DDGS
+        _ddgs = DDGS()
+    return _ddgs
+
+
+async def search_urls(query: str, max_results: int = 3, region: str = "wt-wt") -> List[SearchHit]:
     """
-    Search for URLs using DuckDuckGo search API.
-    
+    Search for URLs using DuckDuckGo search API. Each hit comes with the page title and a
+    snippet of its text, to pick the pages worth fetching.
+
+    Results are cached per (query, region, max_results), and identical searches
+    running at the same time are answered by a single upstream request. URLs that
+    only differ by tracking parameters or AMP cache wrapping are returned once.
+    Searches are paced per SEARCH_HOST_RATE; throttled or failed searches are
+    retried with backoff, and fail at once while the backend is known to be down.
+
     Args:
         query: Search term/query string
         max_results: Maximum number of URLs to return (default: 3)
         region: Search region code (default: "wt-wt" for worldwide)
-    
+
     Returns:
-        List of URLs as strings
-    
+        List of hits: {"url": ..., "title": ..., "snippet": ...}
+
     Raises:
         RuntimeError: If search fails or no results found
     """
     if not query.strip():
         raise ValueError("Query cannot be empty")
-    
-    urls = []
-    
-    try:
-        with DDGS() as ddgs:
-            # Use text search with proper error handling
-            results = ddgs.text(
-                query, 
-                region=region, 
-                safesearch="moderate", 
-                max_results=max_results
-            )
-            
-            # Convert generator to list and extract URLs
-            for result in results:
-                if isinstance(result, dict) and "href" in result:
-                    urls.append(result["href"])
-                    # Stop when we have enough results
-                    if len(urls) >= max_results:
-                        break
-            
-            if not urls:
-                raise RuntimeError(f"No search results found for query: {query}")
-                
-    except Exception as e:
-        raise RuntimeError(f"Search failed: {str(e)}")
-    
-    return urls
+
+    tracer = get_tracer()
+    cache = get_search_cache()
+    key = make_search_key(query, region, max_results)
+    with tracer.span("search.cache_lookup"):
+        hits = cache.get(key)
+        tracer.annotate(hit=hits is not None)
+    if hits is not None:
+        prefetch.prefetch([hit["url"] for hit in hits])  # Read ahead while the model picks a result
+        return hits
+
+    async def search() -> List[SearchHit]:
+        state = hosts.get_host_state(SEARCH_HOST, config.SEARCH_HOST_RATE, config.SEARCH_HOST_BURST)
+        with tracer.span("search.upstream", query=query):
+            try:
+                found = await hosts.call(
+                    state,
+                    lambda: asyncio.to_thread(_search_blocking, query, max_results, region),
+                    _classify_search,
+                    time.monotonic() + config.SEARCH_TIMEOUT,
+                    hedge_delay=0,  # Searches share one session and run one at a time anyway
+                )
+            except Exception as e:
+                raise RuntimeError(f"Search failed: {str(e)}")
+        if not found:
+            raise RuntimeError(f"No search results found for query: {query}")
+        cache.put(key, found)
+        return found
+
+    tracer.annotate(shared=_inflight.in_flight(key))  # Joined an identical running search
+    hits = await _inflight.do(key, search)
+    prefetch.prefetch([hit["url"] for hit in hits])
+    return hits
+
+
+def _search_blocking(query: str, max_results: int, region: str) -> List[SearchHit]:
+    """
+    Runs the actual DuckDuckGo request; called in a worker thread.
+    Backend errors are raised as they are, for `_classify_search`.
+    """
+    hits = []
+    seen = set()
+
+    # The session is not safe for concurrent use; distinct queries take turns
+    with _ddgs_lock:
+        results = get_ddgs().text(
+            query,
+            region=region,
+            safesearch="moderate",
+            max_results=max_results
+        )
+
+        # Convert generator to list and extract the hits
+        for result in results:
+            if isinstance(result, dict) and "href" in result:
+                key = normalize_url(result["href"])
+                if key in seen:
+                    continue  # Same page as an earlier result
+                seen.add(key)
+                hits.append({
+                    "url": result["href"],
+                    "title": " ".join(str(result.get("title") or "").split()),
+                    "snippet": " ".join(str(result.get("body") or "").split())[:SNIPPET_MAX_CHARS],
+                })
+                # Stop when we have enough results
+                if len(hits) >= max_results:
+                    break
+
+    return hits
+
+
+def _classify_search(outcome) -> hosts.Outcome:
+    """
+    Classifies a search attempt for `hosts.call`.
+    """
+    if not isinstance(outcome, Exception):
+        return hosts.OK, None
+    from duckduckgo_search.exceptions import DuckDuckGoSearchException, RatelimitException
+    if isinstance(outcome, RatelimitException):
+        return hosts.THROTTLED, None
+    if isinstance(outcome, DuckDuckGoSearchException):
+        return hosts.FAILED, None  # Timeouts and backend errors
+    return hosts.OK, None
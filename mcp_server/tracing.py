@@ -0,0 +1,44 @@
+"""
+Latency tracing for the MCP server.
+
+When the client traces a session it starts the server with TRACE_FILE set and
+sends its current span as `traceparent` in each tool request's `_meta`. Tool
+calls then record their spans as children of the client's tool-call span.
+"""
+
+import functools
+from typing import Optional
+
+from mcp.server.lowlevel.server import request_ctx
+
+from mcp_tracing.tracer import TRACE_FILE, Tracer, get_tracer, set_tracer
+
+
+def configure_tracing(process_name: str) -> None:
+    """
+    Installs the server tracer, which appends spans to TRACE_FILE as they end:
+    the client stops servers with a signal, so there is no later chance to flush.
+    """
+    set_tracer(Tracer(TRACE_FILE, process_name=process_name, stream=True))
+
+
+def traced(fn):
+    """
+    Wraps an async tool so each call is recorded as a `server.<tool name>` span.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        tracer = get_tracer()
+        with tracer.remote_parent(_request_traceparent()):
+            with tracer.span(f"server.{fn.__name__}"):
+                return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+def _request_traceparent() -> Optional[str]:
+    try:
+        meta = request_ctx.get().meta
+    except LookupError:
+        return None  # Called outside an MCP request
+    return (meta.model_extra or {}).get("traceparent") if meta else None
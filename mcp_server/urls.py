@@ -0,0 +1,118 @@
+import html
+import re
+from typing import Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that only track the click and never change the page
+TRACKING_PARAMS = frozenset([
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "ref_src",
+])
+TRACKING_PREFIXES = ("utm_",)
+
+# Parameters that request the AMP rendering of the same page
+AMP_PARAMS = {"amp": None, "outputtype": "amp"}
+
+# Google's AMP cache serves https://example.com/a as https://example-com.cdn.ampproject.org/c/s/example.com/a
+AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+
+# Host prefixes that mark a variant of the same site (AMP, mobile, www)
+SITE_VARIANT_PREFIXES = ("www.", "amp.", "m.")
+
+_LINK_TAG = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_ATTRIBUTE = re.compile(r"""([\w:-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""")
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so equivalent spellings map to the same cache key.
+
+    Lowercases scheme and host, drops default ports and the fragment, unwraps
+    AMP cache URLs, removes tracking and AMP parameters and sorts the rest.
+    """
+    try:
+        parts = urlsplit(_unwrap_amp_cache(url.strip()))
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        port = parts.port
+    except ValueError:
+        return url.strip()  # Malformed port etc.; let the fetch report the error
+
+    netloc = host if port is None or DEFAULT_PORTS.get(scheme) == port else f"{host}:{port}"
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_ignored_param(name, value)
+    ))
+    return urlunsplit((scheme, netloc, parts.path or "/", query, ""))
+
+
+def find_canonical_url(html_text: str, base_url: str) -> Optional[str]:
+    """
+    Returns the absolute target of the document's <link rel="canonical">, if any.
+
+    Only the markup passed in is scanned; the link lives in <head>, so the start
+    of the document is enough.
+    """
+    for tag in _LINK_TAG.findall(html_text):
+        attributes = {
+            name.lower(): html.unescape(value.strip("\"'"))
+            for name, value in _ATTRIBUTE.findall(tag)
+        }
+        if "canonical" in attributes.get("rel", "").lower().split() and attributes.get("href"):
+            canonical = urljoin(base_url, attributes["href"].strip())
+            return canonical if canonical.startswith(("http://", "https://")) else None
+    return None
+
+
+def same_site(url_a: str, url_b: str) -> bool:
+    """
+    Whether two URLs are on the same host, ignoring www., amp. and m. variants.
+    """
+    return _site(url_a) == _site(url_b) != ""
+
+
+def _site(url: str) -> str:
+    try:
+        host = (urlsplit(_unwrap_amp_cache(url)).hostname or "").lower()
+    except ValueError:
+        return ""
+    for prefix in SITE_VARIANT_PREFIXES:
+        if host.startswith(prefix) and host.count(".") > 1:
+            host = host[len(prefix):]
+    return host
+
+
+def _unwrap_amp_cache(url: str) -> str:
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+    except ValueError:
+        return url
+    if not host.endswith(AMP_CACHE_SUFFIX):
+        return url
+    # /c/ for documents, /v/ for viewer URLs; an 's/' segment means the origin is HTTPS
+    segments = parts.path.lstrip("/").split("/", 2)
+    if len(segments) < 2 or segments[0] not in ("c", "v"):
+        return url
+    rest = segments[1:]
+    scheme = "http"
+    if rest[0] == "s":
+        scheme = "https"
+        rest = rest[1].split("/", 1) if len(rest) > 1 else []
+    else:
+        rest = "/".join(rest).split("/", 1)
+    if not rest or not rest[0]:
+        return url
+    path = "/" + rest[1] if len(rest) > 1 else "/"
+    return urlunsplit((scheme, rest[0], path, parts.query, ""))
+
+
+def _is_ignored_param(name: str, value: str) -> bool:
+    name = name.lower()
+    if name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES):
+        return True
+    if name in AMP_PARAMS:
+        expected = AMP_PARAMS[name]
+        return expected is None or value.lower() == expected
+    return False
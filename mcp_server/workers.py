@@ -0,0 +1,121 @@
+"""
+Worker pool for CPU-bound work (HTML parsing and text extraction).
+
+Network I/O stays on the event loop; parse jobs run on a thread pool, or on a
+process pool to use several cores. At most WORKER_COUNT jobs run at once, the
+rest wait on the event loop, and beyond WORKER_MAX_PENDING jobs new ones are
+rejected right away so an overloaded server fails fast instead of queueing forever.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from mcp_server import config
+
+
+class ServerBusyError(RuntimeError):
+    """
+    Raised when the worker queue is full.
+    """
+
+
+class WorkerPool:
+    """
+    Bounded executor front-end with queue-depth limit.
+
+    Args:
+        mode: "thread", "process" or "inline" (run on the event loop, for debugging)
+        workers: Jobs running at the same time
+        max_pending: Jobs allowed to be queued or running before new ones are rejected
+    """
+
+    def __init__(self, mode: str, workers: int, max_pending: int):
+        if mode not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown worker mode: {mode}")
+        self.mode = mode
+        self.workers = max(workers, 1)
+        self.max_pending = max(max_pending, self.workers)
+        self.pending = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[Executor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs fn(*args) on the pool. In process mode fn and its arguments must be picklable.
+
+        Raises:
+            ServerBusyError: If WORKER_MAX_PENDING jobs are already waiting or running
+        """
+        return await self._submit(self._get_executor, fn, args)
+
+    async def run_local(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs fn(*args) on a thread of this process, also in process mode.
+
+        For jobs that mutate in-process state, such as feeding an incremental parser.
+        """
+        return await self._submit(self._get_threads, fn, args)
+
+    async def _submit(self, get_executor: Callable[[], Executor], fn: Callable[..., Any], args: tuple) -> Any:
+        if self.pending >= self.max_pending:
+            raise ServerBusyError(f"Server busy: {self.pending} extraction jobs pending, try again later")
+
+        self.pending += 1
+        try:
+            if self.mode == "inline":
+                return fn(*args)
+            loop = asyncio.get_running_loop()
+            if self._slots is None or self._slots_loop is not loop:
+                self._slots = asyncio.Semaphore(self.workers)
+                self._slots_loop = loop
+            async with self._slots:
+                return await loop.run_in_executor(get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def _get_executor(self) -> Executor:
+        if self.mode == "thread":
+            return self._get_threads()
+        if self._executor is None:
+            # 'spawn' avoids forking a process that already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _get_threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="extract")
+        return self._threads
+
+    def shutdown(self) -> None:
+        for executor in (self._executor, self._threads):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._threads = None
+        self._slots = None
+
+
+_pool: Optional[WorkerPool] = None
+
+
+def get_worker_pool() -> WorkerPool:
+    """
+    Returns the process-wide worker pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = WorkerPool(config.WORKER_MODE, config.WORKER_COUNT, config.WORKER_MAX_PENDING)
+    return _pool
+
+
+def shutdown_worker_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+    _pool = None
@@ -0,0 +1,251 @@
+"""
+Lightweight latency tracing shared by the MCP client and server.
+
+Spans are recorded with `tracer.span(name, **attributes)` and nest through a
+context variable, so concurrent asyncio tasks keep separate parents. The client
+passes its current span to the server as a W3C `traceparent` in the MCP request
+`_meta`, and server spans become children of the client's tool-call span.
+
+Output is in Chrome trace format (open in chrome://tracing or Perfetto):
+- The client writes one JSON file at the end of the session, merging in the
+  spans its servers recorded.
+- Servers append one event per line as spans finish, because the client stops
+  them with SIGTERM and they get no chance to flush on exit.
+
+Tracing is off unless a trace file is configured (TRACE_FILE); disabled spans cost
+one attribute check.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float = 0.0     # Wall-clock seconds, comparable across processes
+    duration: float = 0.0  # Seconds
+    attributes: Dict[str, object] = field(default_factory=dict)
+    clock: float = field(default=0.0, repr=False)  # perf_counter() at start, for the duration
+
+    def to_event(self, process_name: str) -> dict:
+        """
+        Converts the span to a Chrome trace 'complete' event.
+        """
+        return {
+            "name": self.name,
+            "cat": process_name,
+            "ph": "X",
+            "ts": round(self.start * 1e6),
+            "dur": round(self.duration * 1e6),
+            "pid": os.getpid(),
+            "tid": int(self.trace_id[:8], 16),  # One row per trace (i.e. per query)
+            "args": {
+                **self.attributes,
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+            },
+        }
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def _new_id(n_bytes: int) -> str:
+    return "%0*x" % (n_bytes * 2, random.getrandbits(n_bytes * 8))
+
+
+class Tracer:
+    """
+    Collects spans for one process.
+
+    Args:
+        path: Trace file to write; tracing is disabled if empty
+        process_name: Label for this process in the trace ("client", "server", ...)
+        stream: Append each span to `path` as soon as it ends (one JSON event per line)
+            instead of writing a complete trace in `write()`
+    """
+
+    def __init__(self, path: str = "", process_name: str = "client", stream: bool = False):
+        self.path = path
+        self.enabled = bool(path)
+        self.process_name = process_name
+        self.stream = stream
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def start(self, name: str, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+        """
+        Starts a span without making it current; finish it with `end()`.
+
+        For code that cannot hold a context variable across its scope, such as async
+        generators, which run in their consumer's context. The parent defaults to the
+        current span. Returns None when tracing is disabled.
+        """
+        if not self.enabled:
+            return None
+        parent = parent or _current_span.get()
+        return Span(
+            name=name,
+            trace_id=parent.trace_id if parent else _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent.span_id if parent else None,
+            start=time.time(),
+            attributes=attributes,
+            clock=time.perf_counter(),
+        )
+
+    def end(self, span: Optional[Span]) -> None:
+        if span is None:
+            return
+        span.duration = time.perf_counter() - span.clock
+        self._finish(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Records the enclosed block as a span, child of the current span if any.
+
+        Yields the Span (None when disabled) so callers can add attributes.
+        """
+        span = self.start(name, **attributes)
+        if span is None:
+            yield None
+            return
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.attributes["error"] = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            self.end(span)
+
+    def annotate(self, **attributes) -> None:
+        """
+        Adds attributes to the current span, if any.
+        """
+        span = _current_span.get()
+        if self.enabled and span is not None:
+            span.attributes.update(attributes)
+
+    def add_span(self, name: str, start: float, duration: float, parent: Optional[Span] = None, **attributes) -> None:
+        """
+        Records a span with explicit timing (e.g. durations reported by a remote service)
+        as a child of `parent`, or of the current span.
+        """
+        parent = parent or _current_span.get()
+        if not self.enabled or parent is None:
+            return
+        self._finish(Span(name, parent.trace_id, _new_id(8), parent.span_id, start, duration, attributes))
+
+    def traceparent(self) -> Optional[str]:
+        """
+        Returns the W3C traceparent header value for the current span, if any.
+        """
+        span = _current_span.get()
+        if not self.enabled or span is None:
+            return None
+        return f"00-{span.trace_id}-{span.span_id}-01"
+
+    @contextmanager
+    def remote_parent(self, traceparent: Optional[str]):
+        """
+        Makes spans opened in this block children of a span in another process.
+        """
+        parts = (traceparent or "").split("-")
+        if not self.enabled or len(parts) != 4:
+            yield
+            return
+        token = _current_span.set(Span("remote", trace_id=parts[1], span_id=parts[2], parent_id=None))
+        try:
+            yield
+        finally:
+            _current_span.reset(token)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if self.stream:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.to_event(self.process_name), default=str) + "\n")
+
+    def write(self, extra_files: Iterable[str] = ()) -> List[dict]:
+        """
+        Writes all spans, plus events streamed by other processes into `extra_files`,
+        as one Chrome trace JSON file.
+
+        Returns:
+            The trace events written (empty when tracing is disabled)
+        """
+        if not self.enabled:
+            return []
+        events = [span.to_event(self.process_name) for span in self.spans]
+        for path in extra_files:
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    events.extend(json.loads(line) for line in f if line.strip())
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        return events
+
+
+def summarize(events: Iterable[dict]) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregates trace events by span name: count, total and max duration in seconds.
+    """
+    stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {"count": 0, "total": 0.0, "max": 0.0})
+    for event in events:
+        entry = stats[event["name"]]
+        duration = event["dur"] / 1e6
+        entry["count"] += 1
+        entry["total"] += duration
+        entry["max"] = max(entry["max"], duration)
+    return dict(stats)
+
+
+def format_summary(events: Iterable[dict]) -> str:
+    """
+    Renders `summarize(events)` as a table, slowest stages first.
+    """
+    lines = [f"{'stage':<32}{'count':>7}{'total s':>10}{'avg ms':>10}{'max ms':>10}"]
+    for name, s in sorted(summarize(events).items(), key=lambda item: -item[1]["total"]):
+        lines.append(
+            f"{name:<32}{s['count']:>7}{s['total']:>10.2f}"
+            f"{s['total'] / s['count'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer (disabled unless configured).
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(TRACE_FILE)
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    global _tracer
+    _tracer = tracer
@@ -0,0 +1,88 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from mcp_server import hosts, page_cache, search_cache
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the pages registered on the server's `pages` dict:
+    path -> (status, headers, body bytes).
+    """
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        status, headers, body = self.server.pages.get(
+            self.path, (404, {"Content-Type": "text/plain"}, b"not found")
+        )
+        if "ETag" in headers and self.headers.get("If-None-Match") == headers["ETag"]:
+            status, body = 304, b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep test output quiet
+
+
+@pytest.fixture(autouse=True)
+def isolated_page_cache(tmp_path):
+    """
+    Gives every test its own empty page cache instead of the user's store.
+    """
+    cache = page_cache.PageCache(str(tmp_path / "pages.sqlite3"), max_age=3600, max_bytes=10 * 1024 * 1024)
+    page_cache.set_page_cache(cache)
+    yield cache
+    page_cache.set_page_cache(None)
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_search_cache():
+    """
+    Gives every test its own empty in-memory search cache.
+    """
+    cache = search_cache.SearchCache(ttl=3600, max_entries=100)
+    search_cache.set_search_cache(cache)
+    yield cache
+    search_cache.set_search_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_host_states():
+    """
+    Starts every test without rate limits, pauses or open circuits left by others.
+    """
+    hosts.reset_host_states()
+    yield
+    hosts.reset_host_states()
+
+
+@pytest.fixture
+def page_server():
+    """
+    Local HTTP server for fetch tests. Register pages with `add(path, body, ...)`.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    server.pages = {}
+    server.requests = []
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def add(path, body, content_type="text/html; charset=utf-8", status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        server.pages[path] = (status, {"Content-Type": content_type, **(headers or {})}, body)
+        return base_url + path
+
+    server.add = add
+    server.base_url = base_url
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
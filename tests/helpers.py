@@ -0,0 +1,16 @@
+import asyncio
+
+from mcp_server import http_client, prefetch
+
+
+def run(coro):
+    """
+    Runs a coroutine to completion, then stops prefetches and closes the shared HTTP pool.
+    """
+    async def wrapper():
+        try:
+            return await coro
+        finally:
+            await prefetch.aclose()
+            await http_client.aclose()
+    return asyncio.run(wrapper())
@@ -0,0 +1,237 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from mcp_client.agent import Conversation, MCPAgent
+from mcp_client.tool_cache import ToolResultCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The bundled web server, and one that never answers the MCP handshake
+WEB_SERVER = {"command": sys.executable, "args": ["-m", "mcp_server"], "cwd": REPO_ROOT}
+HANGING_SERVER = {"command": sys.executable, "args": ["-c", "import time; time.sleep(60)"]}
+
+
+class FakeSession:
+    """
+    Stands in for an MCP ClientSession; each call sleeps for `delays[tool_name]`.
+    """
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.in_flight = 0
+        self.peak = 0
+        self.metas = []  # Request metadata of each call
+        self.failures = []  # Arguments whose next call returns an error result
+
+    async def send_request(self, request, result_type):
+        params = request.root.params
+        self.metas.append(params.meta.model_extra if params.meta else {})
+        return await self.call_tool(params.name, params.arguments)
+
+    async def call_tool(self, name, arguments=None):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delays[name])
+        self.in_flight -= 1
+        if arguments["q"] in self.failures:
+            self.failures.remove(arguments["q"])
+            return SimpleNamespace(isError=True, content=[SimpleNamespace(text=f"Error: {name} timed out")])
+        return SimpleNamespace(isError=False, content=[SimpleNamespace(text=f"{name} -> {arguments['q']}")])
+
+
+class FakeLLM:
+    """
+    Replays a fixed list of responses as `OllamaClient.chat_stream` blocks,
+    pausing `block_delay` seconds between blocks.
+    """
+
+    def __init__(self, responses, block_delay=0.0, native_tool_role=False):
+        self.responses = list(responses)
+        self.block_delay = block_delay
+        self.native_tool_role = native_tool_role
+        self.tools = []
+        self.requests = []  # Messages of each call, as sent
+
+    def set_tools(self, tools):
+        self.tools = list(tools)
+
+    async def supports_tool_role(self):
+        return self.native_tool_role
+
+    async def chat_stream(self, messages, tools=None):
+        self.requests.append([dict(m) for m in messages])
+        for block in self.responses.pop(0)["content"]:
+            await asyncio.sleep(self.block_delay)
+            if block["type"] == "text":
+                block = {"type": "text_delta", "text": block["text"]}
+            yield block
+
+
+def tool_use(name, q):
+    return {"type": "tool_use", "id": name, "name": name, "input": {"q": q}}
+
+
+def make_agent(delays, responses, **kwargs):
+    agent = MCPAgent(**kwargs)
+    agent.llm_client = FakeLLM(responses)
+    session = FakeSession(delays)
+    for name in delays:
+        agent.tool_to_session[name] = session
+    return agent, session
+
+
+def test_tool_calls_run_concurrently_in_order():
+    delays = {"slow": 0.3, "fast": 0.05, "search": 0.1}
+    agent, session = make_agent(delays, [
+        {"content": [tool_use("slow", 1), tool_use("fast", 2), tool_use("search", 3), tool_use("fast", 4)]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ])
+
+    started = time.perf_counter()
+    asyncio.run(agent.process_query("question"))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5  # Close to the slowest call, not the 0.5 s sum
+    tool_messages = [m["content"] for m in agent.messages if m["content"].startswith("[Tool")]
+    assert tool_messages == [
+        "[Tool 'slow' result]:\nslow -> 1",
+        "[Tool 'fast' result]:\nfast -> 2",
+        "[Tool 'search' result]:\nsearch -> 3",
+        "[Tool 'fast' result]:\nfast -> 4",
+    ]
+    assert agent.messages[-1] == {"role": "assistant", "content": "done"}
+
+
+def test_max_tool_concurrency_limit():
+    agent, session = make_agent({"fetch": 0.02}, [
+        {"content": [tool_use("fetch", i) for i in range(5)]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ], max_tool_concurrency=2)
+
+    asyncio.run(agent.process_query("question"))
+    assert session.peak == 2
+
+
+def test_tool_calls_start_while_reply_streams():
+    agent, session = make_agent({"search": 0.2}, [
+        {"content": [tool_use("search", 1), {"type": "text", "text": "Let me "}, {"type": "text", "text": "check."}]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ])
+    agent.llm_client.block_delay = 0.1
+
+    started = time.perf_counter()
+    asyncio.run(agent.process_query("question"))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.45  # The 0.2 s tool call overlaps the 0.3 s of streaming
+    assert agent.messages[2] == {"role": "assistant", "content": "Let me check."}
+
+
+def test_empty_stream_records_no_reply():
+    agent, _ = make_agent({}, [{"content": []}])
+    assert asyncio.run(agent.process_query("question")) == "[No reply]"
+    assert agent.messages[-1] == {"role": "assistant", "content": "[No reply]"}
+
+
+def test_process_query_returns_final_reply_for_given_conversation():
+    agent, session = make_agent({"search": 0.0}, [
+        {"content": [{"type": "text", "text": "Searching."}, tool_use("search", 1)]},
+        {"content": [{"type": "text", "text": "Found it."}]},
+    ])
+    conversation = Conversation("user-1")
+
+    assert asyncio.run(agent.process_query("question", conversation)) == "Found it."
+    assert conversation.messages[-1] == {"role": "assistant", "content": "Found it."}
+    assert agent.messages == []  # The default conversation is untouched
+    # The server is told which conversation the tool call belongs to
+    assert session.metas == [{"conversation": "user-1"}]
+
+
+def test_repeated_tool_calls_are_served_from_cache():
+    agent, session = make_agent({"search": 0.05}, [
+        {"content": [tool_use("search", 1), tool_use("search", 1)]},
+        {"content": [tool_use("search", 1), tool_use("search", 2)]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ])
+    agent.tool_cache = ToolResultCache({"search": 60})
+
+    asyncio.run(agent.process_query("question"))
+    # The duplicate in the first turn shares its request; the repeat in the second turn hits the cache
+    assert len(session.metas) == 2
+    assert agent.tool_cache.stats == {"hit": 1, "shared": 1, "miss": 2}
+    tool_messages = [m["content"] for m in agent.messages if m["content"].startswith("[Tool")]
+    assert tool_messages.count("[Tool 'search' result]:\nsearch -> 1") == 3
+
+
+def test_failed_tool_calls_are_not_cached():
+    agent, session = make_agent({"search": 0.0}, [
+        {"content": [tool_use("search", 1)]},
+        {"content": [tool_use("search", 1)]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ])
+    agent.tool_cache = ToolResultCache({"search": 60})
+    session.failures.append(1)
+
+    asyncio.run(agent.process_query("question"))
+    # The error is shown to the LLM, and the retry reaches the server again
+    assert len(session.metas) == 2
+    assert agent.tool_cache.stats == {"hit": 0, "shared": 0, "miss": 2}
+    tool_messages = [m["content"] for m in agent.messages if m["content"].startswith("[Tool")]
+    assert tool_messages == ["[Tool 'search' result]:\nError: search timed out", "[Tool 'search' result]:\nsearch -> 1"]
+
+
+def test_native_tool_role_messages():
+    agent, session = make_agent({"search": 0.0}, [
+        {"content": [tool_use("search", 1)]},
+        {"content": [{"type": "text", "text": "done"}]},
+    ])
+    agent.llm_client.native_tool_role = True
+
+    asyncio.run(agent.process_query("question"))
+    assert agent.llm_client.requests[1][-2:] == [
+        {"role": "assistant", "content": "[No response]",
+         "tool_calls": [{"function": {"name": "search", "arguments": {"q": 1}}}]},
+        {"role": "tool", "tool_name": "search", "content": "search -> 1"},
+    ]
+
+
+def test_server_start_timeout():
+    async def scenario():
+        agent = MCPAgent()
+        started = time.perf_counter()
+        connected = await agent.connect_to_server("hanging", HANGING_SERVER, timeout=0.3)
+        elapsed = time.perf_counter() - started
+        await agent.cleanup()
+        return connected, elapsed
+
+    connected, elapsed = asyncio.run(scenario())
+    assert not connected
+    assert elapsed < 2
+
+
+def test_slow_server_does_not_delay_others():
+    async def scenario():
+        agent = MCPAgent()
+        agent.llm_client = FakeLLM([])
+        started = time.perf_counter()
+        await agent.connect_to_servers({
+            "hanging": {**HANGING_SERVER, "timeout": 30},
+            "broken": {"command": sys.executable, "args": ["-m", "no_such_server_module"]},
+            "web": WEB_SERVER,
+        })
+        elapsed = time.perf_counter() - started
+        still_starting = not agent.server_ready["hanging"].done()
+
+        started = time.perf_counter()
+        await agent.cleanup()
+        return agent, elapsed, still_starting, time.perf_counter() - started
+
+    agent, elapsed, still_starting, cleanup_time = asyncio.run(scenario())
+    assert elapsed < 15  # Far below the hanging server's 30 s timeout
+    assert still_starting
+    assert "fetch_page_text" in agent.tool_to_session
+    assert [t["name"] for t in agent.llm_client.tools] == [t["name"] for t in agent.available_llm_tools]
+    assert cleanup_time < 5
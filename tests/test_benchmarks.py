@@ -0,0 +1,50 @@
+import asyncio
+
+from benchmarks import run as bench
+from benchmarks.compare import compare
+from benchmarks.fixtures import PageServer
+
+PAGES = {
+    "small": b"<html><body><main><p>Small page</p></main></body></html>",
+    "huge": b"<html><body><main>" + b"<p>Row</p>" * 1000 + b"</main></body></html>",
+}
+
+
+def test_fetch_and_search_benchmarks_report_metrics():
+    async def scenario():
+        with PageServer(PAGES) as pages:
+            return (await bench.bench_fetch(pages, [1, 2], requests=4)
+                    + await bench.bench_search(pages, queries=2, latency=0))
+
+    results = asyncio.run(scenario())
+    workloads = {(r["params"].get("workload"), r["params"].get("concurrency")) for r in results
+                 if r["benchmark"] == "fetch_page_text"}
+    assert workloads == {(w, c) for w in ("corpus", "huge", "slow_drip") for c in (1, 2)}
+    for r in results:
+        assert r["metrics"]["p99_ms"] >= r["metrics"]["p50_ms"] > 0
+    # Cache hits skip the (fake) backend entirely
+    hit, = [r for r in results if r["params"].get("cache") == "hit"]
+    assert hit["metrics"]["p50_ms"] < 10
+
+
+def test_extract_benchmark_covers_every_engine():
+    from mcp_server.extract import ENGINES
+
+    with PageServer(PAGES) as pages:
+        results = bench.bench_extract(pages, min_time=0)
+    assert {(r["params"]["page"], r["params"]["engine"]) for r in results} == {
+        (page, engine) for page in PAGES for engine in ENGINES
+    }
+    assert all(r["metrics"]["s_per_mb"] > 0 for r in results)
+
+
+def test_compare_flags_regressions():
+    def report(rps, p99):
+        return {"results": [bench.result("fetch_page_text", {"concurrency": 4},
+                                         {"requests": 10, "throughput_rps": rps, "p99_ms": p99})]}
+
+    rows = {row["metric"]: row for row in compare(report(100, 10), report(80, 10.5), threshold=0.1)}
+    assert set(rows) == {"throughput_rps", "p99_ms"}  # Workload sizes are not compared
+    assert rows["throughput_rps"]["regression"]
+    assert not rows["p99_ms"]["regression"]
+    assert not any(row["regression"] for row in compare(report(100, 10), report(150, 5)))
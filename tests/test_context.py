@@ -0,0 +1,117 @@
+from mcp_client.llm.context import CONTEXT_OMITTED_NOTICE, ContextBudget, estimate_tokens
+from types import SimpleNamespace
+
+from mcp_client.llm.tool_helpers import (
+    format_tool_result_as_user_message,
+    format_tool_result_message,
+    parse_tool_result_message,
+    render_tool_result,
+    replace_tool_result,
+)
+
+SYSTEM = {"role": "system", "content": "You are helpful."}
+
+
+def tool_result(name, text):
+    return format_tool_result_as_user_message(name, text)
+
+
+def history(*rounds):
+    messages = [SYSTEM]
+    for query, results in rounds:
+        messages.append({"role": "user", "content": query})
+        messages.append({"role": "assistant", "content": "[No response]"})
+        messages.extend(tool_result("fetch_page_text", r) for r in results)
+    return messages
+
+
+def test_unchanged_while_under_budget():
+    messages = history(("q", ["short"]))
+    assert ContextBudget(max_tokens=10_000).compact(messages) is messages
+
+
+def test_duplicate_results_are_replaced_first():
+    page = "x" * 2000
+    messages = history(("q1", [page]), ("q2", ["other"]), ("q3", [page]))
+    budget = ContextBudget(max_tokens=estimate_tokens(messages) - 100, keep_recent=3)
+
+    compacted = budget.compact(messages)
+
+    assert compacted[0] == SYSTEM
+    assert "omitted" in compacted[3]["content"]
+    assert compacted[-1] == messages[-1]
+    assert budget.fits(compacted)
+
+
+def test_older_results_truncated_recent_kept_verbatim():
+    messages = history(("q1", ["a" * 4000]), ("q2", ["b" * 4000]))
+    budget = ContextBudget(max_tokens=1500, keep_recent=3, tool_result_chars=100)
+
+    compacted = budget.compact(messages)
+
+    _, old = parse_tool_result_message(compacted[3])
+    assert old.startswith("a" * 100) and "3900 more characters omitted" in old
+    assert compacted[-1] == messages[-1]
+    assert budget.fits(compacted)
+
+
+def test_oldest_messages_dropped_when_still_too_long():
+    messages = history(*[(f"question {i} " + "z" * 400, []) for i in range(20)])
+    budget = ContextBudget(max_tokens=600, keep_recent=4)
+
+    compacted = budget.compact(messages)
+
+    assert compacted[0] == SYSTEM
+    assert compacted[1]["content"] == CONTEXT_OMITTED_NOTICE
+    assert compacted[-4:] == messages[-4:]
+    assert budget.fits(compacted)
+    assert len(messages) == 41  # Input is not modified
+
+
+def test_turns_with_native_tool_results_are_dropped_whole():
+    messages = [SYSTEM]
+    for i in range(10):
+        messages.append({"role": "user", "content": f"question {i} " + "z" * 400})
+        messages.append({"role": "assistant", "content": "",
+                         "tool_calls": [{"function": {"name": "search_urls", "arguments": {}}}] * 2})
+        messages.extend(format_tool_result_message("search_urls", "r" * 200, native=True) for _ in range(2))
+    budget = ContextBudget(max_tokens=400, keep_recent=3)
+
+    compacted = budget.compact(messages)
+
+    assert compacted[1]["content"] == CONTEXT_OMITTED_NOTICE
+    for i, message in enumerate(compacted):
+        if message["role"] == "tool":
+            previous = compacted[i - 1]
+            assert previous["role"] == "tool" or "tool_calls" in previous
+
+
+def test_parse_tool_result_message():
+    assert parse_tool_result_message(tool_result("search_urls", "a\nb")) == ("search_urls", "a\nb")
+    assert parse_tool_result_message({"role": "user", "content": "hello"}) is None
+
+    native = format_tool_result_message("search_urls", "a", native=True)
+    assert native == {"role": "tool", "tool_name": "search_urls", "content": "a"}
+    assert parse_tool_result_message(native) == ("search_urls", "a")
+    assert replace_tool_result(native, "b") == {"role": "tool", "tool_name": "search_urls", "content": "b"}
+
+
+def items(*texts):
+    return [SimpleNamespace(type="text", text=text) for text in texts]
+
+
+def test_render_tool_result():
+    hits = items(
+        '{"url": "https://a", "title": "A \\"quoted\\" title", "snippet": "About a"}',
+        '{"url": "https://b", "title": "", "snippet": ""}',
+    )
+    assert render_tool_result(hits) == '1. A "quoted" title\nhttps://a\nAbout a\n\n2. https://b'
+
+    pages = items(
+        '{"url": "https://a", "title": "A", "text": "Line 1\\nLine 2"}',
+        '{"url": "https://b", "error": "HTTP 404"}',
+    )
+    assert render_tool_result(pages) == "A (https://a)\nLine 1\nLine 2\n\nhttps://b\nError: HTTP 404"
+
+    assert render_tool_result(items('{"count": 2}')) == '{"count":2}'
+    assert render_tool_result(items("plain", "[not json")) == "plain\n[not json"
@@ -0,0 +1,85 @@
+import asyncio
+import sys
+
+from mcp_client.agent import Conversation, MCPAgent
+from mcp_client.llm.tool_helpers import parse_tool_result_message, render_tool_result, replace_tool_result
+from tests.test_agent import REPO_ROOT, FakeLLM
+
+ARTICLE = "<html><body><main><p>" + "A long paragraph about the topic. " * 20 + "</p></main></body></html>"
+
+
+def fetch(url):
+    return {"type": "tool_use", "id": "fetch_page_text", "name": "fetch_page_text", "input": {"url": url}}
+
+
+def answer(*tool_calls):
+    return [{"content": list(tool_calls)}, {"content": [{"type": "text", "text": "done"}]}]
+
+
+def tool_results(conversation):
+    return [parse_tool_result_message(m)[1] for m in conversation.messages if parse_tool_result_message(m)]
+
+
+def test_text_is_returned_once_while_the_conversation_holds_it(page_server, tmp_path):
+    url = page_server.add("/article", ARTICLE)
+    mirror = page_server.add("/mirror", ARTICLE)
+    server = {
+        "command": sys.executable, "args": ["-m", "mcp_server"], "cwd": REPO_ROOT,
+        "env": {"PAGE_CACHE_PATH": str(tmp_path / "pages.sqlite3")},
+    }
+    alice, bob = Conversation("alice"), Conversation("bob")
+
+    async def scenario():
+        agent = MCPAgent(echo=False)
+        try:
+            assert await agent.connect_to_server("web", server, timeout=15)
+            agent.llm_client = FakeLLM(
+                answer(fetch(url)) + answer(fetch(url + "?utm_source=x"), fetch(mirror)) + answer(fetch(url))
+            )
+            await agent.process_query("first", alice)
+            await agent.process_query("again", alice)
+            await agent.process_query("other", bob)
+            returned = tool_results(alice)
+
+            # Once compaction truncated the text, asking again returns it in full
+            alice.messages = [
+                replace_tool_result(m, "A long paragraph [...]") if parse_tool_result_message(m) else m
+                for m in alice.messages
+            ]
+            agent.llm_client = FakeLLM(answer(fetch(url)))
+            await agent.process_query("once more", alice)
+            return returned + tool_results(alice)[-1:]
+        finally:
+            await agent.cleanup()
+
+    first, again, mirrored, refetched = asyncio.run(scenario())
+    assert first.startswith(f"{url}\nA long paragraph")
+    assert again == f"{url}?utm_source=x\n[Same text as {url}, already returned earlier in this conversation]"
+    assert mirrored == f"{mirror}\n[Same text as {url}, already returned earlier in this conversation]"
+    assert tool_results(bob) == [first]  # Another conversation gets the full text
+    assert refetched == first
+    # The tracking-parameter variant was served from the page cache
+    assert [path for path, _ in page_server.requests] == ["/article", "/mirror"]
+
+
+def test_mirrors_in_one_result_are_returned_once():
+    agent = MCPAgent(echo=False)
+    text = "Shared text. " * 20
+    pages = [f'{{"url": "https://a", "title": "", "text": "{text}"}}',
+             f'{{"url": "https://b", "title": "", "text": "{text}"}}']
+    assert render_tool_result(pages, agent._already_returned(Conversation())) == (
+        f"https://a\n{text}\n\nhttps://b\n[Same text as https://a above]"
+    )
+
+
+def test_hashes_are_forgotten_with_the_text():
+    agent = MCPAgent(echo=False)
+    conversation = Conversation()
+    page = '{"url": "https://a", "title": "", "text": "%s"}' % ("Page text. " * 20)
+    conversation.messages.append({"role": "user", "content": "[Tool 'fetch_page_text' result]:\n"
+                                  + render_tool_result([page], agent._already_returned(conversation))})
+    assert len(conversation.returned_texts) == 1
+
+    conversation.messages.clear()  # Dropped by compaction
+    agent._already_returned(conversation)
+    assert conversation.returned_texts == {}
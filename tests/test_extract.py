@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import pytest
+
+from mcp_server.extract import ENGINES, StreamingExtractor, extract_text
+
+PAGES_DIR = Path(__file__).parent / "fixtures" / "pages"
+PAGES = sorted(p.stem for p in PAGES_DIR.glob("*.html"))
+
+
+def golden(page: str, engine: str) -> str:
+    """
+    Expected output for a page. `<page>.txt` is the html.parser result; a
+    `<page>.<engine>.txt` file records a known, accepted divergence of that engine.
+    """
+    override = PAGES_DIR / f"{page}.{engine}.txt"
+    path = override if override.exists() else PAGES_DIR / f"{page}.txt"
+    return path.read_text(encoding="utf-8").rstrip("\n")
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+@pytest.mark.parametrize("page", PAGES)
+def test_matches_golden_output(page, engine):
+    html = (PAGES_DIR / f"{page}.html").read_text(encoding="utf-8")
+    assert extract_text(html, engine=engine) == golden(page, engine)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 37, 4096])
+@pytest.mark.parametrize("page", PAGES)
+def test_streaming_matches_lxml_engine(page, chunk_size):
+    html = (PAGES_DIR / f"{page}.html").read_text(encoding="utf-8")
+    extractor = StreamingExtractor(char_limit=0)
+    for i in range(0, len(html), chunk_size):
+        extractor.feed(html[i:i + chunk_size])
+    assert extractor.close() == golden(page, "lxml")
+
+
+def stream_until_done(html, char_limit, chunk_size=64):
+    extractor = StreamingExtractor(char_limit)
+    for i in range(0, len(html), chunk_size):
+        extractor.feed(html[i:i + chunk_size])
+        if extractor.done:
+            break
+    return extractor.close()
+
+
+@pytest.mark.parametrize("page", [p for p in PAGES if p != "nested_candidates"])
+def test_streaming_stops_early_with_same_prefix(page):
+    html = (PAGES_DIR / f"{page}.html").read_text(encoding="utf-8")
+    assert stream_until_done(html, 50)[:50] == golden(page, "lxml")[:50]
+
+
+def test_streaming_may_miss_main_after_other_candidate():
+    # Documented trade-off: a filled <article> ends the stream before the later <main>
+    html = (PAGES_DIR / "nested_candidates.html").read_text(encoding="utf-8")
+    assert stream_until_done(html, 10).startswith("First article")
+
+
+def test_streaming_done_once_main_is_complete():
+    extractor = StreamingExtractor(char_limit=1000)
+    extractor.feed("<html><body><main><p>Short main.</p></main><p>")
+    assert extractor.done and extractor.complete
+    assert extractor.close() == "Short main."
+
+
+def test_only_documented_divergences():
+    overrides = sorted(p.name for p in PAGES_DIR.glob("*.*.txt"))
+    assert overrides == ["malformed.lxml.txt"]  # Stray end tags do not split text in libxml2
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_char_limit_and_empty_input(engine):
+    assert extract_text("<main><p>abcdef</p></main>", char_limit=3, engine=engine) == "abc"
+    assert extract_text("", engine=engine) == ""
+
+
+def test_xml_declaration_is_accepted():
+    html = '<?xml version="1.0" encoding="utf-8"?><html><body><main>Hi</main></body></html>'
+    assert extract_text(html, engine="lxml") == extract_text(html, engine="bs4") == "Hi"
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        extract_text("<p>x</p>", engine="regex")
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+from mcp_server import config
+from mcp_server.extractors import HTML, JSON, PDF, PLAIN, TextStream, extract_pdf, get_extractor
+from mcp_server.tools.fetch_page import fetch_page_text
+from tests.helpers import run
+
+DOCUMENTS = os.path.join(os.path.dirname(__file__), "fixtures", "documents")
+
+
+def document(name):
+    with open(os.path.join(DOCUMENTS, name), "rb") as f:
+        return f.read()
+
+
+def test_get_extractor_by_media_type():
+    assert get_extractor("text/html; charset=utf-8") is HTML
+    assert get_extractor("Text/Plain") is PLAIN
+    assert get_extractor("application/json") is JSON
+    assert get_extractor("application/ld+json") is JSON
+    assert get_extractor("application/pdf") is PDF
+    assert get_extractor("image/png") is None
+    assert get_extractor("") is None
+
+
+def test_text_stream_stops_after_char_limit():
+    stream = TextStream("utf-8", char_limit=10)
+    stream.feed(b"\n\n   ")
+    assert not stream.done  # Leading whitespace does not count
+    stream.feed("Grüße aus Berlin".encode("utf-8")[:5])
+    stream.feed("Grüße aus Berlin".encode("utf-8")[5:])
+    assert stream.done
+    assert stream.close() == "Grüße aus Berlin"
+
+
+def test_plain_text_and_json_pass_through(page_server):
+    text_url = page_server.add("/notes.txt", document("notes.txt"), content_type="text/plain; charset=utf-8")
+    json_url = page_server.add("/data.json", document("data.json"), content_type="application/json")
+
+    assert run(fetch_page_text(text_url))["text"] == document("notes.txt").decode("utf-8").strip()
+    assert run(fetch_page_text(json_url))["text"] == document("data.json").decode("utf-8").strip()
+    assert run(fetch_page_text(text_url, char_limit=13))["text"] == "Release notes"
+
+
+def test_plain_text_streaming_stops_download_early(page_server, isolated_page_cache):
+    body = "First line.\n" + "filler line\n" * 200000
+    url = page_server.add("/log.txt", body, content_type="text/plain")
+
+    assert run(fetch_page_text(url, char_limit=11))["text"] == "First line."
+    cached = isolated_page_cache.get(url)
+    assert not cached.complete
+    assert len(cached.body) < len(body) // 10
+
+
+def test_pdf_pages_stop_at_char_limit():
+    body = document("report.pdf")
+
+    assert extract_pdf(body, "utf-8", 0) == (
+        "Quarterly report\nRevenue grew by 12 percent.\nOutlook\nHiring continues in the second half.\n"
+        "Appendix\nTables and figures.",
+        True,
+    )
+    assert extract_pdf(body, "utf-8", 20) == ("Quarterly report\nRevenue grew by 12 percent.", False)
+
+
+def test_fetch_pdf(page_server):
+    url = page_server.add("/report.pdf", document("report.pdf"), content_type="application/pdf")
+    assert run(fetch_page_text(url, char_limit=16))["text"] == "Quarterly report"
+    assert "Hiring continues" in run(fetch_page_text(url, char_limit=0))["text"]
+
+
+def test_pdf_over_byte_cap_is_refused(page_server, monkeypatch):
+    monkeypatch.setattr(config, "FETCH_MAX_DOCUMENT_BYTES", 100)
+    url = page_server.add("/report.pdf", document("report.pdf"), content_type="application/pdf")
+    with pytest.raises(RuntimeError, match="larger than the 100 byte limit"):
+        run(fetch_page_text(url))
+
+
+def test_pdf_without_pypdf(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pypdf", None)  # Makes the import fail
+    with pytest.raises(RuntimeError, match="requires the 'pypdf' package"):
+        extract_pdf(document("report.pdf"), "utf-8", 0)
@@ -1,4 +1,116 @@
+import pytest
+
+from mcp_server import config, http_client, workers
 from mcp_server.tools.fetch_page import fetch_page_text
+from mcp_server.workers import WorkerPool
+from tests.helpers import run
+
+ARTICLE_HTML = """
+<html><head><title>Demo</title><script>var x = 1;</script></head>
+<body>
+  <nav>Home | About</nav>
+  <main><h1>Headline</h1><p>First   paragraph.</p><p>Second paragraph.</p></main>
+  <footer>Copyright</footer>
+</body></html>
+"""
+
+
+def test_extracts_main_text(page_server):
+    url = page_server.add("/article", ARTICLE_HTML)
+    assert run(fetch_page_text(url)) == {
+        "url": url, "title": "Demo", "text": "Headline\nFirst   paragraph.\nSecond paragraph.",
+    }
+
+
+def test_char_limit_truncates(page_server):
+    url = page_server.add("/article", ARTICLE_HTML)
+    assert run(fetch_page_text(url, char_limit=8))["text"] == "Headline"
+
+
+def test_rejects_unsupported_content(page_server):
+    url = page_server.add("/image", b"\x89PNG", content_type="image/png")
+    with pytest.raises(RuntimeError, match="unsupported content"):
+        run(fetch_page_text(url))
+
+
+def test_http_error_is_runtime_error(page_server):
+    with pytest.raises(RuntimeError, match="Error fetching URL"):
+        run(fetch_page_text(page_server.base_url + "/missing"))
+
+
+def test_invalid_url():
+    with pytest.raises(ValueError):
+        run(fetch_page_text("ftp://example.com"))
+
+
+def test_connections_are_reused(page_server):
+    url = page_server.add("/article", ARTICLE_HTML)
+
+    async def fetch_twice():
+        await fetch_page_text(url)
+        first = http_client.get_client()
+        await fetch_page_text(url)
+        return first is http_client.get_client()
+
+    assert run(fetch_twice())
+
+
+def test_streaming_stops_download_early(page_server, isolated_page_cache):
+    filler = "<p>" + "x" * 1000 + "</p>"
+    html = "<html><body><article><p>Lead paragraph.</p>" + filler * 3000 + "</article></body></html>"
+    url = page_server.add("/huge", html)
+
+    assert run(fetch_page_text(url, char_limit=15))["text"] == "Lead paragraph."
+
+    cached = isolated_page_cache.get(url)
+    assert not cached.complete
+    assert len(cached.body) < len(html) // 10
+
+
+def test_prefix_in_cache_is_not_reused_for_larger_limit(page_server, isolated_page_cache):
+    url = page_server.add("/page", "<article><p>Lead.</p><p>More text.</p></article>")
+    isolated_page_cache.put(url, b"<article><p>Lead.</p>", "Lead.", "text/html", None, None, complete=False)
+
+    assert run(fetch_page_text(url, char_limit=4))["text"] == "Lead"
+    assert page_server.requests == []
+
+    assert run(fetch_page_text(url, char_limit=100))["text"] == "Lead.\nMore text."
+    assert len(page_server.requests) == 1
+
+
+def test_process_mode_parses_whole_body_in_worker_process(page_server, monkeypatch):
+    class RecordingPool(WorkerPool):
+        def __init__(self):
+            super().__init__("process", workers=1, max_pending=4)
+            self.jobs = []
+
+        async def _submit(self, get_executor, fn, args):
+            self.jobs.append((get_executor.__name__, fn.__name__))
+            return await super()._submit(get_executor, fn, args)
+
+    pool = RecordingPool()
+    monkeypatch.setattr(workers, "_pool", pool)
+    url = page_server.add("/page", "<main><p>Lead paragraph.</p><p>More text.</p></main>")
+    try:
+        assert run(fetch_page_text(url, char_limit=15))["text"] == "Lead paragraph."
+    finally:
+        pool.shutdown()
+    assert pool.jobs == [("_get_executor", "extract_html")]  # No incremental parse on threads
+
+
+def test_max_bytes_cap(page_server, monkeypatch):
+    monkeypatch.setattr(config, "FETCH_STREAMING", False)
+    monkeypatch.setattr(config, "FETCH_MAX_BYTES", 100)
+    url = page_server.add("/big", "<main>" + "word " * 1000 + "</main>")
+    assert len(run(fetch_page_text(url, char_limit=0))["text"]) < 100
+
+
+def test_query_selects_relevant_passages(page_server):
+    menu = "".join(f"<p>Menu item {i} and cookie settings</p>" for i in range(50))
+    url = page_server.add("/long", f"<html><body><main>{menu}<p>Opening hours: 9 to 17 daily.</p>{menu}</main></body></html>")
+    assert "Opening hours" not in run(fetch_page_text(url, char_limit=300))["text"]
+    assert "Opening hours: 9 to 17 daily." in run(fetch_page_text(url, char_limit=300, query="opening hours"))["text"]
+
 
 if __name__ == "__main__":
     # Prompt the user to enter a URL
@@ -6,7 +118,7 @@ if __name__ == "__main__":
 
     try:
         print("\n--- Page Content ---")
-        text = fetch_page_text(url, char_limit=2000, timeout=15)
+        text = run(fetch_page_text(url, char_limit=2000, timeout=15))["text"]
         print(text)
 
     except Exception as e:
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from mcp_server.tools import fetch_pages
+from mcp_server.tools.fetch_pages import fetch_pages_text
+from tests.helpers import run
+
+PAGE_HTML = "<html><body><main><p>{}</p></main></body></html>"
+
+
+def test_returns_results_and_errors_in_order(page_server):
+    first = page_server.add("/one", PAGE_HTML.format("Page one"))
+    second = page_server.add("/two", PAGE_HTML.format("Page two"))
+    missing = page_server.base_url + "/missing"
+
+    results = run(fetch_pages_text([first, missing, second, first]))
+
+    assert [r["url"] for r in results] == [first, missing, second]
+    assert results[0] == {"url": first, "title": "", "text": "Page one"}
+    assert "error" in results[1]
+    assert results[2] == {"url": second, "title": "", "text": "Page two"}
+
+
+def test_invalid_url_does_not_abort_batch(page_server):
+    url = page_server.add("/one", PAGE_HTML.format("Page one"))
+    results = run(fetch_pages_text(["not-a-url", url]))
+    assert "error" in results[0]
+    assert results[1]["text"] == "Page one"
+
+
+def test_concurrency_cap(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def fake_fetch(url, char_limit, timeout, query=""):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return url
+
+    monkeypatch.setattr(fetch_pages, "fetch_page_text", fake_fetch)
+    urls = [f"https://example.com/{i}" for i in range(8)]
+    run(fetch_pages_text(urls, max_concurrency=2))
+    assert peak == 2
+
+
+def test_rejects_empty_and_oversized_batches():
+    with pytest.raises(ValueError):
+        run(fetch_pages_text([]))
+    with pytest.raises(ValueError, match="Too many URLs"):
+        run(fetch_pages_text([f"https://example.com/{i}" for i in range(100)]))
@@ -0,0 +1,143 @@
+import asyncio
+import time
+
+import pytest
+
+from mcp_server import config, hosts
+from mcp_server.hosts import FAILED, OK, THROTTLED, HostState, HostUnavailableError
+from mcp_server.tools.fetch_page import fetch_page_text
+from tests.helpers import run
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(config, "FETCH_RETRY_BACKOFF", 0.01)
+
+
+def scripted(outcomes, delays=None):
+    """
+    attempt() returning the given outcome names in turn, recording each call.
+    """
+    calls = []
+
+    async def attempt():
+        calls.append(time.monotonic())
+        await asyncio.sleep((delays or {}).get(len(calls), 0))
+        outcome = outcomes[min(len(calls), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+def classify(outcome):
+    if isinstance(outcome, Exception) or outcome == "down":
+        return FAILED, None
+    if outcome.startswith("slow down"):
+        return THROTTLED, float(outcome.split()[-1])
+    return OK, None
+
+
+def state(**kwargs):
+    return HostState("example.com", **{"rate": 0, "burst": 1, "failure_threshold": 2, "reset_timeout": 60, **kwargs})
+
+
+def test_parse_retry_after():
+    assert hosts.parse_retry_after("120") == 120
+    assert hosts.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert hosts.parse_retry_after("soon") is None
+
+
+def test_throttled_attempt_is_retried_after_pause():
+    host = state(rate=100, burst=10)
+    attempt, calls = scripted(["slow down 0.2", "page"])
+    assert asyncio.run(hosts.call(host, attempt, classify, time.monotonic() + 5)) == "page"
+    assert calls[1] - calls[0] >= 0.2  # Retry-After was honoured
+    assert host.rate == 60  # Halved by the 429, partly recovered by the success
+
+
+def test_retry_after_past_deadline_fails_fast():
+    host = state()
+    attempt, calls = scripted(["slow down 30"])
+    started = time.monotonic()
+    assert asyncio.run(hosts.call(host, attempt, classify, started + 2)) == "slow down 30"
+    # The next request does not wait 30 s either
+    with pytest.raises(HostUnavailableError, match="rate limited"):
+        asyncio.run(hosts.call(host, attempt, classify, time.monotonic() + 2))
+    assert len(calls) == 1
+    assert time.monotonic() - started < 1
+
+
+def test_circuit_breaker_opens_and_probes(monkeypatch):
+    monkeypatch.setattr(config, "FETCH_RETRIES", 0)
+    host = state(reset_timeout=0.1)
+    attempt, calls = scripted([ConnectionError("refused"), ConnectionError("refused"), "page"])
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            asyncio.run(hosts.call(host, attempt, classify, time.monotonic() + 5))
+    with pytest.raises(HostUnavailableError, match="failing"):
+        asyncio.run(hosts.call(host, attempt, classify, time.monotonic() + 5))
+    assert len(calls) == 2  # Failed fast without a request
+
+    time.sleep(0.1)
+    assert asyncio.run(hosts.call(host, attempt, classify, time.monotonic() + 5)) == "page"
+    assert not host.circuit_open
+
+
+def test_cancelled_probe_waiter_frees_the_host(monkeypatch):
+    host = state(rate=1, burst=1, reset_timeout=0)
+    host.record(FAILED)
+    host.record(FAILED)
+    assert host.circuit_open
+
+    async def scenario():
+        host.tokens = 0  # The probe has to wait for its slot
+        waiter = asyncio.ensure_future(host.acquire(time.monotonic() + 5))
+        await asyncio.sleep(0.05)
+        assert host.probing
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+    asyncio.run(scenario())
+    assert not host.probing
+    assert host.tokens > 0  # The reserved slot was handed back
+    asyncio.run(host.acquire(time.monotonic() + 5))  # Another request may probe now
+
+
+def test_token_bucket_paces_requests():
+    host = state(rate=20, burst=1)
+    attempt, calls = scripted(["page"])
+
+    async def burst():
+        await asyncio.gather(*(hosts.call(host, attempt, classify, time.monotonic() + 5) for _ in range(5)))
+
+    asyncio.run(burst())
+    assert calls[-1] - calls[0] >= 0.18  # Four gaps of 1/20 s
+
+
+def test_slow_attempt_is_hedged():
+    host = state()
+    attempt, calls = scripted(["slow", "fast"], delays={1: 2.0})
+    started = time.monotonic()
+    result = asyncio.run(hosts.call(host, attempt, classify, started + 5, hedge_delay=0.05))
+    assert result == "fast"
+    assert len(calls) == 2
+    assert time.monotonic() - started < 1
+
+
+def test_fetch_retries_server_errors(page_server):
+    url = page_server.add("/busy", "busy", status=503)
+    with pytest.raises(RuntimeError, match="503"):
+        run(fetch_page_text(url))
+    assert len(page_server.requests) == 1 + config.FETCH_RETRIES
+
+
+def test_fetch_honours_long_retry_after(page_server):
+    url = page_server.add("/limited", "later", status=429, headers={"Retry-After": "3600"})
+    with pytest.raises(RuntimeError, match="429"):
+        run(fetch_page_text(url, timeout=5))
+    with pytest.raises(RuntimeError, match="rate limited"):
+        run(fetch_page_text(url, timeout=5))
+    assert len(page_server.requests) == 1
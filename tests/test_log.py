@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+
+from mcp_client import log
+from mcp_client.llm.ollama_client import OllamaClient
+from tests.test_ollama_client import FakeStreamingClient
+
+
+class CountingPayload(list):
+    """
+    Message list that counts how often it is formatted.
+    """
+    formatted = 0
+
+    def __repr__(self):
+        CountingPayload.formatted += 1
+        return super().__repr__()
+
+    __str__ = __repr__
+
+
+def stream_once(client, messages):
+    async def consume():
+        return [block async for block in client.chat_stream(messages)]
+    return asyncio.run(consume())
+
+
+def make_client():
+    client = OllamaClient(model="fake")
+    client.client = FakeStreamingClient([{"role": "assistant", "content": "ok"}])
+    return client
+
+
+def test_payload_not_formatted_by_default(caplog):
+    CountingPayload.formatted = 0
+    with caplog.at_level(logging.DEBUG, logger="mcp_client"):
+        stream_once(make_client(), CountingPayload([{"role": "user", "content": "x" * 10_000}]))
+    assert CountingPayload.formatted == 0
+    assert "Sending 1 messages" in caplog.text
+
+
+def test_payload_logged_when_enabled_and_sampled(caplog, monkeypatch):
+    monkeypatch.setattr(log, "LOG_PAYLOADS", True)
+    monkeypatch.setattr(log, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    with caplog.at_level(logging.DEBUG, logger="mcp_client"):
+        stream_once(make_client(), [{"role": "user", "content": "secret question"}])
+    assert "secret question" in caplog.text
+
+    caplog.clear()
+    monkeypatch.setattr(log, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    with caplog.at_level(logging.DEBUG, logger="mcp_client"):
+        stream_once(make_client(), [{"role": "user", "content": "secret question"}])
+    assert "secret question" not in caplog.text
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord({"name": "mcp_client.test", "levelname": "INFO", "msg": "hello %s",
+                                    "args": ("world",), "tool": "search_urls"})
+    entry = json.loads(log.JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["tool"] == "search_urls"
+    assert entry["level"] == "INFO"
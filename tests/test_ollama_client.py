@@ -1,5 +1,6 @@
 # Import the asynchronous Ollama client implementation
 from mcp_client.llm.ollama_client import OllamaClient
+from ollama import ChatResponse
 import asyncio
 
 # --- Tool definition used for testing tool call behavior ---
@@ -76,6 +77,103 @@ async def test_ollama_client():
 
     print("--- Ollama Client Test Finished ---")
 
+class FakeStreamingClient:
+    """
+    Stands in for `ollama.AsyncClient`, streaming a fixed list of chunks.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.kwargs = None
+
+    async def chat(self, **kwargs):
+        self.kwargs = kwargs
+
+        async def stream():
+            for chunk in self.chunks:
+                yield ChatResponse(model="fake", done=False, message=chunk)
+
+        return stream()
+
+
+def test_chat_stream_yields_deltas_and_tool_calls():
+    client = OllamaClient(model="fake")
+    client.client = FakeStreamingClient([
+        {"role": "assistant", "content": "Par"},
+        {"role": "assistant", "content": "is"},
+        {"role": "assistant", "content": "", "tool_calls": [
+            {"function": {"name": "get_current_weather", "arguments": {"location": "Paris"}}}
+        ]},
+    ])
+
+    async def collect():
+        return [block async for block in client.chat_stream(TOOL_CALL_MESSAGES, tools=[DUMMY_TOOL_SCHEMA])]
+
+    assert asyncio.run(collect()) == [
+        {"type": "text_delta", "text": "Par"},
+        {"type": "text_delta", "text": "is"},
+        {"type": "tool_use", "id": "get_current_weather", "name": "get_current_weather",
+         "input": {"location": "Paris"}},
+    ]
+    assert client.client.kwargs["stream"] is True
+    assert client.client.kwargs["tools"][0]["function"]["parameters"] == DUMMY_TOOL_SCHEMA["input_schema"]
+
+
+def test_tools_converted_once_and_options_sent():
+    client = OllamaClient(model="fake", keep_alive="30m", num_ctx=8192)
+    client.client = FakeStreamingClient([{"role": "assistant", "content": "Hi"}])
+    client.set_tools([DUMMY_TOOL_SCHEMA])
+
+    async def collect():
+        return [block async for block in client.chat_stream(TOOL_CALL_MESSAGES)]
+
+    asyncio.run(collect())
+    assert client.client.kwargs["tools"] is client.tools  # Reused, not rebuilt per call
+    assert client.client.kwargs["keep_alive"] == "30m"
+    assert client.client.kwargs["options"] == {"num_ctx": 8192}
+
+
+def test_warm_up_prefills_stable_prefix():
+    client = OllamaClient(model="fake", num_ctx=0)
+    client.client = FakeStreamingClient([])
+    client.set_tools([DUMMY_TOOL_SCHEMA])
+    system = [{"role": "system", "content": "You are a helpful assistant."}]
+
+    asyncio.run(client.warm_up(system))
+    assert client.client.kwargs["messages"] == system
+    assert client.client.kwargs["tools"] == client.tools
+    assert client.client.kwargs["options"] == {"num_predict": 1}
+
+
+class FakeShowClient:
+    def __init__(self, capabilities):
+        self.capabilities = capabilities
+        self.calls = 0
+
+    async def show(self, model):
+        self.calls += 1
+        if self.capabilities is None:
+            raise ConnectionError("no server")
+        return {"capabilities": self.capabilities}
+
+
+def test_supports_tool_role():
+    client = OllamaClient(model="fake", tool_role="auto")
+    client.client = FakeShowClient(["completion", "tools"])
+    assert asyncio.run(client.supports_tool_role())
+    assert asyncio.run(client.supports_tool_role())
+    assert client.client.calls == 1  # Asked once per client
+
+    client = OllamaClient(model="fake", tool_role="auto")
+    client.client = FakeShowClient(None)
+    assert not asyncio.run(client.supports_tool_role())  # Falls back to user messages
+
+    client = OllamaClient(model="fake", tool_role="0")
+    client.client = FakeShowClient(["tools"])
+    assert not asyncio.run(client.supports_tool_role())
+    assert client.client.calls == 0
+
+
 # Entry point for running this test script
 if __name__ == "__main__":
     asyncio.run(test_ollama_client())
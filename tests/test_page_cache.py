@@ -0,0 +1,128 @@
+from mcp_server import config
+from mcp_server.page_cache import PageCache
+from mcp_server.tools.fetch_page import fetch_page_text
+from mcp_server.urls import find_canonical_url, normalize_url, same_site
+from tests.helpers import run
+
+PAGE_HTML = "<html><body><main><p>Cached text</p></main></body></html>"
+
+
+def test_fresh_entry_skips_request(page_server):
+    url = page_server.add("/page", PAGE_HTML)
+    assert run(fetch_page_text(url))["text"] == "Cached text"
+    assert run(fetch_page_text(url + "#section"))["text"] == "Cached text"
+    assert len(page_server.requests) == 1
+
+
+def test_title_read_from_cached_body(page_server):
+    url = page_server.add("/titled", "<title>Caf&eacute;\n menu</title>" + PAGE_HTML)
+    assert run(fetch_page_text(url))["title"] == "Café menu"
+    assert run(fetch_page_text(url))["title"] == "Café menu"
+    assert len(page_server.requests) == 1
+
+
+def test_stale_entry_revalidates_with_etag(page_server, isolated_page_cache, monkeypatch):
+    url = page_server.add("/page", PAGE_HTML, headers={"ETag": '"v1"'})
+    run(fetch_page_text(url))
+
+    monkeypatch.setattr(config, "PAGE_CACHE_FRESH_TTL", 0)
+    page_server.pages["/page"] = (200, {"Content-Type": "text/html", "ETag": '"v1"'}, b"<p>changed</p>")
+    assert run(fetch_page_text(url))["text"] == "Cached text"  # 304 -> cached text
+
+    path, headers = page_server.requests[-1]
+    assert headers["If-None-Match"] == '"v1"'
+
+
+def test_changed_page_replaces_entry(page_server, monkeypatch):
+    url = page_server.add("/page", PAGE_HTML, headers={"ETag": '"v1"'})
+    run(fetch_page_text(url))
+
+    monkeypatch.setattr(config, "PAGE_CACHE_FRESH_TTL", 0)
+    page_server.add("/page", "<main>New text</main>", headers={"ETag": '"v2"'})
+    assert run(fetch_page_text(url))["text"] == "New text"
+
+
+def test_char_limit_applies_to_cached_text(page_server):
+    url = page_server.add("/page", PAGE_HTML)
+    run(fetch_page_text(url, char_limit=0))
+    assert run(fetch_page_text(url, char_limit=6))["text"] == "Cached"
+
+
+def test_lru_eviction_by_size(tmp_path):
+    cache = PageCache(str(tmp_path / "lru.sqlite3"), max_age=3600, max_bytes=250)
+    cache.put("a", b"x" * 100, "", "text/html", None, None)
+    cache.put("b", b"x" * 100, "", "text/html", None, None)
+    cache.get("a")  # 'b' is now least recently used
+    cache.put("c", b"x" * 100, "", "text/html", None, None)
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_age_eviction(tmp_path):
+    cache = PageCache(str(tmp_path / "age.sqlite3"), max_age=0, max_bytes=1000)
+    cache.put("a", b"body", "text", "text/html", None, None)
+    assert cache.get("a") is None
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.com:443/a?b=2&a=1#frag") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("http://example.com") == "http://example.com/"
+
+
+def test_normalize_url_drops_tracking_and_amp_cache():
+    assert normalize_url("https://example.com/a?utm_source=x&id=3&fbclid=y") == "https://example.com/a?id=3"
+    assert normalize_url("https://example-com.cdn.ampproject.org/c/s/example.com/a?amp=1") == "https://example.com/a"
+
+
+def test_find_canonical_url():
+    head = '<head><link rel="stylesheet" href="/s.css"><LINK href="/story?id=1&amp;p=2" rel="canonical"></head>'
+    assert find_canonical_url(head, "https://amp.example.com/story/amp") == "https://amp.example.com/story?id=1&p=2"
+    assert find_canonical_url("<p>none</p>", "https://example.com/") is None
+    assert same_site("https://amp.example.com/x", "https://www.example.com/y")
+    assert not same_site("https://example.com/x", "https://example.org/x")
+
+
+def test_canonical_url_is_served_from_variant(page_server):
+    canonical = page_server.base_url + "/story"
+    amp = page_server.add("/story/amp", f'<html><head><link rel="canonical" href="{canonical}"></head>'
+                                        "<body><main><p>Story text</p></main></body></html>")
+    page_server.add("/story", PAGE_HTML)
+    assert run(fetch_page_text(amp))["text"] == "Story text"
+    assert run(fetch_page_text(canonical + "?utm_source=feed"))["text"] == "Story text"
+    assert [path for path, _ in page_server.requests] == ["/story/amp"]
+
+
+def test_cross_site_canonical_is_ignored(page_server, isolated_page_cache):
+    url = page_server.add("/page", '<link rel="canonical" href="https://example.org/page"><main>Mine</main>')
+    run(fetch_page_text(url))
+    assert isolated_page_cache.get("https://example.org/page") is None
+
+
+def test_mirrors_share_one_entry(isolated_page_cache):
+    cache = isolated_page_cache
+    cache.put("https://a.example/p", b"<p>same</p>", "same text", "text/html", None, None)
+    cache.put("https://b.example/p", b"<p>same</p>", "same text", "text/html", None, None)
+    assert cache.get("https://b.example/p").url == "https://a.example/p"
+    assert cache.conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] == 1
+
+    # A page that changes stops being an alias
+    cache.put("https://b.example/p", b"<p>new</p>", "new text", "text/html", None, None)
+    assert cache.get("https://b.example/p").text == "new text"
+    assert cache.get("https://a.example/p").text == "same text"
+
+
+def test_mirror_alias_dropped_when_its_target_changes(isolated_page_cache):
+    cache = isolated_page_cache
+    cache.put("https://a.example/", b"<p>wait</p>", "Checking your browser", "text/html", None, None)
+    cache.put("https://b.example/", b"<p>wait</p>", "Checking your browser", "text/html", None, None,
+              aliases=["https://b.example/home"])
+    cache.put("https://a.example/", b"<p>article</p>", "The article of a", "text/html", None, None)
+
+    assert cache.get("https://a.example/").text == "The article of a"
+    assert cache.get("https://b.example/") is None  # Must be downloaded again, not served a's article
+    assert cache.get("https://b.example/home") is None
+    # A redirect or canonical alias names the same page, so it is kept
+    cache.put("https://c.example/amp", b"<p>c</p>", "C", "text/html", None, None, aliases=["https://c.example/"])
+    cache.put("https://c.example/amp", b"<p>c2</p>", "C, updated", "text/html", None, None)
+    assert cache.get("https://c.example/").text == "C, updated"
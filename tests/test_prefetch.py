@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from mcp_server import config, page_cache
+from mcp_server.prefetch import Prefetcher
+from mcp_server.tools import search_urls as search_module
+from mcp_server.tools.fetch_page import fetch_page_text
+from mcp_server.tools.search_urls import search_urls
+from tests.helpers import run
+
+
+class FakeDDGS:
+    def __init__(self, urls):
+        self.urls = urls
+
+    def text(self, query, region, safesearch, max_results):
+        return [{"href": url, "title": "Page", "body": "Text"} for url in self.urls]
+
+
+@pytest.fixture
+def prefetching(monkeypatch):
+    monkeypatch.setattr(config, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(config, "PREFETCH_TOP_K", 2)
+    page_cache.set_page_cache(None)  # Only the prefetch can answer a second time
+    monkeypatch.setattr(config, "PAGE_CACHE_ENABLED", False)
+
+
+def test_search_results_are_prefetched(page_server, prefetching, monkeypatch):
+    urls = [page_server.add(f"/{i}", f"<main>Page {i}</main>") for i in range(3)]
+    monkeypatch.setattr(search_module, "get_ddgs", lambda: FakeDDGS(urls))
+
+    async def scenario():
+        await search_urls("pages")
+        await asyncio.sleep(0.3)  # The model deliberates
+        fetched = len(page_server.requests)
+        texts = [(await fetch_page_text(url))["text"] for url in urls]
+        return fetched, texts
+
+    fetched, texts = run(scenario())
+    assert fetched == 2  # The top two, before any fetch_page_text call
+    assert texts == ["Page 0", "Page 1", "Page 2"]
+    assert sorted(path for path, _ in page_server.requests) == ["/0", "/1", "/2"]
+
+
+def test_prefetch_cut_at_byte_cap_is_not_used_for_more_text(page_server, prefetching, monkeypatch):
+    monkeypatch.setattr(config, "PREFETCH_MAX_BYTES", 200)
+    url = page_server.add("/long", "<main>" + "<p>Some text.</p>" * 100 + "</main>")
+    monkeypatch.setattr(search_module, "get_ddgs", lambda: FakeDDGS([url]))
+
+    async def scenario():
+        await search_urls("long")
+        await asyncio.sleep(0.2)
+        return (await fetch_page_text(url, char_limit=1000))["text"]
+
+    assert len(run(scenario())) == 1000
+    assert len(page_server.requests) == 2  # The prefetched prefix was too short
+
+
+def test_unclaimed_prefetches_expire_and_concurrency_is_bounded():
+    in_flight = []
+    peak = []
+
+    async def load(url):
+        in_flight.append(url)
+        peak.append(len(in_flight))
+        try:
+            await asyncio.sleep(0.05 if url.endswith("fast") else 10)
+        finally:
+            in_flight.remove(url)
+        return url, True
+
+    async def scenario():
+        prefetcher = Prefetcher(load, concurrency=2, ttl=0.3, max_pending=3)
+        prefetcher.schedule(["https://a.test/fast", "https://b.test/fast", "https://c.test/slow",
+                             "https://d.test/slow"])
+        assert prefetcher.claim("https://a.test/fast") is None  # Oldest beyond max_pending: cancelled
+        fast = await prefetcher.claim("https://B.test/fast")
+        await asyncio.sleep(0.5)
+        return prefetcher, fast
+
+    prefetcher, fast = asyncio.run(scenario())
+    assert fast == ("https://b.test/fast", True)
+    assert max(peak) <= 2
+    assert prefetcher.entries == {}  # The slow ones expired
+    assert prefetcher.stats == {"started": 4, "claimed": 1, "cancelled": 3}
@@ -0,0 +1,42 @@
+from mcp_server.relevance import GAP, bm25_scores, select_chunks, split_chunks, tokenize
+
+BOILERPLATE = "\n".join(f"Menu entry {i} | Accept cookies | Subscribe now" for i in range(40))
+PAGE = BOILERPLATE + "\nThe Eiffel Tower is 330 metres tall and was completed in 1889.\n" + BOILERPLATE
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("How tall is the Eiffel Tower?") == ["tall", "eiffel", "tower"]
+
+
+def test_split_chunks_keeps_whole_lines():
+    text = "\n".join(["a" * 30] * 5)
+    chunks = split_chunks(text, chunk_chars=70)
+    assert chunks == ["a" * 30 + "\n" + "a" * 30] * 2 + ["a" * 30]
+    # Overlong lines are broken at a space
+    assert split_chunks("word " * 30, chunk_chars=50)[0] == ("word " * 10).strip()
+
+
+def test_bm25_prefers_matching_and_rare_terms():
+    chunks = ["tower tower history", "tower", "cookies and menus"]
+    scores = bm25_scores(chunks, "tower history")
+    assert scores[0] > scores[1] > scores[2] == 0
+
+
+def test_select_chunks_returns_relevant_passage():
+    text = select_chunks(PAGE, "How tall is the Eiffel Tower?", 200)
+    assert "330 metres" in text
+    assert len(text) <= 200
+    assert text[:200] != PAGE[:200]
+
+
+def test_select_chunks_orders_by_page_and_marks_gaps():
+    text = "\n".join(["alpha " * 40, "filler " * 30, "beta " * 40, "filler " * 30])
+    selected = select_chunks(text, "alpha beta", 700)
+    assert selected.index("alpha") < selected.index("beta")
+    assert GAP in selected
+    assert "filler" not in selected
+
+
+def test_select_chunks_falls_back_to_truncation():
+    assert select_chunks(PAGE, "unrelated zebra", 50) == PAGE[:50]
+    assert select_chunks("short page", "eiffel", 50) == "short page"
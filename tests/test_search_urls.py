@@ -1,5 +1,101 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mcp_server.search_cache import SearchCache, make_search_key
+from mcp_server.tools import search_urls as search_module
 from mcp_server.tools.search_urls import search_urls
 
+
+class FakeDDGS:
+    """
+    Stubbed DuckDuckGo backend that records every upstream query.
+    """
+
+    def __init__(self, delay=0.0, results=3):
+        self.delay = delay
+        self.results = results
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def text(self, query, region, safesearch, max_results):
+        with self.lock:
+            self.calls.append((query, region, max_results))
+        time.sleep(self.delay)
+        return [
+            {"href": f"https://example.com/{query}/{i}", "title": f" Result\n{i} ", "body": "About " + query}
+            for i in range(self.results)
+        ]
+
+
+@pytest.fixture
+def fake_ddgs(monkeypatch):
+    backend = FakeDDGS()
+    monkeypatch.setattr(search_module, "get_ddgs", lambda: backend)
+    return backend
+
+
+def test_returns_hits(fake_ddgs):
+    assert asyncio.run(search_urls("ai", max_results=2)) == [
+        {"url": "https://example.com/ai/0", "title": "Result 0", "snippet": "About ai"},
+        {"url": "https://example.com/ai/1", "title": "Result 1", "snippet": "About ai"},
+    ]
+
+
+def test_repeated_query_is_cached(fake_ddgs):
+    asyncio.run(search_urls("AI  chips"))
+    asyncio.run(search_urls("ai chips"))
+    assert len(fake_ddgs.calls) == 1
+
+    asyncio.run(search_urls("ai chips", region="de-de"))
+    assert len(fake_ddgs.calls) == 2
+
+
+def test_concurrent_identical_queries_are_coalesced(fake_ddgs):
+    fake_ddgs.delay = 0.1
+
+    async def many():
+        return await asyncio.gather(*(search_urls("news") for _ in range(5)))
+
+    results = asyncio.run(many())
+    assert len(fake_ddgs.calls) == 1
+    assert all(r == results[0] for r in results)
+
+
+def test_failures_are_not_cached(fake_ddgs):
+    fake_ddgs.results = 0
+    with pytest.raises(RuntimeError, match="No search results"):
+        asyncio.run(search_urls("nothing"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(search_urls("nothing"))
+    assert len(fake_ddgs.calls) == 2
+
+
+def test_empty_query():
+    with pytest.raises(ValueError):
+        asyncio.run(search_urls("   "))
+
+
+def test_disk_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    key = make_search_key("Query", "wt-wt", 3)
+    SearchCache(ttl=60, max_entries=10, path=path).put(key, ["https://a"])
+    assert SearchCache(ttl=60, max_entries=10, path=path).get(key) == ["https://a"]
+
+
+def test_memory_cache_expires_and_evicts():
+    cache = SearchCache(ttl=0, max_entries=10)
+    cache.put(("a", "wt-wt", 3), ["x"])
+    assert cache.get(("a", "wt-wt", 3)) is None
+
+    cache = SearchCache(ttl=60, max_entries=1)
+    cache.put(("a", "wt-wt", 3), ["x"])
+    cache.put(("b", "wt-wt", 3), ["y"])
+    assert cache.get(("a", "wt-wt", 3)) is None
+
+
 if __name__ == "__main__":
     # Prompt the user to enter a search query
     query = input("Enter search query: ").strip()
@@ -9,11 +105,11 @@ if __name__ == "__main__":
         print("\n--- Search results ---")
 
         # Perform the search using DuckDuckGo
-        urls = search_urls(query, max_results=5)
+        hits = asyncio.run(search_urls(query, max_results=5))
 
-        # Print the resulting URLs
-        for i, url in enumerate(urls, start=1):
-            print(f"{i}. {url}")
+        # Print the resulting hits
+        for i, hit in enumerate(hits, start=1):
+            print(f"{i}. {hit['title']}\n   {hit['url']}\n   {hit['snippet']}")
 
     except Exception as e:
         # Print any error that occurs
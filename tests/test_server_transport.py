@@ -0,0 +1,75 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from mcp_client.agent import MCPAgent
+from mcp_server import http_client
+from tests.helpers import run
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(params=["sse", "streamable-http"])
+def http_server(request, tmp_path):
+    """
+    Runs the MCP server as a shared HTTP service; yields its URL.
+    """
+    port = free_port()
+    env = {**os.environ, "PAGE_CACHE_PATH": str(tmp_path / "pages.sqlite3")}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "mcp_server", "--transport", request.param, "--port", str(port)],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    yield f"http://127.0.0.1:{port}" + ("/sse" if request.param == "sse" else "/mcp")
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def test_agents_share_one_http_server(http_server, page_server):
+    url = page_server.add("/shared", "<html><body><main><p>Shared page</p></main></body></html>")
+
+    async def fetch_with_new_agent():
+        agent = MCPAgent(echo=False)
+        try:
+            assert await agent.connect_to_server("web", {"url": http_server}, timeout=10)
+            return await agent.handle_tool_call("fetch_page_text", {"url": url}, "fetch_page_text")
+        finally:
+            await agent.cleanup()
+
+    assert asyncio.run(fetch_with_new_agent()) == f"{url}\nShared page"
+    assert asyncio.run(fetch_with_new_agent()) == f"{url}\nShared page"
+    # The second agent was served from the server's cache, kept across sessions
+    assert len(page_server.requests) == 1
+
+
+def test_session_end_closes_pools_only_over_stdio(monkeypatch):
+    from mcp_server import __main__ as server
+
+    async def client_closed_after_session():
+        client = http_client.get_client()
+        async with server.lifespan(server.mcp):
+            pass
+        return client.is_closed
+
+    monkeypatch.setattr(server, "shared_sessions", True)
+    assert not run(client_closed_after_session())
+    monkeypatch.setattr(server, "shared_sessions", False)
+    assert run(client_closed_after_session())
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+from starlette.testclient import TestClient
+
+from mcp_client.agent import MCPAgent
+from mcp_client.service import AgentService, ServiceBusyError, create_app
+
+
+class EchoLLM:
+    """
+    Answers each call with the last user message after `delay` seconds, recording the call order.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def set_tools(self, tools):
+        pass
+
+    async def supports_tool_role(self):
+        return False
+
+    async def chat_stream(self, messages, tools=None):
+        query = messages[-1]["content"]
+        self.calls.append(query)
+        await asyncio.sleep(self.delay)
+        yield {"type": "text_delta", "text": f"re: {query}"}
+
+
+def make_service(delay=0.0, **kwargs):
+    agent = MCPAgent(echo=False)
+    agent.llm_client = EchoLLM(delay)
+    return AgentService(agent, **kwargs)
+
+
+def test_conversations_keep_separate_histories():
+    service = make_service()
+
+    async def scenario():
+        return await asyncio.gather(
+            service.submit("alice", "a1"), service.submit("bob", "b1"), service.submit("alice", "a2"),
+        )
+
+    assert asyncio.run(scenario()) == ["re: a1", "re: b1", "re: a2"]
+    alice = [m["content"] for m in service.conversations["alice"].messages[1:]]
+    bob = [m["content"] for m in service.conversations["bob"].messages[1:]]
+    assert alice == ["a1", "re: a1", "a2", "re: a2"]
+    assert bob == ["b1", "re: b1"]
+    assert service.pending == 0
+
+
+def test_round_robin_between_conversations():
+    service = make_service(delay=0.01, max_active=1)
+
+    async def scenario():
+        busy = [asyncio.ensure_future(service.submit("busy", f"busy{i}")) for i in range(4)]
+        await asyncio.sleep(0)
+        other = service.submit("other", "other0")
+        await asyncio.gather(*busy, other)
+
+    asyncio.run(scenario())
+    # The late conversation is served after one more turn of the busy one, not after all of them
+    assert service.agent.llm_client.calls.index("other0") == 1
+
+
+def test_one_query_at_a_time_per_conversation():
+    service = make_service(delay=0.02, max_active=4)
+
+    async def scenario():
+        await asyncio.gather(*(service.submit("same", f"q{i}") for i in range(3)))
+
+    asyncio.run(scenario())
+    # Each query saw the previous reply in its history
+    contents = [m["content"] for m in service.conversations["same"].messages[1:]]
+    assert contents == ["q0", "re: q0", "q1", "re: q1", "q2", "re: q2"]
+
+
+def test_admission_control():
+    service = make_service(delay=0.05, max_active=1, max_pending=3, max_pending_per_conversation=1)
+
+    async def scenario():
+        accepted = [asyncio.ensure_future(service.submit("a", "1"))]
+        await asyncio.sleep(0)  # Running
+        accepted.append(asyncio.ensure_future(service.submit("a", "2")))
+        await asyncio.sleep(0)  # Queued behind it
+        with pytest.raises(ServiceBusyError, match="conversation 'a'"):
+            await service.submit("a", "3")
+
+        accepted.append(asyncio.ensure_future(service.submit("b", "1")))
+        await asyncio.sleep(0)
+        with pytest.raises(ServiceBusyError, match="Service busy"):
+            await service.submit("c", "1")
+        return await asyncio.gather(*accepted)
+
+    assert asyncio.run(scenario()) == ["re: 1", "re: 2", "re: 1"]
+
+
+def test_http_api():
+    service = make_service()
+    with TestClient(create_app(service)) as client:
+        response = client.post("/conversations/alice/messages", json={"query": "hello"})
+        assert response.status_code == 200
+        assert response.json() == {"conversation_id": "alice", "reply": "re: hello"}
+
+        assert client.post("/conversations/alice/messages", json={"query": ""}).status_code == 400
+        assert client.get("/status").json()["conversations"] == 1
+        assert client.delete("/conversations/alice").status_code == 204
+        assert client.delete("/conversations/alice").status_code == 404
+
+        service.max_pending = 0
+        busy = client.post("/conversations/bob/messages", json={"query": "hi"})
+        assert busy.status_code == 503
+        assert busy.headers["Retry-After"] == "1"
@@ -0,0 +1,66 @@
+"""
+Startup benchmark for the MCP server process.
+
+The client launches `python -m mcp_server` at every session start, so the time
+until the server answers `initialize` is paid by every session. The server runs
+under `-X importtime` so a regression can be traced to the import that caused it.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds from spawning the server to its `initialize` response (best of RUNS)
+INITIALIZE_BUDGET = float(os.getenv("MCP_SERVER_STARTUP_BUDGET", "2.0"))
+RUNS = 3
+
+# Only needed once a tool runs, never for the handshake
+DEFERRED_MODULES = {"bs4", "duckduckgo_search", "primp", "lxml", "mcp_server.extract"}
+
+
+def parse_importtime(output: str) -> dict:
+    """
+    Maps each module in `-X importtime` output to its cumulative import time in seconds.
+    """
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        imports[name.strip()] = int(cumulative) / 1e6
+    return imports
+
+
+async def time_to_initialize():
+    params = StdioServerParameters(
+        command=sys.executable, args=["-X", "importtime", "-m", "mcp_server"], cwd=REPO_ROOT
+    )
+    with tempfile.TemporaryFile("w+") as errlog:
+        started = time.perf_counter()
+        async with stdio_client(params, errlog=errlog) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                elapsed = time.perf_counter() - started
+        errlog.seek(0)
+        return elapsed, parse_importtime(errlog.read())
+
+
+def test_time_to_initialize_within_budget():
+    runs = [asyncio.run(time_to_initialize()) for _ in range(RUNS)]
+    elapsed, imports = min(runs, key=lambda run: run[0])
+
+    slowest = sorted(imports.items(), key=lambda item: -item[1])[:10]
+    report = "\n".join(f"  {seconds * 1000:7.1f} ms  {name}" for name, seconds in slowest)
+    assert elapsed < INITIALIZE_BUDGET, (
+        f"Server took {elapsed:.2f} s to initialize (budget {INITIALIZE_BUDGET} s). Slowest imports:\n{report}"
+    )
+    assert not DEFERRED_MODULES & set(imports), (
+        f"Imported at startup: {sorted(DEFERRED_MODULES & set(imports))}"
+    )
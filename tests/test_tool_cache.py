@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from mcp_client.tool_cache import HIT, MISS, SHARED, ToolResultCache
+
+
+def test_make_key_canonicalizes_arguments_and_skips_uncached_tools():
+    cache = ToolResultCache({"search_urls": 60})
+    key = cache.make_key("c1", "search_urls", {"query": "x", "max_results": 5})
+
+    assert key == cache.make_key("c1", "search_urls", {"max_results": 5, "query": "x"})
+    assert key != cache.make_key("c2", "search_urls", {"query": "x", "max_results": 5})
+    assert cache.make_key("c1", "send_email", {"to": "x"}) is None  # No TTL: never cached
+
+
+def test_entries_expire_and_are_evicted_lru():
+    cache = ToolResultCache({"a": 60, "b": 0.05}, max_entries=2)
+    key_a1, key_a2, key_b = (cache.make_key("", "a", {"n": 1}), cache.make_key("", "a", {"n": 2}),
+                             cache.make_key("", "b", {}))
+    cache.put(key_b, "b")
+    cache.put(key_a1, "a1")
+    assert cache.get(key_b) == "b"
+
+    asyncio.run(asyncio.sleep(0.06))
+    assert cache.get(key_b) is None  # Expired
+    cache.put(key_a2, "a2")
+    cache.put(key_b, "b")
+    assert cache.get(key_a1) is None  # Least recently used
+    assert cache.get(key_a2) == "a2"
+
+
+def test_run_shares_concurrent_calls_and_does_not_cache_errors():
+    cache = ToolResultCache({"t": 60})
+    key = cache.make_key("", "t", {})
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def failing():
+        raise RuntimeError("boom")
+
+    async def scenario():
+        first = await asyncio.gather(cache.run(key, call), cache.run(key, call))
+        return first, await cache.run(key, call)
+
+    first, again = asyncio.run(scenario())
+    assert first == [("result", MISS), ("result", SHARED)]
+    assert again == ("result", HIT)
+    assert len(calls) == 1
+    assert cache.stats == {HIT: 1, SHARED: 1, MISS: 1}
+
+    other = cache.make_key("", "t", {"n": 1})
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.run(other, failing))
+    assert cache.get(other) is None
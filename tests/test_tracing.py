@@ -0,0 +1,148 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+from ollama import ChatResponse
+
+from mcp_client.agent import MCPAgent
+from mcp_client.llm.ollama_client import OllamaClient
+from mcp_tracing import tracer as tracing
+from mcp_tracing.tracer import Tracer, format_summary, summarize
+from tests.test_agent import FakeLLM
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """
+    Enables tracing for the test, writing to a temporary file.
+    """
+    path = str(tmp_path / "trace.json")
+    tracing.set_tracer(Tracer(path))
+    yield path
+    tracing.set_tracer(None)
+
+
+def load_events(path):
+    with open(path) as f:
+        return json.load(f)["traceEvents"]
+
+
+def by_name(events):
+    return {event["name"]: event for event in events}
+
+
+def test_spans_nest_and_cross_processes(tmp_path):
+    client = Tracer(str(tmp_path / "trace.json"))
+    server = Tracer(str(tmp_path / "server.jsonl"), process_name="server", stream=True)
+
+    with client.span("agent.query"):
+        with client.span("tool.fetch_page_text"):
+            traceparent = client.traceparent()
+            with server.remote_parent(traceparent):
+                with server.span("server.fetch_page_text"):
+                    server.annotate(status=200)
+
+    events = by_name(client.write([str(tmp_path / "server.jsonl")]))
+    query, tool, remote = events["agent.query"], events["tool.fetch_page_text"], events["server.fetch_page_text"]
+    assert tool["args"]["parent_id"] == query["args"]["span_id"]
+    assert remote["args"]["parent_id"] == tool["args"]["span_id"]
+    assert remote["args"]["trace_id"] == query["args"]["trace_id"]
+    assert remote["args"]["status"] == 200
+    assert traceparent == f"00-{query['args']['trace_id']}-{tool['args']['span_id']}-01"
+    assert len(load_events(str(tmp_path / "trace.json"))) == 3
+
+
+def test_disabled_tracer_records_nothing(tmp_path):
+    tracer = Tracer("")
+    with tracer.span("agent.query") as span:
+        tracer.annotate(hit=True)
+        assert span is None
+        assert tracer.traceparent() is None
+    assert tracer.spans == []
+    assert tracer.write() == []
+
+
+def test_summary_aggregates_by_name():
+    events = [
+        {"name": "llm.chat", "dur": 2_000_000},
+        {"name": "llm.chat", "dur": 1_000_000},
+        {"name": "fetch.parse", "dur": 5_000},
+    ]
+    assert summarize(events)["llm.chat"] == {"count": 2, "total": 3.0, "max": 2.0}
+    table = format_summary(events).splitlines()
+    assert table[1].startswith("llm.chat")  # Slowest stage first
+
+
+class TimedStreamingClient:
+    """
+    Streams one text chunk and a final chunk carrying Ollama's timings.
+    """
+
+    async def chat(self, **kwargs):
+        async def stream():
+            yield ChatResponse(model="fake", done=False, message={"role": "assistant", "content": "Hi"})
+            yield ChatResponse(
+                model="fake", done=True, message={"role": "assistant", "content": ""},
+                total_duration=300_000_000, load_duration=50_000_000,
+                prompt_eval_count=120, prompt_eval_duration=100_000_000,
+                eval_count=20, eval_duration=140_000_000,
+            )
+        return stream()
+
+
+def test_llm_call_split_into_queue_prefill_generate(trace_file):
+    client = OllamaClient(model="fake")
+    client.client = TimedStreamingClient()
+
+    async def collect():
+        return [block async for block in client.chat_stream([{"role": "user", "content": "Hello"}])]
+
+    asyncio.run(collect())
+    events = by_name(tracing.get_tracer().write())
+    chat = events["llm.chat"]
+    assert chat["args"]["prompt_tokens"] == 120
+    assert chat["args"]["completion_tokens"] == 20
+    for stage in ("llm.queue", "llm.prefill", "llm.generate"):
+        assert events[stage]["args"]["parent_id"] == chat["args"]["span_id"]
+    assert events["llm.prefill"]["dur"] == 100_000
+    assert events["llm.generate"]["dur"] == 140_000
+    assert events["llm.generate"]["args"]["tokens_per_s"] == pytest.approx(142.9)
+    assert events["llm.queue"]["args"]["load_ms"] == 50.0
+
+
+def test_server_spans_join_agent_trace(trace_file, page_server, tmp_path):
+    url = page_server.add("/page", "<html><body><main><p>Traced text</p></main></body></html>")
+
+    async def scenario():
+        agent = MCPAgent()
+        agent.llm_client = FakeLLM([
+            {"content": [{"type": "tool_use", "id": "fetch_page_text", "name": "fetch_page_text",
+                          "input": {"url": url}}]},
+            {"content": [{"type": "text", "text": "done"}]},
+        ])
+        await agent.connect_to_server("scraper", {
+            "command": sys.executable,
+            "args": ["-m", "mcp_server"],
+            "cwd": REPO_ROOT,
+            "env": {"PAGE_CACHE_ENABLED": "0"},
+        })
+        try:
+            await agent.process_query("question")
+        finally:
+            await agent.cleanup()
+        return agent
+
+    agent = asyncio.run(scenario())
+    assert agent.messages[-2]["content"].endswith("Traced text")
+
+    events = by_name(load_events(trace_file))
+    tool, server = events["tool.fetch_page_text"], events["server.fetch_page_text"]
+    assert server["args"]["parent_id"] == tool["args"]["span_id"]
+    assert events["agent.iteration"]["args"]["parent_id"] == events["agent.query"]["args"]["span_id"]
+    assert events["fetch.download"]["args"]["parent_id"] == server["args"]["span_id"]
+    assert events["fetch.parse"]["args"]["parent_id"] == events["fetch.download"]["args"]["span_id"]
+    assert server["pid"] != tool["pid"]
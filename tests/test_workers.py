@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import pytest
+
+from mcp_server.extract import extract_text_from_bytes
+from mcp_server.workers import ServerBusyError, WorkerPool
+
+
+def test_runs_off_the_event_loop():
+    pool = WorkerPool("thread", workers=2, max_pending=4)
+    try:
+        name = asyncio.run(pool.run(lambda: threading.current_thread().name))
+        assert name.startswith("extract")
+    finally:
+        pool.shutdown()
+
+
+def test_process_mode_extracts_text():
+    pool = WorkerPool("process", workers=1, max_pending=2)
+    try:
+        text = asyncio.run(pool.run(extract_text_from_bytes, "<main>Grüße</main>".encode("utf-8"), "utf-8"))
+        assert text == "Grüße"
+    finally:
+        pool.shutdown()
+
+
+def test_limits_running_jobs_and_rejects_when_full():
+    pool = WorkerPool("thread", workers=1, max_pending=2)
+    release = threading.Event()
+    running = []
+
+    def job(i):
+        running.append(i)
+        release.wait(5)
+        return i
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(job, 1))
+        second = asyncio.ensure_future(pool.run(job, 2))
+        await asyncio.sleep(0.05)
+        assert running == [1]  # The second job waits for a free worker
+        with pytest.raises(ServerBusyError):
+            await pool.run(job, 3)
+        release.set()
+        return await asyncio.gather(first, second)
+
+    try:
+        assert asyncio.run(scenario()) == [1, 2]
+        assert pool.pending == 0
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        WorkerPool("gpu", workers=1, max_pending=1)